@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+
+'''
+Banco de sudokus pregenerados en un archivo binario.
+
+En lugar de generar y tallar un sudoku cada vez que empieza un nivel, el
+juego puede leerlo de un banco construido de antemano (por ejemplo con la
+salida de lote.py). El archivo se abre con mmap, asi que solo se cargan en
+memoria las paginas de los sudokus que se leen y tomar el sudoku k de un
+nivel cuesta O(1) sin importar cuantos millones haya.
+
+Formato (enteros little-endian):
+
+    Cabecera:  'SUDB', version (H), cantidad de niveles (H)
+    Por nivel: nivel (B), 3 bytes de relleno, posicion (Q), cantidad (Q)
+    Registros: de TAMANO_REGISTRO bytes cada uno, agrupados por nivel.
+
+Cada registro guarda la solucion con 4 bits por casilla (41 bytes) y un
+mapa de 81 bits (11 bytes) con las casillas que son pista; el sudoku se
+obtiene borrando de la solucion las casillas que no son pista.
+
+Para construir un banco:
+    python banco.py sudokus.bin principiante.txt intermedio.txt avanzado.txt
+'''
+
+import mmap
+import random
+import struct
+import sys
+
+from tablero import Tablero
+
+# Identificador y version del formato.
+MAGICO = b'SUDB'
+VERSION = 1
+
+CABECERA = struct.Struct('<4sHH')
+SECCION = struct.Struct('<B3xQQ')
+
+# Bytes de la solucion (81 casillas de 4 bits) y del mapa de pistas.
+BYTES_SOLUCION = 41
+BYTES_PISTAS = 11
+TAMANO_REGISTRO = BYTES_SOLUCION + BYTES_PISTAS
+
+# Tabla con los dos numeros de 4 bits de cada byte posible.
+_MITADES = [(b >> 4, b & 15) for b in range(256)]
+
+
+def empaquetar(tablero):
+
+    '''
+    Convierte un tablero con su solucion en un registro del banco.
+
+    param Tablero tablero: Tablero con las pistas y la solucion.
+
+    return bytes: Registro de TAMANO_REGISTRO bytes.
+    '''
+
+    numeros = tablero.solucion + b'\0'
+    registro = bytearray(numeros[k] << 4 | numeros[k + 1]
+                         for k in range(0, 82, 2))
+    registro += tablero.pistas.to_bytes(BYTES_PISTAS, 'little')
+    return bytes(registro)
+
+
+def desempaquetar(registro):
+
+    '''
+    Convierte un registro del banco en un tablero.
+
+    param bytes registro: Registro de TAMANO_REGISTRO bytes.
+
+    return Tablero: Tablero con las pistas y la solucion.
+    '''
+
+    numeros = bytearray()
+    for byte in registro[:BYTES_SOLUCION]:
+        numeros.extend(_MITADES[byte])
+    del numeros[81:]
+    pistas = int.from_bytes(registro[BYTES_SOLUCION:TAMANO_REGISTRO],
+                            'little')
+
+    celdas = bytearray(numero if pistas >> k & 1 else 0
+                       for k, numero in enumerate(numeros))
+    return Tablero(celdas, pistas, numeros)
+
+
+def escribir_banco(ruta, niveles):
+
+    '''
+    Escribe un banco de sudokus.
+
+    param str ruta: Ruta del archivo a crear.
+    param dict niveles: Para cada nivel, un iterable de objetos Tablero
+                        con su solucion. Los iterables se recorren una
+                        sola vez, asi que pueden ser generadores.
+    '''
+
+    with open(ruta, 'wb') as archivo:
+        # Reserva el espacio de la cabecera, se escribe al final cuando
+        # ya se sabe cuantos sudokus tiene cada nivel.
+        inicio = CABECERA.size + SECCION.size * len(niveles)
+        archivo.write(b'\0' * inicio)
+
+        secciones = []
+        posicion = inicio
+        for nivel, sudokus in niveles.items():
+            cantidad = 0
+            for tablero in sudokus:
+                archivo.write(empaquetar(tablero))
+                cantidad += 1
+            secciones.append(SECCION.pack(nivel, posicion, cantidad))
+            posicion += cantidad * TAMANO_REGISTRO
+
+        archivo.seek(0)
+        archivo.write(CABECERA.pack(MAGICO, VERSION, len(niveles)))
+        archivo.write(b''.join(secciones))
+
+
+class Banco:
+
+    '''
+    Clase que da acceso de solo lectura a un banco de sudokus mapeado
+    en memoria.
+    '''
+
+    def __init__(self, ruta):
+
+        '''
+        Constructor de la clase. Abre el archivo y lee la cabecera.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str ruta: Ruta del banco.
+        '''
+
+        with open(ruta, 'rb') as archivo:
+            self.datos = mmap.mmap(archivo.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+
+        magico, version, cantidad = CABECERA.unpack_from(self.datos, 0)
+        if magico != MAGICO or version != VERSION:
+            self.datos.close()
+            raise ValueError(f'{ruta} no es un banco de sudokus valido')
+
+        # Para cada nivel, la posicion de su primer registro y la cantidad.
+        self.secciones = {}
+        for k in range(cantidad):
+            nivel, posicion, total = SECCION.unpack_from(
+                self.datos, CABECERA.size + k * SECCION.size)
+            self.secciones[nivel] = (posicion, total)
+
+    def cantidad(self, nivel):
+
+        '''
+        Devuelve cuantos sudokus hay de un nivel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int nivel: Nivel de dificultad.
+
+        return int: Cantidad de sudokus del nivel.
+        '''
+
+        return self.secciones.get(nivel, (0, 0))[1]
+
+    def leer(self, nivel, k):
+
+        '''
+        Lee el sudoku k de un nivel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int nivel: Nivel de dificultad.
+        :param int k: Numero del sudoku dentro del nivel.
+
+        return Tablero: Tablero con las pistas y la solucion.
+        '''
+
+        posicion, total = self.secciones[nivel]
+        if not 0 <= k < total:
+            raise IndexError(f'el nivel {nivel} tiene {total} sudokus')
+        inicio = posicion + k * TAMANO_REGISTRO
+        return desempaquetar(self.datos[inicio:inicio + TAMANO_REGISTRO])
+
+    def aleatorio(self, nivel, aleatorio=random):
+
+        '''
+        Lee un sudoku al azar de un nivel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int nivel: Nivel de dificultad.
+        :param random.Random aleatorio: Generador de numeros aleatorios.
+
+        return Tablero: Tablero con las pistas y la solucion.
+        '''
+
+        return self.leer(nivel, aleatorio.randrange(self.cantidad(nivel)))
+
+    def cerrar(self):
+
+        '''
+        Libera el mapa de memoria.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        self.datos.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def _leer_lote(rutas, nivel):
+
+    '''
+    Recorre los archivos producidos por lote.py y devuelve los sudokus de
+    un nivel.
+
+    param list rutas: Archivos de lote.py.
+    param int nivel: Nivel que se quiere leer.
+
+    return generator: Objetos Tablero.
+    '''
+
+    for ruta in rutas:
+        with open(ruta) as archivo:
+            for linea in archivo:
+                partes = linea.split()
+                if len(partes) == 4 and int(partes[1]) == nivel:
+                    yield Tablero.de_texto(partes[2], partes[3])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(f'uso: {sys.argv[0]} banco.bin lote1.txt [lote2.txt ...]')
+        sys.exit(1)
+
+    from tallado import VACIAS_NIVEL
+
+    escribir_banco(sys.argv[1], {nivel: _leer_lote(sys.argv[2:], nivel)
+                                 for nivel in sorted(VACIAS_NIVEL)})
+    with Banco(sys.argv[1]) as banco:
+        for nivel in sorted(VACIAS_NIVEL):
+            print(f'nivel {nivel}: {banco.cantidad(nivel)} sudokus')
@@ -0,0 +1,113 @@
+'''
+Benchmark del tiempo de arranque del juego.
+
+Mide, en un proceso nuevo y sin ventana real, el tiempo desde que arranca
+Python hasta que se muestra el primer cuadro del menu principal:
+
+    anterior: carga todo al inicio como antes (los cinco sonidos, las
+              imagenes sin convertir y el boton escalado) y luego dibuja
+              el menu.
+    actual:   sudoku.iniciar() y la escena del menu; los sonidos se
+              decodifican en segundo plano.
+
+Tambien muestra cuanto tarda copiar el fondo a la pantalla con la imagen
+sin convertir y convertida.
+
+Uso: python benchmarks/bench_arranque.py [repeticiones]
+'''
+
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PREAMBULO = '''
+import time
+inicio = time.perf_counter()
+import os, sys
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+'''
+
+# Arranque como estaba antes del administrador de recursos (sin la musica,
+# que no esta en el repositorio y hacia fallar el arranque).
+ANTERIOR = PREAMBULO + '''
+import pygame
+pygame.init()
+screen = pygame.display.set_mode((800, 700))
+fuente = pygame.font.Font("WaHandwriting-Regular.ttf", 37)
+fuente2 = pygame.font.Font("WaHandwriting-Regular.ttf", 60)
+imagen_boton = pygame.image.load("boton.png")
+imagen_boton = pygame.transform.scale(imagen_boton, (268, 150))
+imagen_fondo_menu = pygame.image.load("fondo_menu.jpg")
+imagen_fondo = pygame.image.load("fondo.jpg")
+sonidos = [pygame.mixer.Sound(nombre) for nombre in (
+    "principiante_sound.mp3", "intermedio_sound.mp3", "avanzado_sound.mp3",
+    "win_sound.mp3", "gameover_sound.mp3")]
+screen.blit(imagen_fondo_menu, (0, 0))
+for y, texto in ((300, "PRINCIPIANTE"), (450, "INTERMEDIO"),
+                 (600, "AVANZADO")):
+    screen.blit(imagen_boton, imagen_boton.get_rect(center=(170, y)))
+    superficie = fuente.render(texto, True, "black")
+    screen.blit(superficie, superficie.get_rect(center=(170, y)))
+pygame.display.update()
+print(time.perf_counter() - inicio)
+'''
+
+# Arranque actual.
+ACTUAL = PREAMBULO + '''
+import sudoku
+sudoku.iniciar()
+sudoku.GestorEscenas(sudoku.MenuPrincipal())
+print(time.perf_counter() - inicio)
+sudoku.precarga.detener()
+sudoku.recursos.cerrar()
+'''
+
+# Costo de copiar el fondo a la pantalla, sin convertir y convertido.
+COPIAS = PREAMBULO + '''
+import pygame
+pygame.init()
+screen = pygame.display.set_mode((800, 700))
+crudo = pygame.image.load("fondo_menu.jpg")
+convertido = crudo.convert()
+for imagen in (crudo, convertido):
+    t = time.perf_counter()
+    for _ in range(200):
+        screen.blit(imagen, (0, 0))
+    print((time.perf_counter() - t) / 200)
+'''
+
+
+def ejecutar(programa):
+
+    '''
+    Ejecuta un programa en un proceso nuevo desde la carpeta del juego.
+
+    param str programa: Codigo a ejecutar.
+
+    return list: Numeros que el programa imprimio, uno por linea.
+    '''
+
+    salida = subprocess.run([sys.executable, '-c', programa], cwd=RAIZ,
+                            capture_output=True, text=True, check=True)
+    return [float(linea) for linea in salida.stdout.split()]
+
+
+if __name__ == '__main__':
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+
+    tiempos = {}
+    for nombre, programa in (('anterior', ANTERIOR), ('actual', ACTUAL)):
+        tiempos[nombre] = statistics.median(
+            ejecutar(programa)[0] for _ in range(repeticiones))
+        print(f'primer cuadro del menu ({nombre}): '
+              f'{tiempos[nombre] * 1e3:7.1f} ms')
+    print(f'{tiempos["anterior"] / tiempos["actual"]:.1f}x mas rapido')
+
+    crudo, convertido = ejecutar(COPIAS)
+    print(f'copiar el fondo: {crudo * 1e6:.0f} us sin convertir, '
+          f'{convertido * 1e6:.0f} us convertido')
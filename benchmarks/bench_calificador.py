@@ -0,0 +1,46 @@
+'''
+Benchmark del calificador de dificultad por tecnicas.
+
+Genera varios sudokus por nivel y los califica dos veces con el mismo
+Calificador: la primera vez se resuelven todos, la segunda las
+calificaciones salen del cache. Muestra cuantos sudokus por segundo se
+califican y cuantos quedan en cada nivel segun la calificacion.
+
+Uso: python benchmarks/bench_calificador.py [cantidad]
+'''
+
+import collections
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calificador import Calificador  # noqa: E402
+from tallado import VACIAS_NIVEL, nuevo_sudoku  # noqa: E402
+
+
+if __name__ == '__main__':
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    # Sin presupuesto de tallado, para que las semillas den siempre los
+    # mismos sudokus.
+    sudokus = {n: [nuevo_sudoku(n, semilla, None)
+                   for semilla in range(cantidad)] for n in VACIAS_NIVEL}
+
+    calificador = Calificador()
+    for n, tableros in sudokus.items():
+        inicio = time.perf_counter()
+        niveles = collections.Counter(calificador.nivel(tablero)
+                                      for tablero in tableros)
+        frio = len(tableros) / (time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for tablero in tableros:
+            calificador.nivel(tablero)
+        cache = len(tableros) / (time.perf_counter() - inicio)
+
+        print(f'nivel {n} ({VACIAS_NIVEL[n]} vacias): '
+              f'{frio:8.0f} sudokus/s, {cache:9.0f} sudokus/s con cache  '
+              f'calificados como nivel 1/2/3: '
+              f'{niveles[1]}/{niveles[2]}/{niveles[3]}')
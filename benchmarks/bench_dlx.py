@@ -0,0 +1,76 @@
+'''
+Benchmark del resolvedor de cobertura exacta (dlx.py).
+
+Resuelve un conjunto de sudokus dificiles conocidos (AI Escargot, el de
+Arto Inkala, Easter Monster y varios de la lista top95) y muestra cuantos
+se resuelven por segundo con resolver() y con contar(limite=2). Tambien
+se le puede pasar un archivo con un sudoku de 81 caracteres por linea,
+usando '.' o '0' para las casillas vacias.
+
+Uso: python benchmarks/bench_dlx.py [archivo] [repeticiones]
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dlx  # noqa: E402
+
+DIFICILES = '''
+1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..
+8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..
+1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1
+4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......
+52...6.........7.13...........4..8..6......5...........418.........3..2...87.....
+6.....8.3.4.7.................5.4.7.3..2.....1.6.......2.....5.....8.6......1....
+48.3............71.2.......7.5....6....2..8.............1.76...3.....4......5....
+....14....3....2...7..........9...3.6.1.............8.2.....1.4....5.6.....7.8...
+......52..8.4......3...9...5.1...6..2..7........3.....6...1..........7.4.......3.
+6.2.5.........3.4..........43...8....1....2........7..5..27...........81...6.....
+.524.........7.1..............8.2...3.....6...9.5.....1.6.3...........897........
+6.2.5.........4.3..........43...8....1....2........7..5..27...........81...6.....
+.923.........8.1...........1.7.4...........658.........6.5.2...4.....7.....9.....
+'''.split()
+
+
+def leer(texto):
+
+    '''
+    Convierte un sudoku de 81 caracteres en una lista de 9 listas.
+    '''
+
+    numeros = [0 if c in '.0' else int(c) for c in texto.strip()]
+    return [numeros[i * 9:i * 9 + 9] for i in range(9)]
+
+
+def medir(funcion, sudokus, repeticiones):
+
+    '''
+    Aplica la funcion a todos los sudokus las veces indicadas.
+
+    return float: Sudokus procesados por segundo.
+    '''
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for sudoku in sudokus:
+            funcion(sudoku)
+    return len(sudokus) * repeticiones / (time.perf_counter() - inicio)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as archivo:
+            textos = [linea for linea in archivo if len(linea.strip()) == 81]
+    else:
+        textos = DIFICILES
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    sudokus = [leer(texto) for texto in textos]
+
+    resueltos = medir(dlx.resolver, sudokus, repeticiones)
+    contados = medir(lambda s: dlx.contar(s, limite=2), sudokus, repeticiones)
+    print(f'{len(sudokus)} sudokus, {repeticiones} repeticiones')
+    print(f'resolver():         {resueltos:8.1f} sudokus/s')
+    print(f'contar(limite=2):   {contados:8.1f} sudokus/s')
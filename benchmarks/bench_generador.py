@@ -0,0 +1,96 @@
+'''
+Benchmark del generador de sudokus.
+
+Compara cuantas plantillas completas por segundo se generan con la
+revision original basada en verificar(), con rellenar_sudoku() (recursivo,
+con el motor de restricciones de mascaras de bits) y con generar_sudoku()
+(sin recursion, con orden MRV).
+
+Uso: python benchmarks/bench_generador.py [segundos]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nucleo  # noqa: E402
+
+
+def rellenar_casilla_verificar(i, j, tablero, numeros):
+
+    '''
+    Copia del relleno original, que llama verificar() por cada candidato.
+    Se mantiene solo como referencia para el benchmark.
+    '''
+
+    if i == 9:
+        return True
+    next_i = i + 1 if j == 8 else i
+    next_j = 0 if j == 8 else j + 1
+    if tablero[i][j] != 0:
+        return rellenar_casilla_verificar(next_i, next_j, tablero, numeros)
+    for num in numeros:
+        if nucleo.verificar(tablero, i, j, num):
+            tablero[i][j] = num
+            if rellenar_casilla_verificar(next_i, next_j, tablero, numeros):
+                return True
+            tablero[i][j] = 0
+    return False
+
+
+def generar_verificar():
+
+    '''
+    Generador original basado en verificar().
+    '''
+
+    tablero = [[0] * 9 for i in range(9)]
+    numeros = list(range(1, 10))
+    random.shuffle(numeros)
+    rellenar_casilla_verificar(0, 0, tablero, numeros)
+    return tablero
+
+
+def generar_restricciones():
+
+    '''
+    Generador recursivo con el motor de restricciones.
+    '''
+
+    tablero = [[0] * 9 for i in range(9)]
+    nucleo.rellenar_sudoku(tablero)
+    return tablero
+
+
+def medir(funcion, segundos):
+
+    '''
+    Ejecuta la funcion durante el tiempo indicado.
+
+    return float: Plantillas generadas por segundo.
+    '''
+
+    cantidad = 0
+    inicio = time.perf_counter()
+    final = inicio + segundos
+    while time.perf_counter() < final:
+        funcion()
+        cantidad += 1
+    return cantidad / (time.perf_counter() - inicio)
+
+
+if __name__ == '__main__':
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    random.seed(0)
+    antes = medir(generar_verificar, segundos)
+    random.seed(0)
+    recursivo = medir(generar_restricciones, segundos)
+    despues = medir(nucleo.generar_sudoku, segundos)
+    print(f'verificar():       {antes:10.1f} plantillas/s')
+    print(f'rellenar_sudoku(): {recursivo:10.1f} plantillas/s '
+          f'({recursivo / antes:.2f}x)')
+    print(f'generar_sudoku():  {despues:10.1f} plantillas/s '
+          f'({despues / antes:.2f}x)')
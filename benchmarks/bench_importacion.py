@@ -0,0 +1,69 @@
+'''
+Benchmark del tiempo de importacion del nucleo.
+
+Importa nucleo.py (y sudoku.py, para comparar) en un proceso nuevo varias
+veces y muestra la mediana del tiempo de importacion. Tambien revisa que
+ninguno de los dos cargue pygame al importarse. El nucleo debe importarse
+en menos de 20 ms.
+
+Uso: python benchmarks/bench_importacion.py [repeticiones]
+'''
+
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Programa que se ejecuta en cada proceso nuevo: mide la importacion e
+# indica si pygame quedo cargado.
+PROGRAMA = '''
+import sys, time
+inicio = time.perf_counter()
+import {modulo}
+tiempo = time.perf_counter() - inicio
+print(tiempo, 'pygame.display' in sys.modules)
+'''
+
+# Tiempo maximo de importacion del nucleo, en segundos.
+LIMITE = 0.020
+
+
+def medir(modulo, repeticiones):
+
+    '''
+    Importa un modulo en procesos nuevos.
+
+    param str modulo: Nombre del modulo.
+    param int repeticiones: Cantidad de procesos.
+
+    return tuple: (mediana en segundos, True si algun proceso cargo pygame).
+    '''
+
+    tiempos = []
+    con_pygame = False
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-c', PROGRAMA.format(modulo=modulo)],
+            cwd=RAIZ, capture_output=True, text=True, check=True).stdout
+        tiempo, cargado = salida.split()
+        tiempos.append(float(tiempo))
+        con_pygame |= cargado == 'True'
+    return statistics.median(tiempos), con_pygame
+
+
+if __name__ == '__main__':
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+    resultados = {modulo: medir(modulo, repeticiones)
+                  for modulo in ('nucleo', 'sudoku')}
+    for modulo, (mediana, con_pygame) in resultados.items():
+        print(f'import {modulo}: {mediana * 1e3:6.2f} ms '
+              f'({"carga" if con_pygame else "no carga"} pygame)')
+
+    mediana, con_pygame = resultados['nucleo']
+    if mediana > LIMITE or con_pygame:
+        print(f'el nucleo debe importarse en menos de {LIMITE * 1e3:.0f} ms '
+              'y sin pygame')
+        sys.exit(1)
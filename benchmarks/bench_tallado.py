@@ -0,0 +1,52 @@
+'''
+Benchmark del tallado de sudokus con solucion unica.
+
+Talla varias plantillas por nivel y muestra la latencia (p50, p99 y
+maxima) y cuantas casillas se lograron borrar. El nivel avanzado debe
+quedar por debajo de 50 ms en el p99.
+
+Uso: python benchmarks/bench_tallado.py [cantidad]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nucleo  # noqa: E402
+from restricciones import contar_soluciones  # noqa: E402
+from tallado import VACIAS_NIVEL, tallar_sudoku  # noqa: E402
+
+
+def percentil(valores, p):
+
+    '''
+    Devuelve el percentil p (de 0 a 100) de una lista ordenada.
+    '''
+
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+if __name__ == '__main__':
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    random.seed(0)
+    plantillas = [nucleo.generar_sudoku() for _ in range(cantidad)]
+
+    for n, vacias in VACIAS_NIVEL.items():
+        tiempos = []
+        borradas = []
+        for plantilla in plantillas:
+            inicio = time.perf_counter()
+            tallado = tallar_sudoku(plantilla, vacias)
+            tiempos.append(time.perf_counter() - inicio)
+            borradas.append(sum(1 for fila in tallado for x in fila if not x))
+            assert contar_soluciones(tallado, 2) == 1
+        tiempos.sort()
+        print(f'nivel {n} ({vacias} vacias): '
+              f'p50 {percentil(tiempos, 50) * 1e3:6.2f} ms  '
+              f'p99 {percentil(tiempos, 99) * 1e3:6.2f} ms  '
+              f'max {tiempos[-1] * 1e3:6.2f} ms  '
+              f'vacias {min(borradas)}-{max(borradas)} '
+              f'(media {sum(borradas) / len(borradas):.1f})')
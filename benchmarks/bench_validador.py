@@ -0,0 +1,115 @@
+'''
+Benchmark de la revision por lotes (validador.py).
+
+Arma un lote de tableros completos a partir de plantillas generadas, con
+uno de cada diez danado (una casilla cambiada), y muestra cuantos
+tableros por segundo revisa:
+
+    verificar:    verificar() en cada casilla, como se revisaba antes un
+                  tablero completo.
+    python:       validar_lote_python().
+    numpy:        validar_lote().
+
+Uso: python benchmarks/bench_validador.py [tableros]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import validador  # noqa: E402
+from generador import generar  # noqa: E402
+from nucleo import verificar  # noqa: E402
+
+# Plantillas distintas con que se arma el lote.
+PLANTILLAS = 2000
+
+
+def armar_lote(cantidad):
+
+    '''
+    Arma un lote de tableros completos, uno de cada diez con un error.
+
+    param int cantidad: Tableros del lote.
+
+    return list: Los tableros como bytes de 81 numeros.
+    '''
+
+    aleatorio = random.Random(0)
+    plantillas = [bytes(generar(semilla).celdas)
+                  for semilla in range(PLANTILLAS)]
+    tableros = []
+    for k in range(cantidad):
+        tablero = plantillas[k % PLANTILLAS]
+        if k % 10 == 0:
+            tablero = bytearray(tablero)
+            tablero[aleatorio.randrange(81)] = aleatorio.randint(1, 9)
+            tablero = bytes(tablero)
+        tableros.append(tablero)
+    return tableros
+
+
+def con_verificar(tablero):
+
+    '''
+    Revisa un tablero completo con verificar(): cada casilla se vacia y se
+    revisa que su numero quepa.
+    '''
+
+    sudoku = [list(tablero[k:k + 9]) for k in range(0, 81, 9)]
+    for fila in range(9):
+        for columna in range(9):
+            numero = sudoku[fila][columna]
+            sudoku[fila][columna] = 0
+            valido = verificar(sudoku, fila, columna, numero)
+            sudoku[fila][columna] = numero
+            if not valido:
+                return False
+    return True
+
+
+def por_segundo(funcion, cantidad):
+
+    '''
+    Mide cuantos tableros por segundo revisa una funcion.
+
+    param function funcion: Funcion sin argumentos que revisa el lote.
+    param int cantidad: Tableros del lote.
+
+    return float: Tableros por segundo, el mejor de tres intentos.
+    '''
+
+    mejor = None
+    for _ in range(3):
+        inicio = time.perf_counter()
+        funcion()
+        tiempo = time.perf_counter() - inicio
+        if mejor is None or tiempo < mejor:
+            mejor = tiempo
+    return cantidad / mejor
+
+
+if __name__ == '__main__':
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    tableros = armar_lote(cantidad)
+
+    # Las versiones lentas se miden con una parte del lote.
+    parte = tableros[:min(cantidad, 20000)]
+    medidas = [('verificar', lambda: [con_verificar(t) for t in parte],
+                len(parte)),
+               ('python', lambda: validador.validar_lote_python(parte),
+                len(parte))]
+    if validador.numpy is not None:
+        arreglo = validador.numpy.frombuffer(
+            b''.join(tableros), dtype=validador.numpy.uint8).reshape(-1, 81)
+        medidas.append(('numpy', lambda: validador.validar_lote(arreglo),
+                        cantidad))
+    else:
+        print('NumPy no esta instalado')
+
+    for nombre, funcion, revisados in medidas:
+        print(f'{nombre:10s} {por_segundo(funcion, revisados):14,.0f} '
+              'tableros/s')
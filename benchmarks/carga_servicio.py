@@ -0,0 +1,263 @@
+'''
+Prueba de carga del servicio de sudokus (servicio.py).
+
+Arranca el servicio en un puerto libre (o usa uno que ya este corriendo,
+con --url) y abre varias conexiones que mandan solicitudes sin parar
+durante unos segundos, con una mezcla de operaciones:
+
+    generar       /generar de un nivel y una semilla al azar.
+    resolver      /resolver de sudokus avanzados, por POST con JSON.
+    resolver_get  /resolver de los mismos sudokus, por GET con el sudoku
+                  en la URL.
+    contar        /contar con limite 2 de los mismos sudokus.
+    validar       /validar de un lote de 100 tableros completos.
+
+Al final muestra, por operacion y en total, las solicitudes por segundo y
+las latencias p50 y p99, y cuantas se rechazaron con 503 (la cola del
+servicio estaba llena). Las rechazadas no cuentan en las latencias.
+
+Uso: python benchmarks/carga_servicio.py [--conexiones 32] [--segundos 10]
+                                         [--mezcla generar,resolver,...]
+                                         [-j procesos] [--url host:puerto]
+'''
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from generador import generar  # noqa: E402
+from tallado import nuevo_sudoku  # noqa: E402
+
+# Sudokus distintos que se mandan a /resolver y /contar.
+SUDOKUS = 50
+
+# Tableros de cada solicitud a /validar.
+TABLEROS_VALIDAR = 100
+
+
+def armar_solicitudes(mezcla):
+
+    '''
+    Prepara las solicitudes de cada operacion.
+
+    param list mezcla: Operaciones a incluir.
+
+    return dict: Por operacion, una funcion que recibe un random.Random y
+                 devuelve (ruta, cuerpo).
+    '''
+
+    sudokus = [nuevo_sudoku(3, semilla, None).a_texto()
+               for semilla in range(SUDOKUS)]
+    tableros = [generar(semilla).a_texto()
+                for semilla in range(TABLEROS_VALIDAR)]
+    validar = json.dumps({'tableros': tableros}).encode()
+
+    solicitudes = {
+        'generar': lambda aleatorio: (
+            f'/generar?nivel={aleatorio.randint(1, 3)}'
+            f'&semilla={aleatorio.randrange(1 << 30)}', b''),
+        'resolver': lambda aleatorio: (
+            '/resolver',
+            json.dumps({'sudoku': aleatorio.choice(sudokus)}).encode()),
+        'resolver_get': lambda aleatorio: (
+            f'/resolver?sudoku={aleatorio.choice(sudokus)}', b''),
+        'contar': lambda aleatorio: (
+            '/contar',
+            json.dumps({'sudoku': aleatorio.choice(sudokus)}).encode()),
+        'validar': lambda aleatorio: ('/validar', validar),
+    }
+    return {nombre: solicitudes[nombre] for nombre in mezcla}
+
+
+async def pedir(lector, escritor, host, ruta, cuerpo):
+
+    '''
+    Manda una solicitud por una conexion abierta y lee la respuesta.
+
+    return int: Estado HTTP de la respuesta.
+    '''
+
+    metodo = 'POST' if cuerpo else 'GET'
+    escritor.write(f'{metodo} {ruta} HTTP/1.1\r\nHost: {host}\r\n'
+                   f'Content-Length: {len(cuerpo)}\r\n\r\n'.encode() + cuerpo)
+    await escritor.drain()
+
+    cabecera = await lector.readuntil(b'\r\n\r\n')
+    lineas = cabecera.decode('latin-1').split('\r\n')
+    estado = int(lineas[0].split(' ')[1])
+    largo = 0
+    for linea in lineas[1:]:
+        llave, _, valor = linea.partition(':')
+        if llave.strip().lower() == 'content-length':
+            largo = int(valor)
+    await lector.readexactly(largo)
+    return estado
+
+
+async def cliente(numero, host, puerto, solicitudes, fin, medidas):
+
+    '''
+    Una conexion que manda solicitudes hasta el momento fin.
+
+    param int numero: Numero de la conexion, semilla de sus solicitudes.
+    param dict solicitudes: Funciones de armar_solicitudes().
+    param float fin: Momento, de time.perf_counter(), en que se deja de
+                     mandar.
+    param dict medidas: Latencias por operacion y rechazos, se llena aqui.
+    '''
+
+    aleatorio = random.Random(numero)
+    nombres = list(solicitudes)
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        while time.perf_counter() < fin:
+            nombre = aleatorio.choice(nombres)
+            ruta, cuerpo = solicitudes[nombre](aleatorio)
+            inicio = time.perf_counter()
+            estado = await pedir(lector, escritor, host, ruta, cuerpo)
+            latencia = time.perf_counter() - inicio
+            if estado == 503:
+                medidas['rechazadas'][nombre] += 1
+
+                # Como pide el servicio, se espera antes de reintentar (un
+                # poco menos del segundo de Retry-After, para no dejarlo
+                # sin trabajo).
+                await asyncio.sleep(0.05)
+            elif estado != 200:
+                medidas['errores'][nombre] += 1
+            else:
+                medidas['latencias'][nombre].append(latencia)
+    finally:
+        escritor.close()
+
+
+def percentil(tiempos, p):
+
+    '''
+    Devuelve el percentil p (0-100) de una lista de tiempos ordenada.
+    '''
+
+    return tiempos[min(len(tiempos) - 1, len(tiempos) * p // 100)]
+
+
+def arrancar_servicio(procesos):
+
+    '''
+    Arranca servicio.py en un puerto libre y espera a que este listo.
+
+    param int procesos: Procesos del servicio, None para el valor por
+                        defecto.
+
+    return tuple: (proceso, puerto).
+    '''
+
+    with socket.socket() as prueba:
+        prueba.bind(('127.0.0.1', 0))
+        puerto = prueba.getsockname()[1]
+    comando = [sys.executable, os.path.join(RAIZ, 'servicio.py'),
+               '--puerto', str(puerto)]
+    if procesos:
+        comando += ['-j', str(procesos)]
+    proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True)
+    proceso.stdout.readline()
+    return proceso, puerto
+
+
+async def cargar(host, puerto, conexiones, segundos, solicitudes):
+
+    '''
+    Corre la prueba de carga.
+
+    return tuple: (medidas, segundos que duro).
+    '''
+
+    medidas = {'latencias': collections.defaultdict(list),
+               'rechazadas': collections.Counter(),
+               'errores': collections.Counter()}
+    inicio = time.perf_counter()
+    fin = inicio + segundos
+    await asyncio.gather(*[cliente(k, host, puerto, solicitudes, fin,
+                                   medidas) for k in range(conexiones)])
+    return medidas, time.perf_counter() - inicio
+
+
+def main(argv=None):
+
+    '''
+    Punto de entrada de la linea de comandos.
+
+    param list argv: Argumentos, None para usar sys.argv.
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Prueba de carga del servicio de sudokus.')
+    parser.add_argument('--conexiones', type=int, default=32,
+                        help='conexiones que mandan solicitudes a la vez')
+    parser.add_argument('--segundos', type=float, default=10,
+                        help='duracion de la prueba')
+    parser.add_argument('--mezcla',
+                        default='generar,resolver,resolver_get,contar,'
+                        'validar',
+                        help='operaciones a mandar, separadas por comas')
+    parser.add_argument('-j', '--procesos', type=int, default=None,
+                        help='procesos del servicio que se arranca')
+    parser.add_argument('--url', default=None,
+                        help='host:puerto de un servicio que ya esta '
+                        'corriendo')
+    args = parser.parse_args(argv)
+
+    solicitudes = armar_solicitudes(args.mezcla.split(','))
+
+    proceso = None
+    if args.url is None:
+        proceso, puerto = arrancar_servicio(args.procesos)
+        host = '127.0.0.1'
+    else:
+        host, _, puerto = args.url.rpartition(':')
+        puerto = int(puerto)
+
+    try:
+        medidas, duracion = asyncio.run(
+            cargar(host, puerto, args.conexiones, args.segundos, solicitudes))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    print(f'{args.conexiones} conexiones durante {duracion:.1f} s')
+    print(f'{"operacion":12s} {"solicitudes":>11s} {"por s":>8s} '
+          f'{"p50 ms":>8s} {"p99 ms":>8s} {"503":>6s}')
+    todas = []
+    for nombre in solicitudes:
+        tiempos = sorted(medidas['latencias'][nombre])
+        todas.extend(tiempos)
+        if tiempos:
+            print(f'{nombre:12s} {len(tiempos):11d} '
+                  f'{len(tiempos) / duracion:8.1f} '
+                  f'{percentil(tiempos, 50) * 1e3:8.1f} '
+                  f'{percentil(tiempos, 99) * 1e3:8.1f} '
+                  f'{medidas["rechazadas"][nombre]:6d}')
+    todas.sort()
+    if todas:
+        print(f'{"total":12s} {len(todas):11d} '
+              f'{len(todas) / duracion:8.1f} '
+              f'{percentil(todas, 50) * 1e3:8.1f} '
+              f'{percentil(todas, 99) * 1e3:8.1f} '
+              f'{sum(medidas["rechazadas"].values()):6d}')
+    errores = sum(medidas['errores'].values())
+    if errores:
+        print(f'{errores} respuestas con error')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+'''
+Prueba de resistencia de las escenas del juego.
+
+Hace muchas idas y vueltas menu -> nivel -> menu con clicks sinteticos,
+sin ventana ni sonido, pasando por el mismo GestorEscenas que usa el juego.
+Cada cierto numero de vueltas muestra la cantidad de objetos vivos y el
+pico de memoria del proceso; ambos deben quedarse planos, y la pila de
+llamadas debe medir lo mismo en la primera y en la ultima vuelta.
+
+Uso: python benchmarks/soak_escenas.py [vueltas]
+'''
+
+import gc
+import os
+import resource
+import sys
+import tempfile
+import time
+import traceback
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pygame  # noqa: E402
+
+import sudoku  # noqa: E402
+from banco import escribir_banco  # noqa: E402
+from tallado import VACIAS_NIVEL, nuevo_sudoku  # noqa: E402
+
+# Centro de los botones de nivel del menu y del boton 'Menu Principal'.
+BOTONES_NIVEL = {1: (170, 300), 2: (170, 450), 3: (170, 600)}
+BOTON_MENU = (150, 600)
+
+
+def preparar_juego(ruta):
+
+    '''
+    Abre la ventana del juego (sin sonido, asi las escenas no esperan a
+    que termine ningun sonido) con el banco dado.
+
+    param str ruta: Ruta del banco del que se toman los sudokus.
+    '''
+
+    sudoku.iniciar(ruta, sonido=False, ruta_partida=None)
+
+
+def click(gestor, posicion):
+
+    '''
+    Hace una vuelta del gestor con un click en la posicion dada.
+    '''
+
+    evento = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=posicion,
+                                button=1)
+    gestor.procesar([evento])
+
+
+def medir():
+
+    '''
+    Devuelve la cantidad de objetos vivos y el pico de memoria en MiB.
+    '''
+
+    gc.collect()
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # En Linux ru_maxrss esta en KiB y en macOS en bytes.
+    pico /= 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return len(gc.get_objects()), pico
+
+
+if __name__ == '__main__':
+    vueltas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    aviso = max(1, vueltas // 10)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'soak.bin')
+        escribir_banco(ruta, {n: [nuevo_sudoku(n, semilla)
+                                  for semilla in range(4)]
+                              for n in VACIAS_NIVEL})
+
+        preparar_juego(ruta)
+
+        # Profundidad de la pila dentro del nivel, se anota al entrar.
+        profundidades = []
+        entrar = sudoku.Nivel.entrar
+
+        def entrar_medido(nivel):
+            profundidades.append(len(traceback.extract_stack()))
+            entrar(nivel)
+
+        sudoku.Nivel.entrar = entrar_medido
+
+        gestor = sudoku.GestorEscenas(sudoku.MenuPrincipal())
+        objetos_inicio, pico_inicio = medir()
+        inicio = time.perf_counter()
+
+        for vuelta in range(1, vueltas + 1):
+            n = vuelta % 3 + 1
+            click(gestor, BOTONES_NIVEL[n])
+            # Sin sonido la carga pasa al nivel en la siguiente vuelta.
+            gestor.procesar([])
+            assert isinstance(gestor.escena, sudoku.Nivel)
+            click(gestor, BOTON_MENU)
+            assert isinstance(gestor.escena, sudoku.MenuPrincipal)
+
+            if vuelta % aviso == 0:
+                objetos, pico = medir()
+                print(f'{vuelta:6d} vueltas  objetos {objetos:7d} '
+                      f'({objetos - objetos_inicio:+d})  '
+                      f'pico {pico:6.1f} MiB  '
+                      f'{vuelta / (time.perf_counter() - inicio):.0f} '
+                      f'vueltas/s', flush=True)
+
+        objetos, pico = medir()
+        sudoku.precarga.detener()
+        sudoku.banco.cerrar()
+
+    print(f'pila en el nivel: {profundidades[0]} marcos en la primera '
+          f'vuelta, {profundidades[-1]} en la ultima')
+    assert profundidades[0] == profundidades[-1]
+    print(f'objetos {objetos_inicio} -> {objetos}, '
+          f'pico {pico_inicio:.1f} -> {pico:.1f} MiB')
@@ -0,0 +1,393 @@
+'''
+Conjunto de benchmarks del juego, con referencias guardadas.
+
+Mide, sin ventana ni sonido (con los controladores 'dummy' de SDL):
+
+    verificar            tiempo de una llamada a verificar().
+    validar_lote         tiempo por tablero de validar_lote() (con NumPy,
+                         si esta instalado) en un lote de 100000.
+    generar_p50/p95      latencia de generar_sudoku().
+    tallado_N_p50/p95    latencia del tallado de cada nivel (sin limite de
+                         tiempo, para que el resultado no dependa del
+                         presupuesto).
+    grande_L_p50/p95     latencia de generar() de las plantillas de LxL
+                         (16x16 y 25x25).
+    cuadro_tablero       un cuadro completo del tablero: las lineas de los
+                         cuadrantes, los 81 cuadros() y la actualizacion
+                         de la pantalla.
+    cuadro_notas         lo mismo con las notas visibles.
+    cuadro_casilla       un cuadro del nivel en el que cambio una casilla
+                         (el caso normal mientras se juega).
+    cuadro_menu          un cuadro completo del menu principal.
+    continuar            continuar una partida guardada: desempaquetar el
+                         registro y entrar al nivel, dibujandolo completo.
+
+Todas las medidas son segundos por operacion (menos es mejor). Con
+--guardar se escriben como referencia en referencia.json; sin --guardar
+se comparan con la referencia y el programa termina con error si alguna
+empeoro mas que el umbral. Las referencias dependen de la maquina: hay
+que guardarlas de nuevo al cambiar de maquina o de version de Python.
+
+Para guardar una referencia conviene correr varias rondas; de cada
+medida se guarda la mediana de las rondas:
+
+    python benchmarks/suite.py --guardar --rondas 3
+
+Uso: python benchmarks/suite.py [--guardar] [--rondas N] [--umbral 0.4]
+                                [medidas...]
+'''
+
+import argparse
+import collections
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import nucleo  # noqa: E402
+import validador  # noqa: E402
+from generador import generar  # noqa: E402
+from partida import desempaquetar, empaquetar  # noqa: E402
+from tallado import VACIAS_NIVEL, tallar_sudoku  # noqa: E402
+
+# Archivo con las medidas de referencia.
+REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'referencia.json')
+
+# Cuanto puede empeorar una medida (0.4 es un 40 %) antes de contarla
+# como una regresion. Entre una corrida y otra las medidas varian hasta un
+# 30 % sin que cambie el codigo; el umbral deja pasar eso y atrapa los
+# cambios que de verdad hacen mas lento el juego.
+UMBRAL = 0.4
+
+# Las latencias p95 salen de pocas muestras y varian mas que el resto.
+UMBRAL_P95 = 0.6
+
+
+def por_llamada(funcion, llamadas, lotes=5):
+
+    '''
+    Mide el tiempo de una llamada. Repite varios lotes y se queda con el
+    mejor, que es el menos afectado por el resto del sistema.
+
+    param function funcion: Funcion sin argumentos.
+    param int llamadas: Llamadas de cada lote.
+    param int lotes: Cantidad de lotes.
+
+    return float: Segundos por llamada.
+    '''
+
+    mejor = None
+    for _ in range(lotes):
+        inicio = time.perf_counter()
+        for _ in range(llamadas):
+            funcion()
+        tiempo = (time.perf_counter() - inicio) / llamadas
+        if mejor is None or tiempo < mejor:
+            mejor = tiempo
+    return mejor
+
+
+def percentiles(tiempos):
+
+    '''
+    Devuelve la mediana y el percentil 95 de una lista de tiempos.
+
+    param list tiempos: Tiempos en segundos.
+
+    return tuple: (p50, p95).
+    '''
+
+    tiempos = sorted(tiempos)
+    return (tiempos[len(tiempos) // 2],
+            tiempos[min(len(tiempos) - 1, len(tiempos) * 95 // 100)])
+
+
+def latencias(funcion, argumentos, repeticiones=3):
+
+    '''
+    Mide la latencia de una funcion con cada argumento. Se pasa varias
+    veces por todos los argumentos y de cada uno se toma el mejor tiempo,
+    asi una racha lenta del sistema no cuenta como una latencia alta.
+
+    param function funcion: Funcion de un argumento.
+    param list argumentos: Argumentos con que se llama.
+    param int repeticiones: Veces que se corre cada argumento.
+
+    return tuple: (p50, p95) en segundos.
+    '''
+
+    argumentos = list(argumentos)
+    tiempos = [float('inf')] * len(argumentos)
+    for _ in range(repeticiones):
+        for k, argumento in enumerate(argumentos):
+            inicio = time.perf_counter()
+            funcion(argumento)
+            tiempos[k] = min(tiempos[k], time.perf_counter() - inicio)
+    return percentiles(tiempos)
+
+
+def medir_verificar():
+
+    '''
+    Tiempo de verificar() sobre casillas y numeros al azar de plantillas
+    con la mitad de las casillas borradas.
+    '''
+
+    aleatorio = random.Random(0)
+    casos = []
+    for semilla in range(20):
+        sudoku = nucleo.generar_sudoku(semilla)
+        for k in aleatorio.sample(range(81), 40):
+            sudoku[k // 9][k % 9] = 0
+        for _ in range(50):
+            casos.append((sudoku, aleatorio.randrange(9),
+                          aleatorio.randrange(9), aleatorio.randint(1, 9)))
+
+    def llamar():
+        for sudoku, fila, columna, numero in casos:
+            nucleo.verificar(sudoku, fila, columna, numero)
+
+    return {'verificar': por_llamada(llamar, 20) / len(casos)}
+
+
+def medir_validar():
+
+    '''
+    Tiempo por tablero de validar_lote() en un lote de tableros completos,
+    uno de cada diez con un error.
+    '''
+
+    plantillas = [generar(semilla).celdas for semilla in range(200)]
+    tableros = []
+    for k in range(100000):
+        tablero = bytearray(plantillas[k % len(plantillas)])
+        if k % 10 == 0:
+            tablero[k % 81] = tablero[(k + 1) % 81]
+        tableros.append(bytes(tablero))
+    if validador.numpy is not None:
+        tableros = validador.numpy.frombuffer(
+            b''.join(tableros), dtype=validador.numpy.uint8).reshape(-1, 81)
+
+    return {'validar_lote': por_llamada(
+        lambda: validador.validar_lote(tableros), 1) / len(tableros)}
+
+
+def medir_generar():
+
+    '''
+    Latencia de generar_sudoku() con semillas fijas.
+    '''
+
+    p50, p95 = latencias(nucleo.generar_sudoku, range(300))
+    return {'generar_p50': p50, 'generar_p95': p95}
+
+
+def medir_tallado():
+
+    '''
+    Latencia del tallado de cada nivel, sin presupuesto de tiempo.
+    '''
+
+    plantillas = [nucleo.generar_sudoku(semilla) for semilla in range(60)]
+    medidas = {}
+    for n, vacias in VACIAS_NIVEL.items():
+        # La misma semilla borra siempre las mismas casillas.
+        medidas[f'tallado_{n}_p50'], medidas[f'tallado_{n}_p95'] = latencias(
+            lambda semilla: tallar_sudoku(plantillas[semilla], vacias, None,
+                                          random.Random(semilla)),
+            range(len(plantillas)))
+    return medidas
+
+
+def medir_grande():
+
+    '''
+    Latencia de generar() de las plantillas de 16x16 y 25x25, con semillas
+    fijas. Las de 25x25 tardan mas y se mide una sola pasada.
+    '''
+
+    medidas = {}
+    for caja, semillas, repeticiones in ((4, 100, 3), (5, 30, 1)):
+        lado = caja * caja
+        (medidas[f'grande_{lado}_p50'],
+         medidas[f'grande_{lado}_p95']) = latencias(
+            lambda semilla: generar(semilla, caja), range(semillas),
+            repeticiones)
+    return medidas
+
+
+def medir_cuadros():
+
+    '''
+    Tiempo de los cuadros del nivel y del menu, en la pantalla sin ventana.
+    '''
+
+    import pygame
+
+    import sudoku
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        # Sin banco: el hilo de precarga genera el sudoku del nivel.
+        sudoku.iniciar(os.path.join(carpeta, 'sin_banco.bin'), sonido=False,
+                       ruta_partida=None)
+        nivel = sudoku.Nivel(3)
+        nivel.entrar()
+        sudoku.precarga.detener()
+        sudoku.precarga.hilo.join()
+
+    screen = sudoku.screen
+    casillas = nivel.casillas
+    posicion = (0, 0)
+
+    def tablero():
+        sudoku.dibujar_lineas(screen, nivel.disposicion)
+        for casilla in casillas:
+            casilla.cuadros(screen)
+        pygame.display.update()
+
+    medidas = {'cuadro_tablero': por_llamada(tablero, 100)}
+
+    nivel.notas.visibles = True
+    medidas['cuadro_notas'] = por_llamada(tablero, 100)
+    nivel.notas.visibles = False
+
+    def casilla():
+        casillas[40].sucio = True
+        nivel.render.dibujar(screen, posicion)
+
+    medidas['cuadro_casilla'] = por_llamada(casilla, 1000, lotes=10)
+
+    registro = empaquetar(nivel.tablero, nivel.n, nivel.caja, 0)
+
+    def continuar():
+        guardada = desempaquetar(registro)
+        otro = sudoku.Nivel(guardada.nivel, guardada.caja, guardada)
+        otro.entrar()
+        otro.terminado = True
+        otro.salir()
+
+    medidas['continuar'] = por_llamada(continuar, 20)
+    nivel.salir()
+
+    menu = sudoku.MenuPrincipal()
+    menu.entrar()
+    medidas['cuadro_menu'] = por_llamada(lambda: menu.dibujar(posicion), 100)
+    menu.salir()
+
+    sudoku.recursos.cerrar()
+    pygame.quit()
+    return medidas
+
+
+# Grupos de medidas, en el orden en que se corren. Los cuadros van al final
+# porque abren pygame.
+GRUPOS = [medir_verificar, medir_validar, medir_generar, medir_tallado,
+          medir_grande, medir_cuadros]
+
+
+def umbral_de(nombre, umbral):
+
+    '''
+    Devuelve cuanto puede empeorar una medida.
+
+    param str nombre: Nombre de la medida.
+    param float umbral: Umbral general.
+
+    return float: Umbral de la medida.
+    '''
+
+    return max(umbral, UMBRAL_P95) if nombre.endswith('_p95') else umbral
+
+
+def main(argv=None):
+
+    '''
+    Punto de entrada de la linea de comandos.
+
+    param list argv: Argumentos, None para usar sys.argv.
+
+    return int: 0 si no hubo regresiones, 1 si alguna medida empeoro.
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Mide el juego y compara con las referencias.')
+    parser.add_argument('medidas', nargs='*',
+                        help='prefijos de las medidas a correr '
+                        '(por defecto todas)')
+    parser.add_argument('--guardar', action='store_true',
+                        help='guarda las medidas como nueva referencia')
+    parser.add_argument('--umbral', type=float, default=UMBRAL,
+                        help='empeoramiento permitido, 0.4 es un 40 %%')
+    parser.add_argument('--rondas', type=int, default=1,
+                        help='veces que se corre cada medida; se toma la '
+                        'mediana')
+    parser.add_argument('--referencia', default=REFERENCIA,
+                        help='archivo de referencias')
+    args = parser.parse_args(argv)
+
+    referencia = {}
+    if os.path.exists(args.referencia):
+        with open(args.referencia) as archivo:
+            referencia = json.load(archivo)
+    anteriores = referencia.get('medidas', {})
+
+    rondas = collections.defaultdict(list)
+    for grupo in GRUPOS:
+        nombre_grupo = grupo.__name__[len('medir_'):]
+        if args.medidas and not any(nombre_grupo.startswith(prefijo) or
+                                    prefijo.startswith(nombre_grupo)
+                                    for prefijo in args.medidas):
+            continue
+        for _ in range(args.rondas):
+            for nombre, valor in grupo().items():
+                rondas[nombre].append(valor)
+    medidas = {nombre: statistics.median(valores)
+               for nombre, valores in rondas.items()}
+
+    regresiones = []
+    for nombre, valor in medidas.items():
+        anterior = anteriores.get(nombre)
+        if anterior is None:
+            print(f'{nombre:18s} {valor * 1e6:11.2f} us   (sin referencia)')
+            continue
+        cambio = valor / anterior - 1
+        marca = ''
+        if cambio > umbral_de(nombre, args.umbral):
+            marca = '  REGRESION'
+            regresiones.append(nombre)
+        print(f'{nombre:18s} {valor * 1e6:11.2f} us   '
+              f'referencia {anterior * 1e6:11.2f} us  {cambio:+7.1%}{marca}')
+
+    if args.guardar:
+        anteriores.update(medidas)
+        with open(args.referencia, 'w') as archivo:
+            json.dump({'python': platform.python_version(),
+                       'maquina': platform.machine(),
+                       'medidas': anteriores}, archivo, indent=2,
+                      sort_keys=True)
+            archivo.write('\n')
+        print(f'referencia guardada en {args.referencia}')
+        return 0
+
+    if referencia and referencia.get('python') != platform.python_version():
+        print(f'aviso: la referencia es de Python {referencia.get("python")}')
+    if regresiones:
+        print(f'{len(regresiones)} medidas empeoraron mas de lo permitido: '
+              + ', '.join(regresiones))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
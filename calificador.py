@@ -0,0 +1,454 @@
+#!/usr/bin/python3
+
+'''
+Calificador de dificultad de sudokus por tecnicas.
+
+La cantidad de casillas vacias dice poco de lo dificil que es un sudoku
+para una persona. Este modulo resuelve el sudoku solo con logica, aplicando
+las tecnicas que usaria una persona en orden de dificultad (siempre la mas
+facil que avance), y califica el sudoku con la tecnica mas dificil que
+necesito. Si ninguna tecnica avanza, el sudoku necesita busqueda (probar y
+retroceder) y recibe la calificacion maxima.
+
+Los candidatos de cada casilla se guardan como mascaras de bits, igual que
+en restricciones.py, asi que cada tecnica es solo un recorrido por las 27
+unidades (filas, columnas y cuadrantes) con operaciones de bits.
+
+Para calificar archivos de lote.py o un banco de sudokus:
+    python calificador.py avanzado.txt
+    python calificador.py sudokus.bin
+Con -o se escribe una copia de los archivos de lote con el nivel cambiado
+por el nivel segun la calificacion, lista para banco.py.
+'''
+
+import argparse
+import collections
+import itertools
+
+from restricciones import CUENTA_BITS, NUMEROS_MASCARA, TODOS, VECINAS
+
+# Tecnicas, de la mas facil a la mas dificil. La calificacion de un
+# sudoku es la posicion en esta lista de la tecnica mas dificil que
+# necesito.
+TECNICAS = ['solitario oculto', 'solitario desnudo', 'interseccion',
+            'par desnudo', 'par oculto', 'trio desnudo', 'trio oculto',
+            'x-wing', 'swordfish', 'busqueda']
+(SOLITARIO_OCULTO, SOLITARIO_DESNUDO, INTERSECCION, PAR_DESNUDO, PAR_OCULTO,
+ TRIO_DESNUDO, TRIO_OCULTO, X_WING, SWORDFISH, BUSQUEDA) = range(10)
+
+# Nivel del juego que corresponde a cada calificacion: 1 para
+# principiante, 2 para intermedio y 3 para avanzado.
+NIVEL_CALIFICACION = [1, 1, 2, 2, 2, 2, 2, 3, 3, 3]
+
+# Casillas de cada fila, columna y cuadrante.
+FILAS = [[f * 9 + c for c in range(9)] for f in range(9)]
+COLUMNAS = [[f * 9 + c for f in range(9)] for c in range(9)]
+CAJAS = [[(b // 3 * 3 + i) * 9 + b % 3 * 3 + j
+          for i in range(3) for j in range(3)] for b in range(9)]
+UNIDADES = FILAS + COLUMNAS + CAJAS
+
+# Cruces de cada cuadrante con las filas y columnas que lo atraviesan:
+# (casillas comunes, resto del cuadrante, resto de la fila o columna).
+INTERSECCIONES = []
+for _caja in CAJAS:
+    for _linea in FILAS + COLUMNAS:
+        _comunes = [k for k in _caja if k in _linea]
+        if _comunes:
+            INTERSECCIONES.append(
+                (_comunes, [k for k in _caja if k not in _comunes],
+                 [k for k in _linea if k not in _comunes]))
+
+
+def calificar(celdas):
+
+    '''
+    Resuelve un sudoku con tecnicas logicas y devuelve la tecnica mas
+    dificil que necesito.
+
+    param bytes celdas: Los 81 numeros del sudoku por filas, 0 para las
+                        casillas vacias.
+
+    return int: Calificacion, una posicion de TECNICAS. BUSQUEDA si las
+                tecnicas no alcanzan para resolverlo.
+    '''
+
+    return _resolver(celdas)[0]
+
+
+def _resolver(celdas):
+
+    '''
+    Resolucion logica de calificar().
+
+    param bytes celdas: Los 81 numeros del sudoku por filas.
+
+    return tuple: (calificacion, valores), valores son los 81 numeros a
+                  los que se llego, con 0 donde falto una tecnica.
+    '''
+
+    valores = bytearray(celdas)
+    candidatos = [TODOS] * 81
+    for k in range(81):
+        numero = valores[k]
+        if numero:
+            for v in VECINAS[k]:
+                if valores[v] == numero:
+                    raise ValueError('el sudoku tiene numeros repetidos')
+            _colocar(valores, candidatos, k, numero)
+
+    # Cada tecnica con su argumento; se aplica siempre la primera que
+    # avance, y despues se vuelve a empezar por la mas facil.
+    pasos = [(SOLITARIO_OCULTO, _solitarios_ocultos, None),
+             (SOLITARIO_DESNUDO, _solitarios_desnudos, None),
+             (INTERSECCION, _intersecciones, None),
+             (PAR_DESNUDO, _subconjuntos_desnudos, 2),
+             (PAR_OCULTO, _subconjuntos_ocultos, 2),
+             (TRIO_DESNUDO, _subconjuntos_desnudos, 3),
+             (TRIO_OCULTO, _subconjuntos_ocultos, 3),
+             (X_WING, _peces, 2),
+             (SWORDFISH, _peces, 3)]
+
+    calificacion = SOLITARIO_OCULTO
+    while 0 in valores:
+        for tecnica, paso, argumento in pasos:
+            if paso(valores, candidatos, argumento):
+                if tecnica > calificacion:
+                    calificacion = tecnica
+                break
+        else:
+            return BUSQUEDA, valores
+    return calificacion, valores
+
+
+def _colocar(valores, candidatos, k, numero):
+
+    '''
+    Escribe un numero en una casilla y lo quita de los candidatos de sus
+    20 vecinas.
+    '''
+
+    valores[k] = numero
+    candidatos[k] = 0
+    quitar = ~(1 << numero)
+    for v in VECINAS[k]:
+        candidatos[v] &= quitar
+
+
+def _solitarios_ocultos(valores, candidatos, argumento):
+
+    '''
+    Coloca los numeros que solo caben en una casilla de su fila, columna
+    o cuadrante.
+
+    return bool: True si coloco algun numero.
+    '''
+
+    avance = False
+    for unidad in UNIDADES:
+        # una: numeros que caben en alguna casilla; dos: en dos o mas.
+        una = dos = 0
+        for k in unidad:
+            m = candidatos[k]
+            dos |= una & m
+            una |= m
+        solos = una & ~dos
+        if solos:
+            for numero in NUMEROS_MASCARA[solos]:
+                bit = 1 << numero
+                for k in unidad:
+                    if candidatos[k] & bit:
+                        _colocar(valores, candidatos, k, numero)
+                        avance = True
+                        break
+    return avance
+
+
+def _solitarios_desnudos(valores, candidatos, argumento):
+
+    '''
+    Coloca los numeros de las casillas que tienen un solo candidato.
+
+    return bool: True si coloco algun numero.
+    '''
+
+    avance = False
+    for k in range(81):
+        if not valores[k]:
+            m = candidatos[k]
+            if not m:
+                raise ValueError('el sudoku no tiene solucion')
+            if CUENTA_BITS[m] == 1:
+                _colocar(valores, candidatos, k, NUMEROS_MASCARA[m][0])
+                avance = True
+    return avance
+
+
+def _intersecciones(valores, candidatos, argumento):
+
+    '''
+    Si dentro de un cuadrante un numero solo cabe en una fila (o columna),
+    se quita del resto de esa fila; y si dentro de una fila solo cabe en un
+    cuadrante, se quita del resto del cuadrante.
+
+    return bool: True si quito algun candidato.
+    '''
+
+    avance = False
+    for comunes, resto_caja, resto_linea in INTERSECCIONES:
+        en_comunes = en_caja = en_linea = 0
+        for k in comunes:
+            en_comunes |= candidatos[k]
+        for k in resto_caja:
+            en_caja |= candidatos[k]
+        for k in resto_linea:
+            en_linea |= candidatos[k]
+
+        quitar = en_comunes & ~en_caja & en_linea
+        if quitar:
+            avance = True
+            for k in resto_linea:
+                candidatos[k] &= ~quitar
+        quitar = en_comunes & ~en_linea & en_caja
+        if quitar:
+            avance = True
+            for k in resto_caja:
+                candidatos[k] &= ~quitar
+    return avance
+
+
+def _subconjuntos_desnudos(valores, candidatos, n):
+
+    '''
+    Si n casillas de una unidad tienen entre todas solo n candidatos, esos
+    numeros se quitan del resto de la unidad (pares y trios desnudos).
+
+    return bool: True si quito algun candidato.
+    '''
+
+    avance = False
+    for unidad in UNIDADES:
+        celdas = [k for k in unidad if 2 <= CUENTA_BITS[candidatos[k]] <= n]
+        for grupo in itertools.combinations(celdas, n):
+            m = 0
+            for k in grupo:
+                m |= candidatos[k]
+            if CUENTA_BITS[m] == n:
+                for k in unidad:
+                    if k not in grupo and candidatos[k] & m:
+                        candidatos[k] &= ~m
+                        avance = True
+    return avance
+
+
+def _subconjuntos_ocultos(valores, candidatos, n):
+
+    '''
+    Si n numeros de una unidad solo caben, entre todos, en las mismas n
+    casillas, esas casillas pierden los demas candidatos (pares y trios
+    ocultos).
+
+    return bool: True si quito algun candidato.
+    '''
+
+    avance = False
+    for unidad in UNIDADES:
+        # Posiciones dentro de la unidad donde cabe cada numero, la
+        # posicion i se guarda en el bit i + 1 para poder usar las tablas.
+        posiciones = [0] * 10
+        for i, k in enumerate(unidad):
+            for numero in NUMEROS_MASCARA[candidatos[k]]:
+                posiciones[numero] |= 2 << i
+        numeros = [numero for numero in range(1, 10)
+                   if 2 <= CUENTA_BITS[posiciones[numero]] <= n]
+        for grupo in itertools.combinations(numeros, n):
+            p = 0
+            m = 0
+            for numero in grupo:
+                p |= posiciones[numero]
+                m |= 1 << numero
+            if CUENTA_BITS[p] == n:
+                for i in NUMEROS_MASCARA[p]:
+                    k = unidad[i - 1]
+                    if candidatos[k] & ~m:
+                        candidatos[k] &= m
+                        avance = True
+    return avance
+
+
+def _peces(valores, candidatos, n):
+
+    '''
+    Si un numero cabe en n filas solo dentro de las mismas n columnas, se
+    quita del resto de esas columnas (y lo mismo cambiando filas por
+    columnas). Con n = 2 es el X-Wing y con n = 3 el Swordfish.
+
+    return bool: True si quito algun candidato.
+    '''
+
+    avance = False
+    for base, cubierta in ((FILAS, COLUMNAS), (COLUMNAS, FILAS)):
+        # Posiciones de cada numero en cada linea base, en un solo
+        # recorrido; la posicion i se guarda en el bit i + 1.
+        posiciones = [[0] * 9 for numero in range(10)]
+        for b, linea in enumerate(base):
+            for i, k in enumerate(linea):
+                for numero in NUMEROS_MASCARA[candidatos[k]]:
+                    posiciones[numero][b] |= 2 << i
+
+        for numero in range(1, 10):
+            bit = 1 << numero
+
+            # Lineas base donde el numero cabe en 2 a n posiciones.
+            lineas = [(b, p) for b, p in enumerate(posiciones[numero])
+                      if 2 <= CUENTA_BITS[p] <= n]
+
+            for grupo in itertools.combinations(lineas, n):
+                p = 0
+                for b, cubiertas in grupo:
+                    p |= cubiertas
+                if CUENTA_BITS[p] == n:
+                    usadas = [b for b, cubiertas in grupo]
+                    for i in NUMEROS_MASCARA[p]:
+                        for b, k in enumerate(cubierta[i - 1]):
+                            if b not in usadas and candidatos[k] & bit:
+                                candidatos[k] &= ~bit
+                                avance = True
+    return avance
+
+
+class Calificador:
+
+    '''
+    Clase que califica sudokus y guarda las calificaciones por sudoku, de
+    manera que volver a calificar un banco ya calificado casi no cuesta.
+    Tiene un tamano maximo; si se llena, se descarta la calificacion que
+    tiene mas tiempo sin usarse.
+    '''
+
+    def __init__(self, maximo=1000000):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int maximo: Cantidad maxima de calificaciones guardadas.
+        '''
+
+        self.maximo = maximo
+
+        # Calificaciones por numeros del sudoku, en orden de uso.
+        self.calificaciones = collections.OrderedDict()
+
+    def calificar(self, tablero):
+
+        '''
+        Califica el sudoku, resolviendolo solo la primera vez.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param Tablero tablero: Sudoku a calificar, se califican los
+                                numeros que tenga en este momento.
+
+        return int: Calificacion, una posicion de TECNICAS.
+        '''
+
+        clave = bytes(tablero.celdas)
+        calificacion = self.calificaciones.get(clave)
+        if calificacion is None:
+            calificacion = calificar(clave)
+            self.calificaciones[clave] = calificacion
+            if len(self.calificaciones) > self.maximo:
+                self.calificaciones.popitem(last=False)
+        else:
+            self.calificaciones.move_to_end(clave)
+        return calificacion
+
+    def nivel(self, tablero):
+
+        '''
+        Devuelve el nivel del juego que corresponde a la calificacion.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param Tablero tablero: Sudoku a calificar.
+
+        return int: 1 para principiante, 2 para intermedio y 3 para
+                    avanzado.
+        '''
+
+        return NIVEL_CALIFICACION[self.calificar(tablero)]
+
+
+def _leer(ruta):
+
+    '''
+    Recorre un archivo de lote.py o un banco de sudokus.
+
+    param str ruta: Ruta del archivo.
+
+    return generator: Tuplas (linea, tablero); linea es None si el archivo
+                      es un banco.
+    '''
+
+    from banco import MAGICO, Banco
+    from tablero import Tablero
+
+    with open(ruta, 'rb') as archivo:
+        es_banco = archivo.read(len(MAGICO)) == MAGICO
+
+    if es_banco:
+        with Banco(ruta) as banco:
+            for nivel in sorted(banco.secciones):
+                for k in range(banco.cantidad(nivel)):
+                    yield None, banco.leer(nivel, k)
+    else:
+        with open(ruta) as archivo:
+            for linea in archivo:
+                partes = linea.split()
+                if len(partes) == 4:
+                    yield linea, Tablero.de_texto(partes[2], partes[3])
+
+
+def main(argv=None):
+
+    '''
+    Punto de entrada de la linea de comandos.
+
+    param list argv: Argumentos, None para usar sys.argv.
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Califica sudokus segun las tecnicas que necesitan.')
+    parser.add_argument('archivos', nargs='+',
+                        help='archivos de lote.py o bancos de sudokus')
+    parser.add_argument('-o', '--salida', default=None,
+                        help='copia de los archivos de lote con el nivel '
+                        'segun la calificacion')
+    args = parser.parse_args(argv)
+
+    calificador = Calificador()
+    cuenta = collections.Counter()
+    salida = None if args.salida is None else open(args.salida, 'w')
+
+    try:
+        for ruta in args.archivos:
+            for linea, tablero in _leer(ruta):
+                calificacion = calificador.calificar(tablero)
+                cuenta[calificacion] += 1
+                if salida is not None and linea is not None:
+                    semilla, _, sudoku, solucion = linea.split()
+                    salida.write(f'{semilla} '
+                                 f'{NIVEL_CALIFICACION[calificacion]} '
+                                 f'{sudoku} {solucion}\n')
+    finally:
+        if salida is not None:
+            salida.close()
+
+    total = sum(cuenta.values())
+    for calificacion, tecnica in enumerate(TECNICAS):
+        if cuenta[calificacion]:
+            print(f'{tecnica:18s} nivel {NIVEL_CALIFICACION[calificacion]}  '
+                  f'{cuenta[calificacion]:8d} '
+                  f'({cuenta[calificacion] / total:6.1%})')
+
+
+if __name__ == '__main__':
+    main()
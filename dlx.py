@@ -0,0 +1,336 @@
+'''
+Resolvedor de sudokus por cobertura exacta (Algorithm X con Dancing Links).
+
+Un sudoku de 9x9 se puede ver como una matriz de 729 filas (cada numero
+posible en cada casilla) y 324 columnas (restricciones):
+
+    0   - 80:  cada casilla tiene un numero.
+    81  - 161: cada fila tiene cada numero.
+    162 - 242: cada columna tiene cada numero.
+    243 - 323: cada cuadrante tiene cada numero.
+
+Resolver el sudoku equivale a escoger filas de la matriz que cubran cada
+columna exactamente una vez. La matriz se guarda como listas doblemente
+enlazadas en arreglos planos (L, R, U, D, C), se construye una sola vez al
+importar el modulo y para cada sudoku solo se copian los arreglos.
+'''
+
+# Cantidad de columnas (restricciones) de la matriz.
+COLUMNAS = 324
+
+# Indice del primer nodo de las filas; los anteriores son la raiz (0)
+# y las cabeceras de columna (1 a 324).
+PRIMER_NODO = COLUMNAS + 1
+
+
+def _columnas_fila(fila, columna, numero):
+
+    '''
+    Calcula las 4 columnas de la matriz que cubre colocar un numero en una
+    casilla.
+
+    param int fila: Fila de la casilla.
+    param int columna: Columna de la casilla.
+    param int numero: Numero del 1 al 9.
+
+    return tuple: Indices de las cabeceras (empezando en 1).
+    '''
+
+    d = numero - 1
+    caja = (fila // 3) * 3 + columna // 3
+    return (1 + fila * 9 + columna,
+            1 + 81 + fila * 9 + d,
+            1 + 162 + columna * 9 + d,
+            1 + 243 + caja * 9 + d)
+
+
+def _construir_matriz():
+
+    '''
+    Construye los arreglos de la matriz completa de 729 filas.
+
+    return tuple: Arreglos L, R, U, D, C y S (tamano de cada columna).
+    '''
+
+    total = PRIMER_NODO + 729 * 4
+    L = list(range(total))
+    R = list(range(total))
+    U = list(range(total))
+    D = list(range(total))
+    C = list(range(total))
+    S = [0] * PRIMER_NODO
+
+    # Enlaza la raiz con las cabeceras en una lista circular.
+    for c in range(PRIMER_NODO):
+        L[c] = c - 1 if c else COLUMNAS
+        R[c] = c + 1 if c < COLUMNAS else 0
+
+    nodo = PRIMER_NODO
+    for fila in range(9):
+        for columna in range(9):
+            for numero in range(1, 10):
+                primero = nodo
+                for c in _columnas_fila(fila, columna, numero):
+                    # Inserta el nodo al final de la columna c.
+                    C[nodo] = c
+                    U[nodo] = U[c]
+                    D[nodo] = c
+                    D[U[c]] = nodo
+                    U[c] = nodo
+                    S[c] += 1
+
+                    # Enlaza el nodo con los demas nodos de la fila.
+                    L[nodo] = nodo - 1
+                    R[nodo] = nodo + 1
+                    nodo += 1
+                L[primero] = nodo - 1
+                R[nodo - 1] = primero
+
+    return L, R, U, D, C, S
+
+
+# Matriz base, se copia para cada sudoku.
+_MATRIZ = _construir_matriz()
+
+
+class _Busqueda:
+
+    '''
+    Clase que guarda una copia de la matriz para un sudoku en particular
+    y recorre sus soluciones.
+    '''
+
+    __slots__ = ('L', 'R', 'U', 'D', 'C', 'S', 'pistas', 'valido')
+
+    def __init__(self, sudoku):
+
+        '''
+        Constructor de la clase. Copia la matriz base y cubre las
+        columnas de las pistas del sudoku.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param list sudoku: Lista de 9 listas con los numeros del sudoku,
+                            0 para las casillas vacias.
+        '''
+
+        self.L, self.R, self.U, self.D, self.C, self.S = (
+            arreglo[:] for arreglo in _MATRIZ)
+
+        # Nodos de las filas escogidas por las pistas.
+        self.pistas = []
+
+        # Sera falso si dos pistas chocan entre si.
+        self.valido = True
+
+        cubiertas = [False] * PRIMER_NODO
+        for i in range(9):
+            for j in range(9):
+                numero = sudoku[i][j]
+                if not numero:
+                    continue
+                nodo = PRIMER_NODO + ((i * 9 + j) * 9 + numero - 1) * 4
+                for k in range(4):
+                    c = self.C[nodo + k]
+                    if cubiertas[c]:
+                        self.valido = False
+                        return
+                    cubiertas[c] = True
+                    self._cubrir(c)
+                self.pistas.append(nodo)
+
+    def _cubrir(self, c):
+
+        '''
+        Quita la columna c de la matriz junto con todas sus filas.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int c: Cabecera de la columna.
+        '''
+
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _descubrir(self, c):
+
+        '''
+        Deshace _cubrir(c), en el orden inverso.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int c: Cabecera de la columna.
+        '''
+
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def _escoger(self, r):
+
+        '''
+        Cubre las demas columnas de la fila del nodo r.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int r: Nodo de la fila escogida.
+        '''
+
+        R, C = self.R, self.C
+        j = R[r]
+        while j != r:
+            self._cubrir(C[j])
+            j = R[j]
+
+    def _soltar(self, r):
+
+        '''
+        Deshace _escoger(r).
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int r: Nodo de la fila escogida.
+        '''
+
+        L, C = self.L, self.C
+        j = L[r]
+        while j != r:
+            self._descubrir(C[j])
+            j = L[j]
+
+    def soluciones(self):
+
+        '''
+        Generador que recorre las soluciones sin recursion, guardando en
+        una pila la fila escogida en cada nivel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return generator: Lista de nodos escogidos por cada solucion.
+        '''
+
+        if not self.valido:
+            return
+
+        R, D, C, S = self.R, self.D, self.C, self.S
+        escogidos = []
+
+        while True:
+            if R[0] == 0:
+                # Todas las columnas estan cubiertas: hay una solucion.
+                yield self.pistas + escogidos
+            else:
+                # Escoge la columna con menos filas.
+                c = R[0]
+                menor = S[c]
+                k = R[c]
+                while k != 0 and menor > 1:
+                    if S[k] < menor:
+                        c, menor = k, S[k]
+                    k = R[k]
+
+                if menor > 0:
+                    self._cubrir(c)
+                    r = D[c]
+                    escogidos.append(r)
+                    self._escoger(r)
+                    continue
+
+            # Retrocede hasta encontrar una fila con otra alternativa.
+            while escogidos:
+                r = escogidos.pop()
+                self._soltar(r)
+                c = C[r]
+                r = D[r]
+                if r != c:
+                    escogidos.append(r)
+                    self._escoger(r)
+                    break
+                self._descubrir(c)
+            else:
+                return
+
+
+def _a_sudoku(nodos):
+
+    '''
+    Convierte los nodos de una solucion en una lista de 9 listas.
+
+    param list nodos: Nodos de las filas escogidas.
+
+    return list sudoku: Lista de 9 listas con la solucion.
+    '''
+
+    sudoku = [[0] * 9 for i in range(9)]
+    for nodo in nodos:
+        fila = (nodo - PRIMER_NODO) // 4
+        casilla, numero = divmod(fila, 9)
+        sudoku[casilla // 9][casilla % 9] = numero + 1
+    return sudoku
+
+
+def enumerar(sudoku):
+
+    '''
+    Generador perezoso de todas las soluciones de un sudoku; cada
+    solucion se calcula hasta que se pide la siguiente.
+
+    param list sudoku: Lista de 9 listas con los numeros del sudoku,
+                       0 para las casillas vacias.
+
+    return generator: Soluciones como listas de 9 listas.
+    '''
+
+    for nodos in _Busqueda(sudoku).soluciones():
+        yield _a_sudoku(nodos)
+
+
+def resolver(sudoku):
+
+    '''
+    Resuelve un sudoku.
+
+    param list sudoku: Lista de 9 listas con los numeros del sudoku,
+                       0 para las casillas vacias.
+
+    return list sudoku: Primera solucion encontrada, o None si no tiene.
+    '''
+
+    for nodos in _Busqueda(sudoku).soluciones():
+        return _a_sudoku(nodos)
+    return None
+
+
+def contar(sudoku, limite=None):
+
+    '''
+    Cuenta las soluciones de un sudoku.
+
+    param list sudoku: Lista de 9 listas con los numeros del sudoku,
+                       0 para las casillas vacias.
+    param int limite: Cantidad de soluciones a partir de la cual se deja de
+                      buscar, None para contarlas todas.
+
+    return int: Cantidad de soluciones, como maximo limite.
+    '''
+
+    total = 0
+    for _ in _Busqueda(sudoku).soluciones():
+        total += 1
+        if total == limite:
+            break
+    return total
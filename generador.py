@@ -0,0 +1,289 @@
+'''
+Generador de plantillas de sudoku sin recursion.
+
+A diferencia de rellenar_casilla(), que se llama a si misma una vez por
+casilla y recorre las casillas en orden, este generador guarda en una pila
+explicita (de a lo sumo 81 elementos) la casilla escogida en cada paso y
+los candidatos que le quedan por probar. En cada paso escoge la casilla
+vacia con menos candidatos (MRV) y desordena los candidatos de esa casilla
+por separado, usando un random.Random propio, de manera que la misma
+semilla siempre produce la misma plantilla.
+
+Los sudokus de 16x16 y 25x25 usan la misma busqueda con dos cambios: las
+mascaras de candidatos de las casillas vacias se mantienen al colocar y
+quitar cada numero (asi un punto muerto en una vecina se detecta en el
+momento) y, si la busqueda retrocede demasiadas veces sin llegar mas
+lejos que antes, deshace de golpe la mitad de la pila en lugar de
+insistir por el mismo camino. Sin eso, una mala decision al principio
+del tablero de 25x25 puede tardar minutos en corregirse.
+'''
+
+import random
+
+from geometria import geometria, numeros_mascara
+from perfilador import perfil
+from restricciones import CUENTA_BITS, NUMEROS_MASCARA, TODOS
+from tablero import PISTAS_TODAS, Tablero
+
+# Fila, columna y cuadrante de cada una de las 81 casillas.
+FILA = [k // 9 for k in range(81)]
+COLUMNA = [k % 9 for k in range(81)]
+CAJA = [(k // 27) * 3 + (k % 9) // 3 for k in range(81)]
+
+# Casillas de los tres cuadrantes de la diagonal, que no comparten fila,
+# columna ni cuadrante entre si y se pueden llenar sin revisar nada.
+DIAGONAL = [[(b * 3 + i) * 9 + b * 3 + j for i in range(3) for j in range(3)]
+            for b in range(3)]
+
+# Casillas que quedan despues de llenar la diagonal.
+RESTO = [k for k in range(81) if CAJA[k] not in (0, 4, 8)]
+
+# Retrocesos seguidos, sin llegar mas lejos que antes, (por numero del lado)
+# que se permiten en los tableros grandes antes de deshacer la mitad de la
+# pila.
+RETROCESOS_GRANDE = 2
+
+# Cada cuantos saltos atras se deshace la pila completa, por si el problema
+# esta en las primeras casillas.
+SALTOS_REINICIO = 10
+
+
+def generar(semilla=None, caja=3):
+
+    '''
+    Genera una plantilla completa de sudoku.
+
+    param int semilla: Semilla del generador de numeros aleatorios, la misma
+                       semilla siempre da la misma plantilla. None para
+                       usar una semilla al azar.
+    param int caja: Casillas por lado de cada cuadrante: 3 para 9x9, 4 para
+                    16x16 y 5 para 25x25.
+
+    return Tablero: Tablero con la plantilla completa, que es a la vez su
+                    propia solucion.
+    '''
+
+    aleatorio = random.Random(semilla)
+    if caja != 3:
+        valores = _generar_grande(aleatorio, geometria(caja))
+        return Tablero(valores, (1 << len(valores)) - 1, valores)
+
+    valores = bytearray(81)
+    filas = [0] * 9
+    columnas = [0] * 9
+    cajas = [0] * 9
+
+    # Los cuadrantes de la diagonal son independientes, asi que se llenan
+    # con una permutacion al azar cada uno.
+    for casillas in DIAGONAL:
+        numeros = list(range(1, 10))
+        aleatorio.shuffle(numeros)
+        for k, numero in zip(casillas, numeros):
+            bit = 1 << numero
+            valores[k] = numero
+            filas[FILA[k]] |= bit
+            columnas[COLUMNA[k]] |= bit
+            cajas[CAJA[k]] |= bit
+
+    vacias = RESTO[:]
+
+    # Pila con la casilla escogida en cada paso y los candidatos que
+    # todavia no se han probado en ella.
+    pila = []
+
+    # Casillas que se tuvieron que deshacer, para la instrumentacion.
+    retrocesos = 0
+
+    while vacias:
+
+        # Busca la casilla vacia con menos candidatos.
+        mejor = 0
+        mejor_mascara = 0
+        menor = 10
+        for k in vacias:
+            mascara = TODOS & ~(filas[FILA[k]] | columnas[COLUMNA[k]]
+                                | cajas[CAJA[k]])
+            cantidad = CUENTA_BITS[mascara]
+            if cantidad < menor:
+                mejor, mejor_mascara, menor = k, mascara, cantidad
+                if cantidad <= 1:
+                    break
+
+        if menor:
+            # Saca la casilla de las vacias y prueba el primer candidato.
+            k = mejor
+            vacias.remove(k)
+            candidatos = NUMEROS_MASCARA[mejor_mascara][:]
+            aleatorio.shuffle(candidatos)
+            pila.append((k, candidatos))
+            numero = candidatos.pop()
+        else:
+            # Punto muerto: se retrocede hasta una casilla que todavia
+            # tenga candidatos sin probar.
+            while True:
+                k, candidatos = pila[-1]
+                bit = ~(1 << valores[k])
+                filas[FILA[k]] &= bit
+                columnas[COLUMNA[k]] &= bit
+                cajas[CAJA[k]] &= bit
+                valores[k] = 0
+                retrocesos += 1
+                if candidatos:
+                    numero = candidatos.pop()
+                    break
+                pila.pop()
+                vacias.append(k)
+
+        bit = 1 << numero
+        valores[k] = numero
+        filas[FILA[k]] |= bit
+        columnas[COLUMNA[k]] |= bit
+        cajas[CAJA[k]] |= bit
+
+    if perfil.activo:
+        perfil.contar('retrocesos', retrocesos)
+    return Tablero(valores, PISTAS_TODAS, valores)
+
+
+def _generar_grande(aleatorio, tablas):
+
+    '''
+    Genera una plantilla completa de cualquier tamano.
+
+    param random.Random aleatorio: Generador de numeros aleatorios.
+    param Geometria tablas: Tablas del tamano del sudoku.
+
+    return bytearray: Los numeros de la plantilla por filas.
+    '''
+
+    lado = tablas.lado
+    todos = tablas.todos
+    fila = tablas.fila
+    columna = tablas.columna
+    cuadrante = tablas.cuadrante
+    vecinas = tablas.vecinas
+
+    valores = bytearray(tablas.celdas)
+    filas = [0] * lado
+    columnas = [0] * lado
+    cajas = [0] * lado
+
+    # Los cuadrantes de la diagonal se llenan con una permutacion al azar
+    # cada uno, como en el de 9x9.
+    for b in range(tablas.caja):
+        numeros = list(range(1, lado + 1))
+        aleatorio.shuffle(numeros)
+        for k, numero in zip(tablas.unidades[2 * lado + b * tablas.caja + b],
+                             numeros):
+            bit = 1 << numero
+            valores[k] = numero
+            filas[fila[k]] |= bit
+            columnas[columna[k]] |= bit
+            cajas[cuadrante[k]] |= bit
+
+    # Candidatos de cada casilla vacia, 0 en las llenas.
+    mascaras = [0 if valores[k] else
+                todos & ~(filas[fila[k]] | columnas[columna[k]]
+                          | cajas[cuadrante[k]])
+                for k in range(tablas.celdas)]
+
+    def quitar(k):
+        # Quita el numero de la casilla y vuelve a calcular los candidatos
+        # de la casilla y de sus vecinas vacias.
+        bit = ~(1 << valores[k])
+        filas[fila[k]] &= bit
+        columnas[columna[k]] &= bit
+        cajas[cuadrante[k]] &= bit
+        valores[k] = 0
+        for v in vecinas[k] + [k]:
+            if not valores[v]:
+                mascaras[v] = todos & ~(filas[fila[v]] | columnas[columna[v]]
+                                        | cajas[cuadrante[v]])
+
+    vacias = [k for k in range(tablas.celdas) if not valores[k]]
+    pila = []
+    retrocesos = 0
+    seguidos = 0
+    saltos = 0
+
+    # Casillas de la pila mas profunda desde el ultimo salto atras.
+    profundidad = 0
+
+    # Indica si alguna vecina del ultimo numero colocado se quedo sin
+    # candidatos.
+    muerto = False
+
+    while vacias or muerto:
+
+        if not muerto:
+            # Busca la casilla vacia con menos candidatos.
+            mejor = 0
+            menor = lado + 1
+            for k in vacias:
+                cantidad = mascaras[k].bit_count()
+                if cantidad < menor:
+                    mejor, menor = k, cantidad
+                    if cantidad <= 1:
+                        break
+
+        if not muerto and menor:
+            k = mejor
+            vacias.remove(k)
+            candidatos = numeros_mascara(mascaras[k])
+            aleatorio.shuffle(candidatos)
+            pila.append((k, candidatos))
+            numero = candidatos.pop()
+
+            # Si se llego mas lejos que nunca desde el ultimo salto, el
+            # generador avanza y la racha de retrocesos termina.
+            if len(pila) > profundidad:
+                profundidad = len(pila)
+                seguidos = 0
+
+        elif seguidos == RETROCESOS_GRANDE * lado:
+            # Demasiados retrocesos seguidos: se deshace la mitad de la pila
+            # (o toda, de vez en cuando) y se sigue desde ahi.
+            saltos += 1
+            hasta = 0 if saltos % SALTOS_REINICIO == 0 else len(pila) // 2
+            while len(pila) > hasta:
+                k, candidatos = pila.pop()
+                quitar(k)
+                vacias.append(k)
+            seguidos = 0
+            profundidad = len(pila)
+            muerto = False
+            continue
+
+        else:
+            # Punto muerto: se retrocede hasta una casilla que todavia
+            # tenga candidatos sin probar.
+            retrocesos += 1
+            seguidos += 1
+            while True:
+                k, candidatos = pila[-1]
+                quitar(k)
+                if candidatos:
+                    numero = candidatos.pop()
+                    break
+                pila.pop()
+                vacias.append(k)
+
+        bit = 1 << numero
+        valores[k] = numero
+        filas[fila[k]] |= bit
+        columnas[columna[k]] |= bit
+        cajas[cuadrante[k]] |= bit
+        mascaras[k] = 0
+
+        # Quita el numero de los candidatos de las vecinas.
+        muerto = False
+        for v in vecinas[k]:
+            if not valores[v]:
+                mascara = mascaras[v] & ~bit
+                mascaras[v] = mascara
+                if not mascara:
+                    muerto = True
+
+    if perfil.activo:
+        perfil.contar('retrocesos', retrocesos)
+    return valores
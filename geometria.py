@@ -0,0 +1,112 @@
+'''
+Medidas y tablas de un sudoku de cualquier tamano.
+
+Un sudoku con cuadrantes de caja x caja casillas tiene lado = caja * caja
+filas, columnas y cuadrantes, usa los numeros del 1 al lado y tiene
+lado * lado casillas: caja = 3 es el sudoku clasico de 9x9, caja = 4 el de
+16x16 y caja = 5 el de 25x25. Los modulos del sudoku de 9x9 tienen sus
+propias tablas fijas, que son las mismas que calcula este modulo para
+caja = 3; aqui se calculan para cualquier caja, una sola vez por tamano.
+
+Las casillas se numeran por filas: la casilla k esta en la fila
+k // lado y la columna k % lado.
+'''
+
+# Tamanos de cuadrante que se pueden jugar.
+CAJAS = (3, 4, 5)
+
+# Caracter con que se escribe cada numero: del 1 al 9 y despues letras,
+# como se acostumbra en los sudokus de 16x16 y 25x25. El 0 es la casilla
+# vacia.
+SIMBOLOS = '0123456789ABCDEFGHIJKLMNOP'
+
+
+class Geometria:
+
+    '''
+    Clase con las tablas de un tamano de sudoku: fila, columna y cuadrante
+    de cada casilla, las casillas de cada unidad y las vecinas de cada
+    casilla.
+    '''
+
+    __slots__ = ('caja', 'lado', 'celdas', 'todos', 'fila', 'columna',
+                 'cuadrante', 'unidades', 'vecinas')
+
+    def __init__(self, caja):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int caja: Casillas por lado de cada cuadrante.
+        '''
+
+        lado = caja * caja
+        self.caja = caja
+        self.lado = lado
+        self.celdas = lado * lado
+
+        # Mascara con los bits del 1 al lado encendidos (el bit 0 no se
+        # usa), igual que TODOS en restricciones.py.
+        self.todos = ((1 << lado) - 1) << 1
+
+        # Fila, columna y cuadrante de cada casilla.
+        self.fila = [k // lado for k in range(self.celdas)]
+        self.columna = [k % lado for k in range(self.celdas)]
+        self.cuadrante = [(k // lado // caja) * caja + k % lado // caja
+                          for k in range(self.celdas)]
+
+        # Casillas de cada fila, de cada columna y de cada cuadrante.
+        self.unidades = (
+            [[f * lado + c for c in range(lado)] for f in range(lado)]
+            + [[f * lado + c for f in range(lado)] for c in range(lado)]
+            + [[k for k in range(self.celdas) if self.cuadrante[k] == b]
+               for b in range(lado)])
+
+        # Casillas que comparten fila, columna o cuadrante con cada una.
+        self.vecinas = [[] for k in range(self.celdas)]
+        for unidad in self.unidades:
+            for k in unidad:
+                self.vecinas[k].extend(unidad)
+        self.vecinas = [sorted(set(vecinas) - {k})
+                        for k, vecinas in enumerate(self.vecinas)]
+
+
+# Geometrias ya calculadas, por caja.
+_GEOMETRIAS = {}
+
+
+def geometria(caja):
+
+    '''
+    Devuelve las tablas de un tamano de sudoku, calculandolas solo la
+    primera vez.
+
+    param int caja: Casillas por lado de cada cuadrante.
+
+    return Geometria: Las tablas del tamano.
+    '''
+
+    tablas = _GEOMETRIAS.get(caja)
+    if tablas is None:
+        tablas = _GEOMETRIAS[caja] = Geometria(caja)
+    return tablas
+
+
+def numeros_mascara(mascara):
+
+    '''
+    Devuelve los numeros de una mascara de cualquier tamano, para cuando
+    la tabla NUMEROS_MASCARA de 9x9 no alcanza.
+
+    param int mascara: Mascara con un bit encendido por cada numero.
+
+    return list: Numeros en orden ascendente.
+    '''
+
+    numeros = []
+    while mascara:
+        bit = mascara & -mascara
+        numeros.append(bit.bit_length() - 1)
+        mascara ^= bit
+    return numeros
@@ -0,0 +1,516 @@
+#!/usr/bin/python3
+
+'''
+Grabacion de partidas y reproduccion sin ventana.
+
+Con la variable de entorno SUDOKU_GRABACION=sesion.log el juego guarda en
+un registro, a medida que se juega, todo lo que hace falta para volver a
+jugar la misma sesion: cada vuelta del ciclo del juego con sus eventos, el
+momento y la posicion del mouse que vio el juego en esa vuelta, y los
+sudokus que entrego la precarga. Los sudokus se guardan enteros y no solo
+la semilla del generador, porque el hilo de precarga genera por adelantado
+y en un orden que depende de cuanto tarda cada cosa; igual se guarda y se
+vuelve a usar la semilla de random, para lo que dependa de ella.
+
+La reproduccion abre el juego con los controladores 'dummy' de SDL y le
+pasa las vueltas grabadas al mismo GestorEscenas.procesar(), sin esperar
+entre vueltas, asi que corre tan rapido como da el procesador. Al final
+muestra los eventos por segundo y el tiempo de las vueltas, y revisa que
+el ultimo tablero jugado quedo igual que en la grabacion.
+
+El registro solo crece: una cabecera y despues registros de la forma tipo
+(1 byte), largo (I) y datos. Formato (enteros little-endian):
+
+    Cabecera:  'SUDG', version (H)
+    'I':       semilla de random (Q)
+    'P':       partida guardada al empezar, como en partida.py
+    'T':       sudoku que entrego la precarga, como en partida.py
+    'C':       vuelta: momento en ms (I), mouse (hh), cambios de escena
+               hasta esa vuelta (I), cantidad de eventos (H) y los eventos
+    'F':       fin: nombre de la ultima escena y el ultimo tablero jugado
+
+Cada evento es su tipo (H), el largo de sus datos (H) y los datos: los
+movimientos y clicks del mouse y las teclas con un formato fijo y los
+demas con marshal.
+
+Uso: python grabacion.py [--cuadros] sesion.log
+'''
+
+import argparse
+import marshal
+import os
+import random
+import statistics
+import struct
+import sys
+import time
+
+from partida import desempaquetar, empaquetar
+from recursos import importar_al_usarse
+
+pygame = importar_al_usarse('pygame')
+
+# Identificador y version del formato.
+MAGICO = b'SUDG'
+VERSION = 1
+
+CABECERA = struct.Struct('<4sH')
+REGISTRO = struct.Struct('<cI')
+INICIO = struct.Struct('<Q')
+CUADRO = struct.Struct('<IhhIH')
+EVENTO = struct.Struct('<HH')
+
+# Datos de los eventos con formato fijo.
+MOVIMIENTO = struct.Struct('<hhhhB')
+CLICK = struct.Struct('<hhB')
+TECLA = struct.Struct('<iHI')
+
+# Vueltas vacias que la reproduccion da, como maximo, para llegar a la
+# escena de la grabacion.
+ALCANCE = 1000
+
+# Tiempos de vuelta que muestra la reproduccion con --cuadros.
+PERCENTILES = (50, 90, 99)
+
+
+def codificar(event):
+
+    '''
+    Convierte un evento de pygame en bytes.
+
+    param pygame.event.Event event: El evento.
+
+    return bytes: El evento codificado.
+    '''
+
+    tipo = event.type
+    if tipo == pygame.MOUSEMOTION:
+        botones = sum(bool(boton) << k
+                      for k, boton in enumerate(event.buttons))
+        datos = MOVIMIENTO.pack(*event.pos, *event.rel, botones)
+    elif tipo in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        datos = CLICK.pack(*event.pos, event.button)
+    elif tipo in (pygame.KEYDOWN, pygame.KEYUP):
+        datos = (TECLA.pack(event.key, event.mod, event.scancode)
+                 + getattr(event, 'unicode', '').encode())
+    else:
+        # Solo se guardan los valores que marshal sabe escribir; los
+        # demas (como la ventana) no los usa el juego.
+        datos = marshal.dumps({llave: valor
+                               for llave, valor in event.dict.items()
+                               if isinstance(valor, (int, float, str, tuple))
+                               or valor is None})
+    return EVENTO.pack(tipo, len(datos)) + datos
+
+
+def decodificar(datos, posicion):
+
+    '''
+    Lee un evento de codificar().
+
+    param bytes datos: Bytes con el evento.
+    param int posicion: Donde empieza el evento.
+
+    return tuple: (evento, posicion donde termina).
+    '''
+
+    tipo, largo = EVENTO.unpack_from(datos, posicion)
+    posicion += EVENTO.size
+    cuerpo = datos[posicion:posicion + largo]
+    if tipo == pygame.MOUSEMOTION:
+        x, y, dx, dy, botones = MOVIMIENTO.unpack(cuerpo)
+        atributos = {'pos': (x, y), 'rel': (dx, dy),
+                     'buttons': tuple(botones >> k & 1 for k in range(3)),
+                     'touch': False, 'window': None}
+    elif tipo in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        x, y, boton = CLICK.unpack(cuerpo)
+        atributos = {'pos': (x, y), 'button': boton, 'touch': False,
+                     'window': None}
+    elif tipo in (pygame.KEYDOWN, pygame.KEYUP):
+        llave, modificadores, codigo = TECLA.unpack_from(cuerpo)
+        atributos = {'key': llave, 'mod': modificadores, 'scancode': codigo,
+                     'unicode': cuerpo[TECLA.size:].decode(),
+                     'window': None}
+    else:
+        atributos = marshal.loads(cuerpo)
+    return pygame.event.Event(tipo, atributos), posicion + largo
+
+
+class Grabadora:
+
+    '''
+    Clase que escribe el registro de una sesion mientras se juega.
+    '''
+
+    def __init__(self, ruta):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str ruta: Archivo del registro; si existe se reemplaza.
+        '''
+
+        self.ruta = ruta
+        self.archivo = None
+
+        # Gestor de escenas de la ultima vuelta, para saber al cerrar en
+        # que escena termino la sesion.
+        self.gestor = None
+
+    def iniciar(self, partida=None):
+
+        '''
+        Abre el registro y fija la semilla de random.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param bytes partida: Registro de la partida guardada que se puede
+                              continuar desde el menu, None si no hay.
+        '''
+
+        semilla = random.randrange(1 << 64)
+        random.seed(semilla)
+        # Sin buffer: cada registro llega al sistema en cuanto se escribe,
+        # asi una sesion que termina con un error o matando el proceso
+        # tambien se puede reproducir.
+        self.archivo = open(self.ruta, 'wb', buffering=0)
+        self.archivo.write(CABECERA.pack(MAGICO, VERSION))
+        self._escribir(b'I', INICIO.pack(semilla))
+        if partida is not None:
+            self._escribir(b'P', partida)
+
+    def cuadro(self, gestor, ahora, mouse, eventos):
+
+        '''
+        Escribe una vuelta del ciclo del juego, antes de atenderla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param GestorEscenas gestor: Gestor que atiende la vuelta.
+        :param int ahora: Milisegundos de pygame en la vuelta.
+        :param tuple mouse: Posicion del mouse en la vuelta.
+        :param list eventos: Eventos de la vuelta.
+        '''
+
+        self.gestor = gestor
+        datos = [CUADRO.pack(ahora, *mouse, gestor.cambios, len(eventos))]
+        datos.extend(codificar(event) for event in eventos)
+        self._escribir(b'C', b''.join(datos))
+
+    def tablero(self, tablero, nivel, caja):
+
+        '''
+        Escribe el sudoku que entrego la precarga al empezar un nivel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param Tablero tablero: Tablero recien tomado.
+        :param int nivel: Nivel de dificultad.
+        :param int caja: Casillas por lado de cada cuadrante.
+        '''
+
+        self._escribir(b'T', empaquetar(tablero, nivel, caja, 0))
+
+    def cerrar(self):
+
+        '''
+        Escribe la escena y el tablero con que termino la sesion y cierra
+        el registro.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if self.archivo is None:
+            return
+        if self.gestor is not None:
+            escena = type(self.gestor.escena).__name__.encode()
+            self._escribir(b'F', bytes([len(escena)]) + escena
+                           + (self.gestor.tablero or b''))
+        self.archivo.close()
+        self.archivo = None
+
+    def _escribir(self, tipo, datos):
+
+        '''
+        Agrega un registro al final del archivo, con una sola escritura.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param bytes tipo: Letra del tipo de registro.
+        :param bytes datos: Datos del registro.
+        '''
+
+        self.archivo.write(REGISTRO.pack(tipo, len(datos)) + datos)
+
+
+class Sesion:
+
+    '''
+    Clase con lo que se leyo de un registro.
+    '''
+
+    def __init__(self):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        self.semilla = None
+
+        # Registro de la partida guardada al empezar, None si no habia.
+        self.partida = None
+
+        # Tableros que entrego la precarga, en orden.
+        self.tableros = []
+
+        # Vueltas, cada una (momento, mouse, cambios de escena, eventos).
+        self.cuadros = []
+
+        # Nombre de la ultima escena y ultimo tablero jugado, None si la
+        # sesion no se cerro.
+        self.escena = None
+        self.tablero = None
+
+
+def leer(ruta):
+
+    '''
+    Lee un registro de Grabadora.
+
+    param str ruta: Archivo del registro.
+
+    return Sesion: La sesion grabada.
+
+    raise ValueError: Si el archivo no es un registro de este formato.
+    '''
+
+    with open(ruta, 'rb') as archivo:
+        datos = archivo.read()
+    if len(datos) < CABECERA.size:
+        raise ValueError('registro vacio')
+    magico, version = CABECERA.unpack_from(datos)
+    if magico != MAGICO or version != VERSION:
+        raise ValueError('no es un registro de partidas')
+
+    sesion = Sesion()
+    posicion = CABECERA.size
+    while posicion + REGISTRO.size <= len(datos):
+        tipo, largo = REGISTRO.unpack_from(datos, posicion)
+        posicion += REGISTRO.size
+        fin = posicion + largo
+
+        # Si el juego se cerro a la mitad de un registro, se ignora.
+        if fin > len(datos):
+            break
+        if tipo == b'C':
+            ahora, x, y, cambios, cantidad = CUADRO.unpack_from(datos,
+                                                                posicion)
+            eventos = []
+            actual = posicion + CUADRO.size
+            for _ in range(cantidad):
+                event, actual = decodificar(datos, actual)
+                eventos.append(event)
+            sesion.cuadros.append((ahora, (x, y), cambios, eventos))
+        elif tipo == b'T':
+            sesion.tableros.append(desempaquetar(datos[posicion:fin]))
+        elif tipo == b'I':
+            sesion.semilla, = INICIO.unpack_from(datos, posicion)
+        elif tipo == b'P':
+            sesion.partida = datos[posicion:fin]
+        elif tipo == b'F':
+            largo_escena = datos[posicion]
+            sesion.escena = datos[posicion + 1:
+                                  posicion + 1 + largo_escena].decode()
+            sesion.tablero = datos[posicion + 1 + largo_escena:fin] or None
+        posicion = fin
+    return sesion
+
+
+class TablerosGrabados:
+
+    '''
+    Clase que hace de precarga en la reproduccion: entrega, en orden, los
+    sudokus que entrego la precarga en la grabacion.
+    '''
+
+    def __init__(self, partidas):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param list partidas: Objetos Partida con los tableros grabados.
+        '''
+
+        self.partidas = list(reversed(partidas))
+
+    def preparar(self, nivel, caja=3):
+
+        '''
+        No hace nada, los sudokus ya estan listos.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+    def tomar(self, nivel, caja=3):
+
+        '''
+        Entrega el siguiente sudoku grabado.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int nivel: Nivel de dificultad.
+        :param int caja: Casillas por lado de cada cuadrante.
+
+        return Tablero: El tablero.
+
+        raise ValueError: Si ya no quedan sudokus o el siguiente es de
+                          otro nivel, es decir, la reproduccion se separo
+                          de la grabacion.
+        '''
+
+        if not self.partidas:
+            raise ValueError('la grabacion no tiene mas sudokus')
+        partida = self.partidas.pop()
+        if (partida.nivel, partida.caja) != (nivel, caja):
+            raise ValueError(f'se esperaba un sudoku de nivel '
+                             f'{partida.nivel}, caja {partida.caja}')
+        return partida.tablero
+
+    def detener(self):
+
+        '''
+        No hace nada, no hay hilo que detener.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+
+def reproducir(sesion):
+
+    '''
+    Juega de nuevo una sesion grabada, sin ventana ni sonido y sin esperar
+    entre vueltas.
+
+    Si en la grabacion una escena tardo mas en cambiar (por ejemplo porque
+    esperaba a que terminara un sonido), la reproduccion ya esta en la
+    escena siguiente cuando llegan las vueltas de la anterior, y esas
+    vueltas se saltan. Si pasa al reves, se dan vueltas vacias hasta
+    llegar a la escena de la grabacion.
+
+    param Sesion sesion: Sesion leida con leer().
+
+    return dict: Medidas: 'cuadros', 'eventos', 'saltados', 'segundos',
+                 'tiempos' (segundos de cada vuelta), 'escena' y 'tablero'
+                 (ultima escena y ultimo tablero jugado).
+    '''
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+    # La reproduccion no se graba a si misma.
+    os.environ.pop('SUDOKU_GRABACION', None)
+
+    import sudoku
+
+    sudoku.iniciar(None, sonido=False, ruta_partida=None)
+
+    # Los sudokus salen de la grabacion y no del hilo de precarga, que se
+    # detiene para que no le quite tiempo a la reproduccion.
+    sudoku.precarga.detener()
+    sudoku.precarga.hilo.join()
+    sudoku.precarga = TablerosGrabados(sesion.tableros)
+    sudoku.autoguardado.ultima = sesion.partida
+    if sesion.semilla is not None:
+        random.seed(sesion.semilla)
+
+    gestor = sudoku.GestorEscenas(sudoku.MenuPrincipal())
+    ritmo = sudoku.ritmo
+    tiempos = []
+    eventos = 0
+    saltados = 0
+    inicio = time.perf_counter()
+    try:
+        for ahora, mouse, cambios, cuadro in sesion.cuadros:
+            ritmo.ahora = ahora
+            ritmo.mouse = mouse
+
+            vueltas = 0
+            while gestor.cambios < cambios and vueltas < ALCANCE:
+                gestor.procesar([])
+                vueltas += 1
+            if gestor.cambios > cambios:
+                # Las vueltas de una escena que aqui ya termino solo
+                # importan si cierran el juego.
+                cuadro = [event for event in cuadro
+                          if event.type == pygame.QUIT]
+                if not cuadro:
+                    saltados += 1
+                    continue
+
+            eventos += len(cuadro)
+            antes = time.perf_counter()
+            gestor.procesar(cuadro)
+            tiempos.append(time.perf_counter() - antes)
+    except SystemExit:
+        # El juego grabado termino cerrando la ventana o con el boton
+        # Quit, y aqui tambien.
+        pass
+    segundos = time.perf_counter() - inicio
+
+    return {'cuadros': len(tiempos), 'eventos': eventos,
+            'saltados': saltados, 'segundos': segundos,
+            'tiempos': tiempos, 'escena': type(gestor.escena).__name__,
+            'tablero': gestor.tablero}
+
+
+def main(argv=None):
+
+    '''
+    Punto de entrada de la linea de comandos.
+
+    param list argv: Argumentos, None para usar sys.argv.
+
+    return int: 0 si la reproduccion termino igual que la grabacion, 1 si
+                no.
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Reproduce sin ventana una sesion grabada con '
+        'SUDOKU_GRABACION.')
+    parser.add_argument('registro', help='archivo de la grabacion')
+    parser.add_argument('--cuadros', action='store_true',
+                        help='muestra el tiempo de cada vuelta')
+    args = parser.parse_args(argv)
+
+    sesion = leer(args.registro)
+    medidas = reproducir(sesion)
+
+    tiempos = medidas['tiempos']
+    if args.cuadros:
+        for k, tiempo in enumerate(tiempos):
+            print(f'{k:6d} {tiempo * 1e3:9.3f} ms')
+
+    segundos = medidas['segundos']
+    print(f'{medidas["cuadros"]} vueltas, {medidas["eventos"]} eventos, '
+          f'{medidas["saltados"]} vueltas saltadas en {segundos:.3f} s')
+    print(f'{medidas["eventos"] / segundos:,.0f} eventos/s, '
+          f'{medidas["cuadros"] / segundos:,.0f} vueltas/s')
+    if tiempos:
+        ordenados = sorted(tiempos)
+        partes = [f'p{p} {ordenados[len(ordenados) * p // 100] * 1e3:.3f}'
+                  for p in PERCENTILES]
+        print(f'vuelta (ms): media {statistics.fmean(tiempos) * 1e3:.3f}, '
+              f'{", ".join(partes)}, max {ordenados[-1] * 1e3:.3f}')
+
+    if sesion.escena is None:
+        print('la grabacion no se cerro, no hay tablero final para comparar')
+        return 1
+    igual = (medidas['escena'] == sesion.escena
+             and medidas['tablero'] == sesion.tablero)
+    print(f'escena final {medidas["escena"]} (grabada {sesion.escena}), '
+          f'tablero {"igual" if igual else "distinto"}')
+    return 0 if igual else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+
+'''
+Generacion de sudokus por lote, sin abrir la ventana del juego.
+
+Usa el mismo generador que generar_sudoku() y el mismo tallado que
+la escena Nivel, repartiendo el trabajo entre todos los nucleos con un
+grupo de procesos. Cada sudoku se escribe en el archivo de salida en
+cuanto esta listo, una linea por sudoku:
+
+    <semilla> <nivel> <sudoku> <solucion>
+
+donde <sudoku> y <solucion> son 81 digitos por filas, 0 para las casillas
+vacias. La misma semilla y el mismo nivel siempre dan el mismo sudoku
+(siempre que no se use --presupuesto).
+
+Ejemplo:
+    python lote.py --cantidad 20000 --nivel 3 --semilla 1000 -o avanzado.txt
+'''
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+from tablero import a_texto
+from tallado import VACIAS_NIVEL, nuevo_sudoku
+
+
+def crear_sudoku(semilla, nivel, presupuesto=None):
+
+    '''
+    Genera y talla un sudoku a partir de una semilla.
+
+    param int semilla: Semilla del generador y del tallado.
+    param int nivel: 1 para principiante, 2 para intermedio y 3 para
+                     avanzado.
+    param float presupuesto: Segundos maximos de tallado, None para no
+                             tener limite.
+
+    return str: Linea lista para escribir en el archivo de salida.
+    '''
+
+    tablero = nuevo_sudoku(nivel, semilla, presupuesto)
+    return (f'{semilla} {nivel} {tablero.a_texto()} '
+            f'{a_texto(tablero.solucion)}\n')
+
+
+def _tarea(argumentos):
+
+    '''
+    Funcion que ejecutan los procesos del grupo; recibe una tupla para
+    poder usarse con imap_unordered().
+    '''
+
+    return crear_sudoku(*argumentos)
+
+
+def main(argv=None):
+
+    '''
+    Punto de entrada de la linea de comandos.
+
+    param list argv: Argumentos, None para usar sys.argv.
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Genera sudokus por lote sin abrir la ventana del juego.')
+    parser.add_argument('-n', '--cantidad', type=int, default=1000,
+                        help='cantidad de sudokus a generar')
+    parser.add_argument('--nivel', type=int, choices=sorted(VACIAS_NIVEL),
+                        default=1, help='1 principiante, 2 intermedio, '
+                        '3 avanzado')
+    parser.add_argument('--semilla', type=int, default=0,
+                        help='primera semilla; se usan semilla, semilla+1, '
+                        '... semilla+cantidad-1')
+    parser.add_argument('-o', '--salida', default='-',
+                        help="archivo de salida, '-' para la salida estandar")
+    parser.add_argument('-j', '--procesos', type=int, default=os.cpu_count(),
+                        help='cantidad de procesos')
+    parser.add_argument('--presupuesto', type=float, default=None,
+                        help='segundos maximos de tallado por sudoku; '
+                        'rompe la reproducibilidad por semilla')
+    args = parser.parse_args(argv)
+
+    tareas = ((semilla, args.nivel, args.presupuesto)
+              for semilla in range(args.semilla, args.semilla + args.cantidad))
+
+    salida = sys.stdout if args.salida == '-' else open(args.salida, 'w')
+    inicio = time.perf_counter()
+    ultimo_aviso = inicio
+    hechos = 0
+
+    try:
+        with multiprocessing.Pool(args.procesos) as grupo:
+            # imap_unordered entrega cada resultado en cuanto esta listo,
+            # asi los sudokus se van escribiendo sin esperar al final.
+            for linea in grupo.imap_unordered(_tarea, tareas, chunksize=16):
+                salida.write(linea)
+                hechos += 1
+
+                ahora = time.perf_counter()
+                if ahora - ultimo_aviso >= 1 or hechos == args.cantidad:
+                    ultimo_aviso = ahora
+                    ritmo = hechos / (ahora - inicio)
+                    print(f'\r{hechos}/{args.cantidad} sudokus '
+                          f'({ritmo:.0f} sudokus/s)', end='', file=sys.stderr)
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+    print(file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
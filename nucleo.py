@@ -0,0 +1,174 @@
+'''
+Nucleo del juego sin pantalla.
+
+Funciones para generar, rellenar y revisar sudokus que no necesitan pygame
+ni una ventana abierta, de manera que se pueden importar (por ejemplo desde
+pruebas, benchmarks o lote.py) sin efectos secundarios y en pocos
+milisegundos. La interfaz grafica esta en sudoku.py.
+'''
+
+import math
+import random
+
+from generador import generar
+from perfilador import perfil
+from restricciones import Restricciones
+
+
+def verificar(sudoku, fila, columna, numero):
+
+    '''
+    Esta funcion se encarga de verificar que los numeros generados por la
+    funcion rellenar celda no se encuentre ya en la misla fila, columna o
+    cuadrante del sudoku. Sirve para cualquier tamano de sudoku, que se
+    calcula con la cantidad de filas.
+
+    param list sudoku: Lista de listas que contiene los numeros del
+                       sudoku a generase.
+    param int fila: Especifica la fila actual del sudoku.
+    param int columna: Especifica la columna actual del sudoku.
+    param int numero: Especifica el numero presente en la casilla.
+
+    return bool True: Si el numero no se encuentra ya en la misla fila,
+                      columna o cuadrante del sudoku.
+    return bool False: Si el numero ya se encuentra en la misla fila,
+                      columna o cuadrante del sudoku.
+    '''
+
+    # Casillas por lado del sudoku y de cada cuadrante (9 y 3 en el
+    # sudoku de 9x9).
+    lado = len(sudoku)
+    caja = math.isqrt(lado)
+
+    # Itera sobre cada fila de toda una columna
+    # y verifica que el numero no este en la misma columna.
+    for i in range(lado):
+        if sudoku[i][columna] == numero:
+            return False
+    # Itera sobre cada columna de toda una fila
+    # y verifica que el numero no este en la misma fila.
+    if numero in sudoku[fila]:
+        return False
+
+    # Calcula la celda de la esquina superior izquierda
+    # del cuadrante al que pertenece la
+    # celda analizada (fila, columna).
+    fila2 = (fila // caja) * caja
+    columna2 = (columna // caja) * caja
+
+    # Estos dos for recorren el cuadrante y con el if
+    # se verifica si el numero ya esta presente en ese
+    # cuadrante.
+    for i in range(caja):
+        for j in range(caja):
+            if sudoku[fila2 + i][columna2 + j] == numero:
+                return False
+    return True
+
+
+def rellenar_casilla(i, j, sudoku, numeros, restricciones):
+
+    '''
+    Esta funcion se encarga de rellenar todas las casillas del sudoku,
+    utilizando el motor de restricciones verifica que el numero que va a
+    colocar en la casilla no se encuentre ya en la misma fila, columna o
+    cuadrante. Al hacerlo podria llegar a un punto en el que no tenga ningun
+    numero posible a colocar en la casilla, por lo tanto el sudoku quedaria
+    incompleto en cierto punto. Para esto se utiliza una recursion en la que
+    la funcion se llama a si misma en para que dado caso que llegue a un punto
+    muerto pueda devolverse unas cuantas casillas y tomar otro camino,
+    generando asi un sudoku completamente validado.
+
+    param int i: Fila de la casilla.
+    param int j: Columna de la casilla.
+    param list sudoku: Lista de 9 listas con 9 elementos iguales a 0 cada una.
+    param list numeros: Lista de numeros del 1 al 9 en desorden.
+    param Restricciones restricciones: Mascaras de los numeros usados en cada
+                                       fila, columna y cuadrante del sudoku.
+
+    return bool True: Si todas las casillas han sido rellenadas correctamente.
+    return bool False: Si no se lograron rellenar todas las casillas con
+                       ese camino.
+    '''
+
+    # Se comprueba si ya se ha llegado a la ultima fila del sudoku.
+    if i == 9:
+        return True
+
+    # Se actualizan los indices next_i y next_j para la proxima celda que se va
+    # a rellenar. Si se esta la ultima columna avanza a la siguiente fila y
+    # comienza desde la primera columna. En caso contrario, avanza a la
+    # siguiente columna de la misma fila.
+    next_i = i + 1 if j == 8 else i
+    next_j = 0 if j == 8 else j + 1
+
+    # Verifica si la celda actual ya esta llena. Si la celda esta llena,
+    # la funcion se llama a si misma para rellenar la siguiente celda.
+    if sudoku[i][j] != 0:
+        return rellenar_casilla(next_i, next_j, sudoku, numeros, restricciones)
+
+    # Mascara con los numeros que todavia caben en la casilla, se calcula
+    # una sola vez en lugar de llamar verificar() por cada numero.
+    mascara = restricciones.mascara(i, j)
+
+    # Este for itera sobre cada numero en la lista numeros.
+    for num in numeros:
+
+        # Revisa en la mascara si el numero puede ser colocado en la casilla.
+        if mascara & (1 << num):
+            sudoku[i][j] = num
+            restricciones.colocar(i, j, num)
+
+            # La funcion se llama a si misma para rellenar la siguiente celda,
+            # si retorna True significa que todas las casillas han sido
+            # rellenadas correctamente.
+            # En el caso contrario se rellena con 0, se libera el numero
+            # y se sigue probando con otros numeros.
+            if rellenar_casilla(next_i, next_j, sudoku, numeros,
+                                restricciones):
+                return True
+            restricciones.quitar(i, j, num)
+            sudoku[i][j] = 0
+            if perfil.activo:
+                perfil.contar('retrocesos')
+    return False
+
+
+def rellenar_sudoku(sudoku):
+
+    '''
+    Esta funcion se encarga de rellenar el sudoku con valores entre 1 y 9
+    casilla por casilla haciendo uso de la funcion rellenar_casilla().
+
+    param list sudoku: Lista de 9 listas con 9 elementos iguales a 0 cada una.
+
+    return function rellenar_casilla(): Retorna esta funcion para que rellene
+                                        todas las casillas.
+    '''
+
+    # Lista con numeros posibles del sudoku, es decir del 1 al 9.
+    numeros = list(range(1, 10))
+
+    # random.shuffle desordena la lista numeros.
+    random.shuffle(numeros)
+
+    # Motor de restricciones con los numeros que ya esten en el sudoku.
+    restricciones = Restricciones(sudoku)
+    return rellenar_casilla(0, 0, sudoku, numeros, restricciones)
+
+
+def generar_sudoku(semilla=None):
+
+    '''
+    Genera el sudoku final usando el generador sin recursion, que escoge
+    siempre la casilla con menos candidatos y desordena los candidatos de
+    cada casilla por separado.
+
+    param int semilla: Semilla para obtener siempre el mismo sudoku,
+                       None para uno al azar.
+
+    return list sudoku: Retorna el sudoku completo y validado.
+    '''
+
+    # Llama la funcion generar() del modulo generador.
+    return generar(semilla).a_listas()
@@ -0,0 +1,296 @@
+'''
+Guardado automatico de la partida en curso.
+
+El nivel guarda una foto de la partida cada pocos segundos, al volver al
+menu y al cerrar la ventana: las pistas, los numeros que escribio el
+jugador, la solucion, el tiempo jugado y el nivel. La foto es un registro
+binario de unos cientos de bytes que se arma en el ciclo del juego (es
+copiar los bytes del tablero) y se escribe en disco desde un hilo aparte,
+asi que guardar nunca atrasa un cuadro. El hilo escribe primero un archivo
+temporal y lo renombra con os.replace(), que es atomico: si el juego se
+cierra a la mitad queda la foto anterior completa, nunca una a medias.
+
+La ultima foto tambien se guarda en memoria, asi el menu sabe sin leer el
+disco si hay una partida para continuar, y continuarla es desempaquetar
+el registro.
+
+Formato (enteros little-endian):
+
+    Cabecera: 'SUDP', version (H), nivel (B), caja (B), milisegundos
+              jugados (Q), casillas (H), crc32 de los datos (I)
+    Datos:    numeros actuales y solucion (1 byte por casilla cada uno,
+              la solucion en 0 si no se conoce) y el mapa de pistas (1 bit
+              por casilla).
+'''
+
+import os
+import struct
+import sys
+import threading
+import zlib
+
+from tablero import Tablero
+
+# Identificador y version del formato.
+MAGICO = b'SUDP'
+VERSION = 1
+
+CABECERA = struct.Struct('<4sHBBQHI')
+
+# Marca que se pone como pendiente para borrar el archivo.
+_BORRAR = object()
+
+
+class Partida:
+
+    '''
+    Clase con lo que hace falta para continuar una partida.
+    '''
+
+    __slots__ = ('tablero', 'nivel', 'caja', 'milisegundos')
+
+    def __init__(self, tablero, nivel, caja, milisegundos):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param Tablero tablero: Tablero con las pistas, los numeros del
+                                jugador y la solucion.
+        :param int nivel: Nivel de dificultad.
+        :param int caja: Casillas por lado de cada cuadrante.
+        :param int milisegundos: Tiempo jugado.
+        '''
+
+        self.tablero = tablero
+        self.nivel = nivel
+        self.caja = caja
+        self.milisegundos = milisegundos
+
+
+def empaquetar(tablero, nivel, caja, milisegundos):
+
+    '''
+    Convierte una partida en un registro.
+
+    param Tablero tablero: Tablero del nivel.
+    param int nivel: Nivel de dificultad.
+    param int caja: Casillas por lado de cada cuadrante.
+    param int milisegundos: Tiempo jugado.
+
+    return bytes: El registro.
+    '''
+
+    casillas = len(tablero.celdas)
+    solucion = tablero.solucion or bytes(casillas)
+    datos = (bytes(tablero.celdas) + solucion
+             + tablero.pistas.to_bytes((casillas + 7) // 8, 'little'))
+    return CABECERA.pack(MAGICO, VERSION, nivel, caja, milisegundos,
+                         casillas, zlib.crc32(datos)) + datos
+
+
+def desempaquetar(registro):
+
+    '''
+    Convierte un registro en una partida.
+
+    param bytes registro: El registro.
+
+    return Partida: La partida.
+
+    raise ValueError: Si el registro no es de este formato o esta danado.
+    '''
+
+    if len(registro) < CABECERA.size:
+        raise ValueError('registro incompleto')
+    magico, version, nivel, caja, milisegundos, casillas, crc = \
+        CABECERA.unpack_from(registro)
+    if magico != MAGICO or version != VERSION:
+        raise ValueError('no es una partida guardada')
+    datos = registro[CABECERA.size:]
+    if (casillas != caja ** 4 or len(datos) != 2 * casillas
+            + (casillas + 7) // 8 or zlib.crc32(datos) != crc):
+        raise ValueError('partida danada')
+
+    solucion = datos[casillas:2 * casillas]
+    tablero = Tablero(datos[:casillas],
+                      int.from_bytes(datos[2 * casillas:], 'little'),
+                      solucion if any(solucion) else None)
+    return Partida(tablero, nivel, caja, milisegundos)
+
+
+class Autoguardado:
+
+    '''
+    Clase que guarda la ultima foto de la partida y el hilo que la escribe
+    en disco.
+    '''
+
+    def __init__(self, ruta):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str ruta: Archivo de la partida guardada, None para no
+                         escribir nada en disco (la ultima foto igual se
+                         guarda en memoria).
+        '''
+
+        self.ruta = ruta
+
+        # Registro de la partida que se puede continuar, None si no hay.
+        self.ultima = None
+
+        # Registro que falta escribir, _BORRAR para borrar el archivo o
+        # None si no falta nada. Si llegan varios antes de que el hilo
+        # escriba, solo se escribe el ultimo.
+        self.pendiente = None
+
+        self.condicion = threading.Condition()
+        self.hilo = threading.Thread(target=self._trabajar,
+                                     name='autoguardado', daemon=True)
+        self.activo = False
+
+    def iniciar(self):
+
+        '''
+        Lee la partida guardada, si hay, y arranca el hilo que escribe.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if self.ruta is None or self.activo:
+            return
+        try:
+            with open(self.ruta, 'rb') as archivo:
+                registro = archivo.read()
+            desempaquetar(registro)
+            self.ultima = registro
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as error:
+            print(f'aviso: no se pudo leer {self.ruta}: {error}',
+                  file=sys.stderr)
+        self.activo = True
+        self.hilo.start()
+
+    def detener(self):
+
+        '''
+        Escribe lo que falte y detiene el hilo. Se llama al cerrar el
+        juego.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if not self.activo:
+            return
+        with self.condicion:
+            self.activo = False
+            self.condicion.notify_all()
+        self.hilo.join()
+
+    def guardar(self, registro):
+
+        '''
+        Pide escribir un registro de empaquetar(). No espera a que se
+        escriba.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param bytes registro: El registro.
+        '''
+
+        with self.condicion:
+            self.ultima = registro
+            if self.ruta is not None:
+                self.pendiente = registro
+                self.condicion.notify_all()
+
+    def borrar(self):
+
+        '''
+        Pide borrar la partida guardada, por ejemplo al terminar el nivel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        with self.condicion:
+            self.ultima = None
+            if self.ruta is not None:
+                self.pendiente = _BORRAR
+                self.condicion.notify_all()
+
+    def hay_partida(self):
+
+        '''
+        Indica si hay una partida para continuar.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return bool: True si hay una partida guardada.
+        '''
+
+        return self.ultima is not None
+
+    def reanudar(self):
+
+        '''
+        Devuelve la partida guardada, desde la memoria.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return Partida: La partida, o None si no hay.
+        '''
+
+        registro = self.ultima
+        return None if registro is None else desempaquetar(registro)
+
+    def _trabajar(self):
+
+        '''
+        Ciclo del hilo: duerme hasta que haya algo pendiente y lo escribe.
+        Al detenerse escribe lo que haya quedado pendiente.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        while True:
+            with self.condicion:
+                while self.activo and self.pendiente is None:
+                    self.condicion.wait()
+                registro, self.pendiente = self.pendiente, None
+                activo = self.activo
+
+            # La escritura se hace sin la condicion tomada, para no
+            # bloquear al juego mientras tanto.
+            if registro is not None:
+                try:
+                    if registro is _BORRAR:
+                        if os.path.exists(self.ruta):
+                            os.remove(self.ruta)
+                    else:
+                        _escribir(self.ruta, registro)
+                except OSError as error:
+                    print(f'aviso: no se pudo guardar {self.ruta}: {error}',
+                          file=sys.stderr)
+            if not activo:
+                return
+
+
+def _escribir(ruta, registro):
+
+    '''
+    Escribe el registro en un archivo temporal y lo pone en lugar del
+    archivo de la partida.
+
+    param str ruta: Archivo de la partida.
+    param bytes registro: El registro.
+    '''
+
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(registro)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
@@ -0,0 +1,313 @@
+'''
+Instrumentacion del juego: tiempos por fase, contadores y trazas.
+
+Por defecto esta apagada y casi no cuesta nada: perfil.fase() devuelve un
+bloque vacio y los contadores se revisan con "if perfil.activo". Al
+activarla se mide cada cuadro del juego (cuanto tardo y cuanto se fue en
+cada fase: eventos, logica, dibujo y voltear la pantalla) y se cuentan
+cosas como los retrocesos del generador o los textos renderizados. Con
+la traza encendida ademas se guarda cada fase como un evento, y al
+terminar se puede exportar en el formato JSON de las trazas de Chrome
+(se abre en chrome://tracing o en https://ui.perfetto.dev).
+
+Este modulo no usa pygame; el panel que muestra los tiempos en la
+pantalla esta en sudoku.py.
+'''
+
+import os
+import time
+
+# Eventos de traza que se guardan como maximo; al llenarse se descartan
+# los mas viejos, asi una sesion larga no se come la memoria.
+MAXIMO_EVENTOS = 500000
+
+# Cuadros que se recuerdan para el promedio y el maximo del panel.
+CUADROS_RECIENTES = 120
+
+
+class _SinMedir:
+
+    '''
+    Bloque vacio que se usa como fase cuando la instrumentacion esta
+    apagada.
+    '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+_SIN_MEDIR = _SinMedir()
+
+
+class _Fase:
+
+    '''
+    Bloque que mide una fase. El tiempo de las fases que se abren dentro
+    de otra se le descuenta a la de afuera, asi cada fase cuenta solo su
+    propio tiempo.
+    '''
+
+    __slots__ = ('perfil', 'nombre', 'inicio', 'hijos')
+
+    def __init__(self, perfil, nombre):
+        self.perfil = perfil
+        self.nombre = nombre
+        self.hijos = 0.0
+
+    def __enter__(self):
+        self.perfil._pila().append(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        fin = time.perf_counter()
+        duracion = fin - self.inicio
+        pila = self.perfil._pila()
+        pila.pop()
+        if pila:
+            pila[-1].hijos += duracion
+        self.perfil._anotar(self.nombre, self.inicio, duracion,
+                            duracion - self.hijos)
+        return False
+
+
+class Perfil:
+
+    '''
+    Clase que junta los tiempos de las fases, los contadores de cada
+    cuadro y, si se pide, la traza de toda la sesion.
+    '''
+
+    def __init__(self):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        # Indica si se esta midiendo y si ademas se guarda la traza.
+        self.activo = False
+        self.trazando = False
+
+        # Resumen del ultimo cuadro y momento en que empezo el actual.
+        self.ultimo = None
+        self.inicio_cuadro = None
+
+        # El resto se prepara en activar().
+        self.fases = None
+        self.contadores = None
+        self.cuadros = None
+        self.eventos = None
+        self.hilos = {}
+
+    def activar(self, trazar=False):
+
+        '''
+        Enciende la instrumentacion. Se debe llamar desde el hilo
+        principal del juego.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param bool trazar: True para guardar tambien la traza.
+        '''
+
+        # collections y threading se importan aqui y no arriba: el nucleo
+        # importa este modulo y debe importarse rapido, y mientras la
+        # instrumentacion esta apagada no hacen falta.
+        import collections
+        import threading
+
+        # Segundos propios de cada fase y contadores del cuadro actual.
+        self.fases = collections.Counter()
+        self.contadores = collections.Counter()
+
+        # Duracion de los ultimos cuadros.
+        self.cuadros = collections.deque(maxlen=CUADROS_RECIENTES)
+
+        # Eventos de la traza, medidos desde este momento.
+        self.eventos = collections.deque(maxlen=MAXIMO_EVENTOS)
+        self.origen = time.perf_counter()
+
+        # Pila de fases abiertas, una por hilo, e identificacion de los
+        # hilos.
+        self.local = threading.local()
+        self.principal = threading.get_ident()
+        self.hilo_actual = threading.get_ident
+        self.nombre_hilo = lambda: threading.current_thread().name
+
+        self.trazando = trazar
+        self.activo = True
+
+    def fase(self, nombre):
+
+        '''
+        Devuelve un bloque que mide una fase:
+
+            with perfil.fase('dibujo'):
+                ...
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre de la fase.
+
+        return: Bloque para usar con with.
+        '''
+
+        if not self.activo:
+            return _SIN_MEDIR
+        return _Fase(self, nombre)
+
+    def contar(self, nombre, cantidad=1):
+
+        '''
+        Suma a un contador del cuadro actual. En los ciclos que corren
+        muchas veces conviene revisar perfil.activo antes de llamarla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre del contador.
+        :param int cantidad: Cantidad a sumar.
+        '''
+
+        if self.activo:
+            self.contadores[nombre] += cantidad
+
+    def empezar_cuadro(self):
+
+        '''
+        Marca el inicio de un cuadro del juego.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if self.activo:
+            self.inicio_cuadro = time.perf_counter()
+
+    def terminar_cuadro(self):
+
+        '''
+        Cierra el cuadro actual: guarda su resumen y deja en cero las fases
+        y los contadores para el siguiente.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if not self.activo or self.inicio_cuadro is None:
+            return
+        fin = time.perf_counter()
+        duracion = fin - self.inicio_cuadro
+        self.cuadros.append(duracion)
+        self.ultimo = {'cuadro': duracion, 'fases': dict(self.fases),
+                       'contadores': dict(self.contadores)}
+
+        if self.trazando:
+            inicio = (self.inicio_cuadro - self.origen) * 1e6
+            self.eventos.append(
+                {'name': 'cuadro', 'cat': 'cuadro', 'ph': 'X',
+                 'ts': inicio, 'dur': duracion * 1e6, 'pid': os.getpid(),
+                 'tid': self.principal})
+            self.eventos.append(
+                {'name': 'contadores', 'ph': 'C', 'ts': inicio,
+                 'pid': os.getpid(), 'tid': self.principal,
+                 'args': dict(self.contadores)})
+
+        self.fases.clear()
+        self.contadores.clear()
+        self.inicio_cuadro = None
+
+    def resumen(self):
+
+        '''
+        Devuelve los datos que muestra el panel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return dict: 'promedio' y 'maximo' de los cuadros recientes y
+                     'cuadro' del ultimo, en segundos, y 'fases' y
+                     'contadores' del ultimo cuadro. None si todavia no
+                     hay cuadros.
+        '''
+
+        if self.ultimo is None:
+            return None
+        return {'promedio': sum(self.cuadros) / len(self.cuadros),
+                'maximo': max(self.cuadros),
+                'cuadro': self.ultimo['cuadro'],
+                'fases': self.ultimo['fases'],
+                'contadores': self.ultimo['contadores']}
+
+    def exportar(self, ruta):
+
+        '''
+        Escribe la traza en el formato JSON de las trazas de Chrome.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str ruta: Archivo de salida.
+
+        return int: Cantidad de eventos escritos.
+        '''
+
+        # json se importa aqui y no arriba: tarda varios milisegundos y el
+        # nucleo, que importa este modulo, debe importarse rapido.
+        import json
+
+        if self.eventos is None:
+            self.eventos = []
+        pid = os.getpid()
+        nombres = [{'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                    'tid': tid, 'args': {'name': nombre}}
+                   for tid, nombre in self.hilos.items()]
+        eventos = list(self.eventos)
+        with open(ruta, 'w') as archivo:
+            json.dump({'traceEvents': nombres + eventos,
+                       'displayTimeUnit': 'ms'}, archivo)
+        return len(eventos)
+
+    def _pila(self):
+
+        '''
+        Devuelve la pila de fases abiertas del hilo actual.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return list: Fases abiertas.
+        '''
+
+        pila = getattr(self.local, 'pila', None)
+        if pila is None:
+            pila = self.local.pila = []
+        return pila
+
+    def _anotar(self, nombre, inicio, duracion, propio):
+
+        '''
+        Guarda una fase terminada.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre de la fase.
+        :param float inicio: Momento en que empezo, de perf_counter().
+        :param float duracion: Segundos que duro, contando las fases de
+                               adentro.
+        :param float propio: Segundos sin contar las fases de adentro.
+        '''
+
+        tid = self.hilo_actual()
+
+        # Los cuadros son del hilo principal; las fases de otros hilos (la
+        # precarga) y las de entre un cuadro y otro (la espera de eventos)
+        # solo van a la traza.
+        if tid == self.principal and self.inicio_cuadro is not None:
+            self.fases[nombre] += propio
+
+        if self.trazando:
+            if tid not in self.hilos:
+                self.hilos[tid] = self.nombre_hilo()
+            self.eventos.append(
+                {'name': nombre, 'cat': 'fase', 'ph': 'X',
+                 'ts': (inicio - self.origen) * 1e6, 'dur': duracion * 1e6,
+                 'pid': os.getpid(), 'tid': tid})
+
+
+# Instrumentacion compartida por todo el juego.
+perfil = Perfil()
@@ -0,0 +1,217 @@
+'''
+Precarga de sudokus en segundo plano.
+
+Un hilo trabajador mantiene, para cada nivel, una pequena cola de sudokus
+listos para jugar. Mientras suena la introduccion del nivel (o mientras el
+jugador esta en el menu) el hilo va generando, y al empezar el nivel el
+sudoku se toma de la cola sin esperar al generador. Cada vez que se toma
+un sudoku el hilo vuelve a llenar la cola.
+
+Los tableros de 16x16 y 25x25 tienen sus propias colas, que se crean la
+primera vez que se pide un sudoku de ese tamano.
+'''
+
+import collections
+import sys
+import threading
+
+from tallado import VACIAS_NIVEL, nuevo_sudoku
+
+
+class Precarga:
+
+    '''
+    Clase que mantiene las colas de sudokus listos y el hilo que las llena.
+    '''
+
+    def __init__(self, tamano=2, banco=None, niveles=VACIAS_NIVEL):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int tamano: Sudokus listos que se guardan de cada nivel.
+        :param Banco banco: Banco de sudokus pregenerados, si hay uno se
+                            leen de ahi los niveles que tenga.
+        :param iterable niveles: Niveles que se precargan.
+        '''
+
+        self.tamano = tamano
+        self.banco = banco
+
+        # Cola de tableros listos de cada nivel.
+        self.listos = {nivel: collections.deque() for nivel in niveles}
+
+        # Nivel que se quiere primero, por ejemplo el que se acaba de
+        # escoger en el menu.
+        self.prioridad = None
+
+        # La condicion protege las colas y despierta al hilo cuando hay
+        # espacio, o al juego cuando hay un sudoku listo.
+        self.condicion = threading.Condition()
+        self.hilo = threading.Thread(target=self._trabajar, name='precarga',
+                                     daemon=True)
+        self.activo = False
+
+    def iniciar(self):
+
+        '''
+        Arranca el hilo trabajador, si no esta corriendo.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if not self.activo:
+            self.activo = True
+            self.hilo.start()
+
+    def detener(self):
+
+        '''
+        Detiene el hilo trabajador despues del sudoku que este generando.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        with self.condicion:
+            self.activo = False
+            self.condicion.notify_all()
+
+    def preparar(self, nivel, caja=3):
+
+        '''
+        Indica que se va a necesitar un sudoku de este nivel, para que el
+        hilo lo genere antes que los de los demas niveles.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int nivel: Nivel de dificultad.
+        :param int caja: Casillas por lado de cada cuadrante.
+        '''
+
+        with self.condicion:
+            self.prioridad = self._clave(nivel, caja)
+            self.condicion.notify_all()
+
+    def tomar(self, nivel, caja=3):
+
+        '''
+        Entrega un sudoku del nivel. Si la cola esta vacia, espera a que el
+        hilo termine el siguiente.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int nivel: Nivel de dificultad.
+        :param int caja: Casillas por lado de cada cuadrante.
+
+        return Tablero: Tablero con las pistas y la solucion.
+        '''
+
+        nivel = self._clave(nivel, caja)
+        with self.condicion:
+            self.prioridad = nivel
+            self.condicion.notify_all()
+            while self.activo and not self.listos[nivel]:
+                self.condicion.wait()
+            if self.listos[nivel]:
+                sudoku = self.listos[nivel].popleft()
+
+                # Avisa al hilo que hay espacio para volver a llenar la cola.
+                self.condicion.notify_all()
+                return sudoku
+
+        # Sin hilo no hay quien llene la cola, se genera aqui mismo.
+        return self._crear(nivel)
+
+    def _clave(self, nivel, caja):
+
+        '''
+        Devuelve la llave de la cola de un nivel y tamano, y crea la cola si
+        es la primera vez que se pide. La condicion es reentrante, asi que
+        se puede llamar con ella tomada.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int nivel: Nivel de dificultad.
+        :param int caja: Casillas por lado de cada cuadrante.
+
+        return: El nivel en el tablero de 9x9, (nivel, caja) en los demas.
+        '''
+
+        if caja == 3:
+            return nivel
+        clave = (nivel, caja)
+        with self.condicion:
+            self.listos.setdefault(clave, collections.deque())
+        return clave
+
+    def _crear(self, nivel):
+
+        '''
+        Lee un sudoku del banco o, si no hay, lo genera y lo talla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param nivel: Nivel de dificultad, o (nivel, caja) en los tableros
+                      que no son de 9x9.
+
+        return Tablero: Tablero con las pistas y la solucion.
+        '''
+
+        if isinstance(nivel, tuple):
+            return nuevo_sudoku(nivel[0], caja=nivel[1])
+        if self.banco is not None and self.banco.cantidad(nivel):
+            return self.banco.aleatorio(nivel)
+        return nuevo_sudoku(nivel)
+
+    def _siguiente(self):
+
+        '''
+        Escoge el nivel que le falta un sudoku, empezando por el nivel
+        con prioridad. Se llama con la condicion tomada.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return int: Nivel a generar, o None si todas las colas estan llenas.
+        '''
+
+        if (self.prioridad in self.listos
+                and len(self.listos[self.prioridad]) < self.tamano):
+            return self.prioridad
+        for nivel, cola in self.listos.items():
+            if len(cola) < self.tamano:
+                return nivel
+        return None
+
+    def _trabajar(self):
+
+        '''
+        Ciclo del hilo trabajador: genera sudokus mientras haya espacio en
+        alguna cola y duerme cuando todas estan llenas. Se detiene si no
+        puede crear un sudoku.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        while True:
+            with self.condicion:
+                nivel = self._siguiente()
+                while self.activo and nivel is None:
+                    self.condicion.wait()
+                    nivel = self._siguiente()
+                if not self.activo:
+                    return
+
+            # La generacion se hace sin la condicion tomada, para no
+            # bloquear al juego mientras tanto. Si falla (por ejemplo, un
+            # banco danado), el hilo se detiene y avisa, asi tomar() deja
+            # de esperarlo y genera el sudoku por su cuenta.
+            try:
+                sudoku = self._crear(nivel)
+            except Exception as error:
+                print(f'aviso: la precarga se detuvo: {error!r}',
+                      file=sys.stderr)
+                with self.condicion:
+                    self.activo = False
+                    self.condicion.notify_all()
+                return
+
+            with self.condicion:
+                self.listos[nivel].append(sudoku)
+                self.condicion.notify_all()
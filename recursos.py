@@ -0,0 +1,270 @@
+'''
+Carga de los recursos graficos y de sonido del juego.
+
+Las imagenes, fuentes y sonidos se cargan la primera vez que se piden y se
+guardan para las siguientes. Las imagenes se convierten al formato de
+pixeles de la pantalla (y se escalan una sola vez, si se pide un tamano),
+asi copiarlas a la pantalla en cada cuadro es rapido. Los sonidos se pueden
+decodificar en un hilo aparte mientras se muestra el menu.
+
+Si falta un archivo el juego no se cae: se avisa una vez por la salida de
+errores, las imagenes se reemplazan por un rectangulo de relleno y los
+sonidos y la musica simplemente no suenan.
+'''
+
+import concurrent.futures
+import importlib.util
+import os
+import sys
+
+
+def importar_al_usarse(nombre):
+
+    '''
+    Importa un modulo de manera perezosa: el modulo se carga de verdad la
+    primera vez que se usa alguno de sus atributos. Asi importar sudoku.py
+    (por ejemplo para usar las funciones del nucleo) no carga pygame; solo
+    se carga cuando se abre la ventana del juego.
+
+    param str nombre: Nombre del modulo.
+
+    return module: El modulo, todavia sin cargar.
+    '''
+
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    spec = importlib.util.find_spec(nombre)
+    cargador = importlib.util.LazyLoader(spec.loader)
+    spec.loader = cargador
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    cargador.exec_module(modulo)
+    return modulo
+
+
+pygame = importar_al_usarse('pygame')
+
+# Color de relleno de las imagenes que no se encuentran.
+COLOR_FALTANTE = (40, 40, 40)
+
+
+class Recursos:
+
+    '''
+    Clase que carga y guarda las imagenes, fuentes y sonidos del juego.
+    '''
+
+    def __init__(self, carpeta='.'):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str carpeta: Carpeta donde estan los archivos.
+        '''
+
+        self.carpeta = carpeta
+
+        # Recursos ya cargados, por nombre de archivo (y tamano).
+        self.imagenes = {}
+        self.fuentes = {}
+        self.sonidos = {}
+
+        # Sonidos que se estan decodificando en segundo plano.
+        self.pendientes = {}
+        self.hilos = None
+
+        # Indica si la musica de fondo se pudo cargar.
+        self.hay_musica = False
+
+        # Archivos faltantes de los que ya se aviso.
+        self.faltantes = set()
+
+    def _ruta(self, nombre):
+
+        '''
+        Devuelve la ruta de un archivo, o None si no existe (avisando una
+        sola vez).
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre del archivo.
+
+        return str: Ruta del archivo, o None.
+        '''
+
+        ruta = os.path.join(self.carpeta, nombre)
+        if os.path.exists(ruta):
+            return ruta
+        if nombre not in self.faltantes:
+            self.faltantes.add(nombre)
+            print(f'aviso: no se encontro {ruta}', file=sys.stderr)
+        return None
+
+    def imagen(self, nombre, tamano=None, alfa=False):
+
+        '''
+        Devuelve una imagen convertida al formato de la pantalla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre del archivo.
+        :param tuple tamano: (ancho, alto) al que se escala la imagen, None
+                             para dejarla de su tamano.
+        :param bool alfa: True si la imagen tiene transparencia.
+
+        return pygame.surface.Surface: La imagen, o un rectangulo de relleno
+                                       si el archivo no existe.
+        '''
+
+        clave = (nombre, tamano)
+        imagen = self.imagenes.get(clave)
+        if imagen is not None:
+            return imagen
+
+        ruta = self._ruta(nombre)
+        if ruta is None:
+            imagen = pygame.Surface(tamano or (1, 1))
+            imagen.fill(COLOR_FALTANTE)
+        else:
+            imagen = pygame.image.load(ruta)
+
+        # Convertir necesita que la pantalla ya este creada.
+        if pygame.display.get_surface() is not None:
+            imagen = imagen.convert_alpha() if alfa else imagen.convert()
+        if tamano is not None and imagen.get_size() != tamano:
+            imagen = pygame.transform.scale(imagen, tamano)
+
+        self.imagenes[clave] = imagen
+        return imagen
+
+    def fuente(self, nombre, tamano):
+
+        '''
+        Devuelve una fuente de letra.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre del archivo de la fuente.
+        :param int tamano: Tamano de la letra.
+
+        return pygame.font.Font: La fuente, o la fuente por defecto de
+                                 pygame si el archivo no existe.
+        '''
+
+        clave = (nombre, tamano)
+        fuente = self.fuentes.get(clave)
+        if fuente is None:
+            fuente = pygame.font.Font(self._ruta(nombre), tamano)
+            self.fuentes[clave] = fuente
+        return fuente
+
+    def _cargar_sonido(self, nombre):
+
+        '''
+        Decodifica un sonido.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre del archivo.
+
+        return pygame.mixer.Sound: El sonido, o None si no se pudo cargar.
+        '''
+
+        ruta = self._ruta(nombre)
+        if ruta is None or not pygame.mixer.get_init():
+            return None
+        try:
+            return pygame.mixer.Sound(ruta)
+        except pygame.error as error:
+            print(f'aviso: no se pudo cargar {ruta}: {error}', file=sys.stderr)
+            return None
+
+    def precargar_sonidos(self, nombres):
+
+        '''
+        Empieza a decodificar sonidos en un hilo aparte. pygame suelta el
+        GIL mientras decodifica, asi que el menu sigue respondiendo.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param iterable nombres: Nombres de los archivos.
+        '''
+
+        if self.hilos is None:
+            self.hilos = concurrent.futures.ThreadPoolExecutor(1)
+        for nombre in nombres:
+            if nombre not in self.sonidos and nombre not in self.pendientes:
+                self.pendientes[nombre] = self.hilos.submit(
+                    self._cargar_sonido, nombre)
+
+    def sonido(self, nombre):
+
+        '''
+        Devuelve un sonido. Si se esta decodificando en segundo plano,
+        espera a que termine; si no se habia pedido, lo carga aqui mismo.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre del archivo.
+
+        return pygame.mixer.Sound: El sonido, o None si no se pudo cargar.
+        '''
+
+        if nombre not in self.sonidos:
+            pendiente = self.pendientes.pop(nombre, None)
+            if pendiente is not None:
+                self.sonidos[nombre] = pendiente.result()
+            else:
+                self.sonidos[nombre] = self._cargar_sonido(nombre)
+        return self.sonidos[nombre]
+
+    def cargar_musica(self, nombre):
+
+        '''
+        Carga la musica de fondo. Si no existe, el juego sigue sin musica.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str nombre: Nombre del archivo.
+
+        return bool: True si la musica se pudo cargar.
+        '''
+
+        ruta = self._ruta(nombre)
+        self.hay_musica = False
+        if ruta is not None and pygame.mixer.get_init():
+            try:
+                pygame.mixer.music.load(ruta)
+                self.hay_musica = True
+            except pygame.error as error:
+                print(f'aviso: no se pudo cargar {ruta}: {error}',
+                      file=sys.stderr)
+        return self.hay_musica
+
+    def tocar_musica(self):
+
+        '''
+        Reproduce la musica de fondo en un bucle infinito, si hay.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if self.hay_musica and pygame.mixer.get_init():
+            pygame.mixer.music.play(-1)
+
+    def detener_musica(self):
+
+        '''
+        Detiene la musica de fondo, si hay.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if self.hay_musica and pygame.mixer.get_init():
+            pygame.mixer.music.stop()
+
+    def cerrar(self):
+
+        '''
+        Detiene el hilo de los sonidos.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if self.hilos is not None:
+            self.hilos.shutdown(wait=False, cancel_futures=True)
+            self.hilos = None
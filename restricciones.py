@@ -0,0 +1,588 @@
+'''
+Motor de restricciones del sudoku.
+
+En lugar de recorrer la fila, la columna y el cuadrante completos cada
+vez que se quiere saber si un numero puede ir en una casilla (como hace
+verificar()), este modulo mantiene tres listas de mascaras de bits: una
+por fila, una por columna y una por cuadrante. El bit k de cada mascara
+indica si el numero k ya esta usado. Asi, revisar si un numero es valido
+o pedir los candidatos de una casilla cuesta O(1).
+'''
+
+import math
+import time
+
+from geometria import geometria
+
+# Mascara con los bits del 1 al 9 encendidos (el bit 0 no se usa).
+TODOS = 0b1111111110
+
+# Tabla que indica a que cuadrante pertenece cada casilla (fila, columna).
+CAJA = [[(i // 3) * 3 + j // 3 for j in range(9)] for i in range(9)]
+
+# Tabla que traduce cada mascara posible a la lista de numeros que
+# contiene, para no tener que recorrer los bits cada vez.
+NUMEROS_MASCARA = [[k for k in range(1, 10) if m & (1 << k)]
+                   for m in range(TODOS + 1)]
+
+# Cantidad de bits encendidos de cada mascara posible.
+CUENTA_BITS = [len(numeros) for numeros in NUMEROS_MASCARA]
+
+# Para cada casilla k = fila * 9 + columna, las 20 casillas que comparten
+# con ella fila, columna o cuadrante.
+VECINAS = [[v for v in range(81) if v != k and (
+    v // 9 == k // 9 or v % 9 == k % 9
+    or CAJA[v // 9][v % 9] == CAJA[k // 9][k % 9])] for k in range(81)]
+
+
+class Restricciones:
+
+    '''
+    Clase que lleva la cuenta de los numeros usados en cada fila, columna
+    y cuadrante del sudoku mediante mascaras de bits.
+    '''
+
+    __slots__ = ('filas', 'columnas', 'cajas')
+
+    def __init__(self, sudoku=None):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param list sudoku: Lista de 9 listas con los numeros ya colocados,
+                            0 para las casillas vacias. Es opcional.
+        '''
+
+        # Numeros usados en cada fila, columna y cuadrante.
+        self.filas = [0] * 9
+        self.columnas = [0] * 9
+        self.cajas = [0] * 9
+
+        # Registra los numeros que ya esten en el sudoku.
+        if sudoku is not None:
+            for i in range(9):
+                for j in range(9):
+                    if sudoku[i][j]:
+                        self.colocar(i, j, sudoku[i][j])
+
+    def colocar(self, fila, columna, numero):
+
+        '''
+        Marca un numero como usado en su fila, columna y cuadrante.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+        :param int numero: Numero colocado en la casilla.
+        '''
+
+        bit = 1 << numero
+        self.filas[fila] |= bit
+        self.columnas[columna] |= bit
+        self.cajas[CAJA[fila][columna]] |= bit
+
+    def quitar(self, fila, columna, numero):
+
+        '''
+        Libera un numero de su fila, columna y cuadrante.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+        :param int numero: Numero que se quita de la casilla.
+        '''
+
+        bit = ~(1 << numero)
+        self.filas[fila] &= bit
+        self.columnas[columna] &= bit
+        self.cajas[CAJA[fila][columna]] &= bit
+
+    def mascara(self, fila, columna):
+
+        '''
+        Calcula la mascara de numeros que todavia caben en la casilla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+
+        return int: Mascara con un bit encendido por cada candidato.
+        '''
+
+        return TODOS & ~(self.filas[fila] | self.columnas[columna]
+                         | self.cajas[CAJA[fila][columna]])
+
+    def es_valido(self, fila, columna, numero):
+
+        '''
+        Equivalente en O(1) de la funcion verificar().
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+        :param int numero: Numero que se quiere colocar.
+
+        return bool True: Si el numero no esta en la fila, columna
+                          ni cuadrante.
+        return bool False: Si el numero ya esta usado.
+        '''
+
+        return not ((self.filas[fila] | self.columnas[columna]
+                     | self.cajas[CAJA[fila][columna]]) & (1 << numero))
+
+    def candidatos(self, fila, columna):
+
+        '''
+        Devuelve los numeros que todavia caben en la casilla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+
+        return list: Numeros validos en orden ascendente.
+        '''
+
+        return NUMEROS_MASCARA[self.mascara(fila, columna)]
+
+
+class Conteo:
+
+    '''
+    Clase que cuenta cuantas veces aparece cada numero en cada fila,
+    columna y cuadrante de un sudoku que se esta llenando. A diferencia de
+    las mascaras de Restricciones, los contadores permiten numeros
+    repetidos, asi que sirven para seguir lo que escribe el jugador: cada
+    numero que se escribe o se borra cuesta O(1), y en todo momento se sabe
+    cuantas casillas estan llenas y cuantas repeticiones hay.
+    '''
+
+    __slots__ = ('lado', 'base', 'todos', 'caja', 'filas', 'columnas',
+                 'cajas', 'usados_filas', 'usados_columnas', 'usados_cajas',
+                 'llenas', 'repetidos')
+
+    def __init__(self, celdas=None, caja=3):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param bytes celdas: Los numeros del sudoku por filas, 0 para las
+                             casillas vacias. Es opcional.
+        :param int caja: Casillas por lado de cada cuadrante, 3 para el
+                         sudoku de 9x9.
+        '''
+
+        # Medidas del sudoku; el de 9x9 usa las tablas fijas del modulo.
+        lado = caja * caja
+        self.lado = lado
+        self.base = lado + 1
+        if caja == 3:
+            self.todos = TODOS
+            self.caja = CAJA
+        else:
+            tablas = geometria(caja)
+            self.todos = tablas.todos
+            self.caja = [tablas.cuadrante[f * lado:(f + 1) * lado]
+                         for f in range(lado)]
+
+        # Veces que aparece cada numero, la cuenta del numero n en la
+        # fila f esta en filas[f * base + n]; igual para columnas y cajas.
+        self.filas = [0] * (lado * self.base)
+        self.columnas = [0] * (lado * self.base)
+        self.cajas = [0] * (lado * self.base)
+
+        # Mascaras de los numeros que aparecen al menos una vez en cada
+        # fila, columna y cuadrante, como en Restricciones.
+        self.usados_filas = [0] * lado
+        self.usados_columnas = [0] * lado
+        self.usados_cajas = [0] * lado
+
+        # Casillas con numero.
+        self.llenas = 0
+
+        # Suma, en todas las filas, columnas y cuadrantes, de las veces que
+        # un numero aparece de mas. Es 0 si no hay ningun conflicto.
+        self.repetidos = 0
+
+        if celdas is not None:
+            for k, numero in enumerate(celdas):
+                if numero:
+                    self.colocar(k // lado, k % lado, numero)
+
+    def colocar(self, fila, columna, numero):
+
+        '''
+        Cuenta un numero escrito en una casilla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+        :param int numero: Numero escrito en la casilla.
+        '''
+
+        self.llenas += 1
+        bit = 1 << numero
+        base = self.base
+        caja = self.caja[fila][columna]
+        for cuenta, usados, u in ((self.filas, self.usados_filas, fila),
+                                  (self.columnas, self.usados_columnas,
+                                   columna),
+                                  (self.cajas, self.usados_cajas, caja)):
+            k = u * base + numero
+            if cuenta[k]:
+                self.repetidos += 1
+            else:
+                usados[u] |= bit
+            cuenta[k] += 1
+
+    def quitar(self, fila, columna, numero):
+
+        '''
+        Descuenta un numero borrado de una casilla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+        :param int numero: Numero que estaba en la casilla.
+        '''
+
+        self.llenas -= 1
+        bit = ~(1 << numero)
+        base = self.base
+        caja = self.caja[fila][columna]
+        for cuenta, usados, u in ((self.filas, self.usados_filas, fila),
+                                  (self.columnas, self.usados_columnas,
+                                   columna),
+                                  (self.cajas, self.usados_cajas, caja)):
+            k = u * base + numero
+            cuenta[k] -= 1
+            if cuenta[k]:
+                self.repetidos -= 1
+            else:
+                usados[u] &= bit
+
+    def candidatos(self, fila, columna):
+
+        '''
+        Calcula la mascara de numeros que no aparecen en la fila, columna
+        ni cuadrante de la casilla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+
+        return int: Mascara con un bit encendido por cada candidato.
+        '''
+
+        return self.todos & ~(self.usados_filas[fila]
+                              | self.usados_columnas[columna]
+                              | self.usados_cajas[self.caja[fila][columna]])
+
+    def en_conflicto(self, fila, columna, numero):
+
+        '''
+        Indica si el numero de una casilla se repite en su fila, columna o
+        cuadrante.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fila: Fila de la casilla.
+        :param int columna: Columna de la casilla.
+        :param int numero: Numero que esta en la casilla.
+
+        return bool: True si el numero se repite.
+        '''
+
+        base = self.base
+        return (self.filas[fila * base + numero] > 1
+                or self.columnas[columna * base + numero] > 1
+                or self.cajas[self.caja[fila][columna] * base + numero] > 1)
+
+    def resuelto(self):
+
+        '''
+        Indica si el sudoku esta lleno y sin numeros repetidos, es decir,
+        si es una solucion valida (sea o no la solucion que se genero).
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return bool: True si el sudoku esta resuelto.
+        '''
+
+        return self.llenas == self.lado * self.lado and not self.repetidos
+
+
+class Notas:
+
+    '''
+    Clase que mantiene las notas (los candidatos) de cada casilla vacia de
+    un sudoku que se esta llenando. Al escribir o borrar un numero solo
+    pueden cambiar las notas de esa casilla y de sus 20 vecinas, asi que
+    solo esas se vuelven a calcular, cada una en O(1) con las mascaras de
+    un Conteo. Sirve para cualquier tamano de sudoku, el del Conteo.
+    '''
+
+    __slots__ = ('conteo', 'celdas', 'lado', 'vecinas', 'mascaras',
+                 'visibles')
+
+    def __init__(self, conteo, celdas):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param Conteo conteo: Contadores de los numeros del sudoku.
+        :param bytearray celdas: Los numeros del sudoku por filas; se
+                                 guarda la referencia, no una copia.
+        '''
+
+        self.conteo = conteo
+        self.celdas = celdas
+        self.lado = conteo.lado
+        if self.lado == 9:
+            self.vecinas = VECINAS
+        else:
+            self.vecinas = geometria(math.isqrt(self.lado)).vecinas
+
+        # Mascara de candidatos de cada casilla, 0 si la casilla tiene
+        # numero.
+        self.mascaras = [0] * len(celdas)
+        for k in range(len(celdas)):
+            self._calcular(k)
+
+        # Indica si el jugador quiere ver las notas en pantalla.
+        self.visibles = False
+
+    def _calcular(self, k):
+
+        '''
+        Vuelve a calcular las notas de una casilla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int k: Casilla, fila * lado + columna.
+
+        return bool: True si las notas cambiaron.
+        '''
+
+        if self.celdas[k]:
+            mascara = 0
+        else:
+            mascara = self.conteo.candidatos(k // self.lado, k % self.lado)
+        if mascara != self.mascaras[k]:
+            self.mascaras[k] = mascara
+            return True
+        return False
+
+    def actualizar(self, k):
+
+        '''
+        Actualiza las notas despues de escribir o borrar el numero de una
+        casilla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int k: Casilla que cambio.
+
+        return list: Casillas cuyas notas cambiaron.
+        '''
+
+        cambios = [k] if self._calcular(k) else []
+        for v in self.vecinas[k]:
+            if self._calcular(v):
+                cambios.append(v)
+        return cambios
+
+
+def contar_soluciones(sudoku, limite=2, hasta=None):
+
+    '''
+    Cuenta las soluciones de un sudoku, deteniendose en cuanto se llega al
+    limite. Con limite=2 sirve para saber si la solucion es unica sin tener
+    que recorrer todo el arbol de busqueda.
+
+    param list sudoku: Lista de 9 listas con los numeros del sudoku,
+                       0 para las casillas vacias.
+    param int limite: Cantidad de soluciones a partir de la cual se deja
+                      de buscar.
+    param float hasta: Momento, de time.perf_counter(), en que se abandona
+                       la busqueda. None para no tener limite.
+
+    return int: Cantidad de soluciones encontradas, como maximo limite, o
+                None si se abandono la busqueda.
+    '''
+
+    restricciones = Restricciones()
+
+    # Registra las pistas; si alguna se repite el sudoku no tiene solucion.
+    for i in range(9):
+        for j in range(9):
+            numero = sudoku[i][j]
+            if numero:
+                if not restricciones.es_valido(i, j, numero):
+                    return 0
+                restricciones.colocar(i, j, numero)
+
+    vacias = [(i, j) for i in range(9) for j in range(9) if not sudoku[i][j]]
+    if hasta is None:
+        return _contar(restricciones, vacias, limite)
+    try:
+        return _contar(restricciones, vacias, limite, [hasta, 0])
+    except TimeoutError:
+        return None
+
+
+def _contar(restricciones, vacias, limite, reloj=None):
+
+    '''
+    Busqueda recursiva de contar_soluciones(). En cada paso elige la
+    casilla vacia con menos candidatos (la mas restringida), lo que poda
+    el arbol mucho antes que recorrer las casillas en orden.
+
+    param Restricciones restricciones: Mascaras de los numeros usados.
+    param list vacias: Casillas (fila, columna) que faltan por llenar.
+    param int limite: Soluciones que faltan para detener la busqueda.
+    param list reloj: [hasta, pasos] para abandonar la busqueda al pasar
+                      el momento hasta, None para no tener limite.
+
+    return int: Cantidad de soluciones encontradas, como maximo limite.
+
+    raise TimeoutError: Si se paso el momento limite del reloj.
+    '''
+
+    if not vacias:
+        return 1
+
+    # El reloj solo se revisa cada 256 pasos; leerlo en cada uno costaria
+    # casi tanto como el paso.
+    if reloj is not None:
+        reloj[1] += 1
+        if reloj[1] % 256 == 0 and time.perf_counter() > reloj[0]:
+            raise TimeoutError
+
+    # Busca la casilla con menos candidatos.
+    mejor = 0
+    mejor_mascara = 0
+    menor = 10
+    for indice, (i, j) in enumerate(vacias):
+        mascara = restricciones.mascara(i, j)
+        cantidad = CUENTA_BITS[mascara]
+        if cantidad < menor:
+            if cantidad == 0:
+                return 0
+            mejor, mejor_mascara, menor = indice, mascara, cantidad
+            if cantidad == 1:
+                break
+
+    # Saca la casilla elegida de la lista cambiandola por la ultima,
+    # asi no hay que copiar la lista en cada nivel de la recursion.
+    vacias[mejor], vacias[-1] = vacias[-1], vacias[mejor]
+    i, j = vacias.pop()
+
+    total = 0
+    for numero in NUMEROS_MASCARA[mejor_mascara]:
+        restricciones.colocar(i, j, numero)
+        total += _contar(restricciones, vacias, limite - total, reloj)
+        restricciones.quitar(i, j, numero)
+        if total >= limite:
+            break
+
+    # Devuelve la casilla a la lista para el nivel anterior.
+    vacias.append((i, j))
+    vacias[mejor], vacias[-1] = vacias[-1], vacias[mejor]
+    return total
+
+
+def contar_soluciones_celdas(celdas, tablas, limite=2, hasta=None):
+
+    '''
+    Version de contar_soluciones() para sudokus de cualquier tamano, con
+    las casillas en una sola secuencia por filas. Como en los tableros
+    grandes una busqueda puede tardar mucho, se puede dar un momento
+    limite: si se pasa, la busqueda se abandona.
+
+    param bytes celdas: Los numeros del sudoku por filas, 0 para las
+                        casillas vacias.
+    param Geometria tablas: Tablas del tamano del sudoku.
+    param int limite: Cantidad de soluciones a partir de la cual se deja
+                      de buscar.
+    param float hasta: Momento, de time.perf_counter(), en que se abandona
+                       la busqueda. None para no tener limite.
+
+    return int: Cantidad de soluciones encontradas, como maximo limite, o
+                None si se abandono la busqueda.
+    '''
+
+    lado = tablas.lado
+    todos = tablas.todos
+    fila = tablas.fila
+    columna = tablas.columna
+    cuadrante = tablas.cuadrante
+
+    filas = [0] * lado
+    columnas = [0] * lado
+    cajas = [0] * lado
+
+    # Registra las pistas; si alguna se repite el sudoku no tiene solucion.
+    vacias = []
+    for k, numero in enumerate(celdas):
+        if not numero:
+            vacias.append(k)
+            continue
+        bit = 1 << numero
+        if (filas[fila[k]] | columnas[columna[k]] | cajas[cuadrante[k]]) & bit:
+            return 0
+        filas[fila[k]] |= bit
+        columnas[columna[k]] |= bit
+        cajas[cuadrante[k]] |= bit
+
+    # Pasos de la busqueda, para revisar el reloj solo de vez en cuando.
+    pasos = [0]
+
+    def contar(faltan):
+
+        # Igual que _contar(): escoge la casilla con menos candidatos.
+        if not vacias:
+            return 1
+
+        pasos[0] += 1
+        if hasta is not None and pasos[0] % 256 == 0 \
+                and time.perf_counter() > hasta:
+            raise TimeoutError
+
+        mejor = 0
+        mejor_mascara = 0
+        menor = lado + 1
+        for indice, k in enumerate(vacias):
+            mascara = todos & ~(filas[fila[k]] | columnas[columna[k]]
+                                | cajas[cuadrante[k]])
+            cantidad = mascara.bit_count()
+            if cantidad < menor:
+                if cantidad == 0:
+                    return 0
+                mejor, mejor_mascara, menor = indice, mascara, cantidad
+                if cantidad == 1:
+                    break
+
+        vacias[mejor], vacias[-1] = vacias[-1], vacias[mejor]
+        k = vacias.pop()
+        f, c, b = fila[k], columna[k], cuadrante[k]
+
+        total = 0
+        while mejor_mascara and total < faltan:
+            bit = mejor_mascara & -mejor_mascara
+            mejor_mascara ^= bit
+            filas[f] |= bit
+            columnas[c] |= bit
+            cajas[b] |= bit
+            total += contar(faltan - total)
+            filas[f] &= ~bit
+            columnas[c] &= ~bit
+            cajas[b] &= ~bit
+
+        vacias.append(k)
+        vacias[mejor], vacias[-1] = vacias[-1], vacias[mejor]
+        return total
+
+    try:
+        return contar(limite)
+    except TimeoutError:
+        return None
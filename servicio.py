@@ -0,0 +1,584 @@
+#!/usr/bin/python3
+
+'''
+Servicio local de sudokus por HTTP/JSON.
+
+Varios clientes (el juego, lote.py, herramientas de prueba) pueden pedirle
+sudokus al mismo servicio en lugar de generarlos cada uno. Rutas, por GET
+con los parametros en la URL o por POST con un objeto JSON:
+
+    /generar    nivel (1-3), semilla (opcional), caja (3, 4 o 5; 3 por
+                defecto): sudoku y solucion como texto, con la semilla
+                usada. La misma semilla da siempre el mismo sudoku de 9x9.
+    /resolver   sudoku (81 caracteres, '0' o '.' para las vacias): la
+                solucion, o null si no tiene.
+    /contar     sudoku, limite (2 por defecto): cantidad de soluciones,
+                como maximo limite.
+    /validar    tableros (lista de tableros completos): si cada uno esta
+                bien y, si no, la primera fila, columna o cuadrante que
+                falla.
+    /estado     cola, procesos y cuentas del servicio.
+
+El trabajo pesado se hace en un grupo de procesos que se calientan al
+arrancar (ya importaron los modulos y generaron un sudoku). Las
+solicitudes esperan en una cola de tamano fijo; un repartidor las saca
+en lotes (mas grandes mientras mas se acumulan) y le pasa cada lote a un
+proceso, con un maximo de lotes en vuelo por proceso. Si los procesos no
+dan abasto la cola se llena y las solicitudes nuevas se rechazan en el
+momento con 503 y Retry-After, en lugar de acumularse sin limite.
+
+Ejemplo:
+    python servicio.py --puerto 8765
+    curl 'http://127.0.0.1:8765/generar?nivel=2&semilla=7'
+
+Uso: python servicio.py [--host 127.0.0.1] [--puerto 8765] [-j procesos]
+                        [--cola 256] [--lote 16]
+'''
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import math
+import os
+import random
+import signal
+import urllib.parse
+
+import dlx
+import validador
+from geometria import CAJAS
+from tablero import Tablero, a_texto
+from tallado import PRESUPUESTO, VACIAS_NIVEL, nuevo_sudoku
+
+HOST = '127.0.0.1'
+PUERTO = 8765
+
+# Solicitudes que pueden esperar en la cola; con la cola llena se
+# responde 503.
+COLA = 256
+
+# Trabajos por lote como maximo.
+LOTE = 16
+
+# Lotes que puede tener cada proceso a la vez: uno trabajando y otro
+# esperando, para que el proceso no se quede sin trabajo entre lote y lote.
+LOTES_POR_PROCESO = 2
+
+# Bytes maximos del cuerpo de una solicitud.
+MAXIMO_CUERPO = 4 * 1024 * 1024
+
+# Limite maximo de /contar; un sudoku con pocas pistas tiene millones de
+# soluciones.
+LIMITE_CONTAR = 1000
+
+# Parametros de la URL que son numeros enteros; los demas (como el sudoku,
+# que puede ser solo digitos) se dejan como texto.
+ENTEROS = ('nivel', 'semilla', 'caja', 'limite')
+
+RAZONES = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _leer_sudoku(texto):
+
+    '''
+    Convierte un sudoku de 9x9 en texto en una lista de 9 listas.
+
+    param str texto: 81 caracteres, '0' o '.' para las casillas vacias.
+
+    return list: Lista de 9 listas.
+    '''
+
+    if (not isinstance(texto, str) or len(texto) != 81
+            or not set(texto) <= set('.0123456789')):
+        raise ValueError('el sudoku debe tener 81 caracteres entre 0 y 9')
+    return Tablero.de_texto(texto).a_listas()
+
+
+def generar(nivel=1, semilla=None, caja=3):
+
+    '''
+    Genera y talla un sudoku. Los de 9x9 se tallan sin limite de tiempo,
+    para que la semilla siempre de el mismo sudoku; los grandes con el
+    presupuesto del juego.
+
+    param int nivel: 1 para principiante, 2 para intermedio y 3 para
+                     avanzado.
+    param int semilla: Semilla, None para una al azar.
+    param int caja: Casillas por lado de cada cuadrante.
+
+    return dict: nivel, semilla, caja, sudoku y solucion.
+    '''
+
+    if nivel not in VACIAS_NIVEL:
+        raise ValueError(f'nivel debe ser uno de {sorted(VACIAS_NIVEL)}')
+    if caja not in CAJAS:
+        raise ValueError(f'caja debe ser una de {list(CAJAS)}')
+    if semilla is None:
+        semilla = random.randrange(1 << 32)
+    elif not isinstance(semilla, int):
+        raise ValueError('semilla debe ser un entero')
+
+    presupuesto = None if caja == 3 else PRESUPUESTO
+    tablero = nuevo_sudoku(nivel, semilla, presupuesto, caja)
+    return {'nivel': nivel, 'semilla': semilla, 'caja': caja,
+            'sudoku': tablero.a_texto(),
+            'solucion': a_texto(tablero.solucion)}
+
+
+def resolver(sudoku):
+
+    '''
+    Resuelve un sudoku de 9x9.
+
+    param str sudoku: 81 caracteres, '0' o '.' para las casillas vacias.
+
+    return dict: solucion como texto, None si no tiene.
+    '''
+
+    solucion = dlx.resolver(_leer_sudoku(sudoku))
+    if solucion is None:
+        return {'solucion': None}
+    return {'solucion': a_texto(bytes(sum(solucion, [])))}
+
+
+def contar(sudoku, limite=2):
+
+    '''
+    Cuenta las soluciones de un sudoku de 9x9.
+
+    param str sudoku: 81 caracteres, '0' o '.' para las casillas vacias.
+    param int limite: Cantidad de soluciones a partir de la cual se deja
+                      de buscar.
+
+    return dict: soluciones, como maximo limite.
+    '''
+
+    if not isinstance(limite, int) or not 1 <= limite <= LIMITE_CONTAR:
+        raise ValueError(f'limite debe estar entre 1 y {LIMITE_CONTAR}')
+    return {'soluciones': dlx.contar(_leer_sudoku(sudoku), limite)}
+
+
+def validar(tableros):
+
+    '''
+    Revisa tableros completos con validador.validar_lote().
+
+    param list tableros: Tableros como texto, todos del mismo tamano.
+
+    return dict: validos (lista de bool) y errores (la primera unidad que
+                 falla en cada tablero, None en los que estan bien).
+    '''
+
+    if not isinstance(tableros, list) or not all(
+            isinstance(tablero, str) for tablero in tableros):
+        raise ValueError('tableros debe ser una lista de textos')
+    if not tableros:
+        return {'validos': [], 'errores': []}
+
+    celdas = len(tableros[0])
+    caja = math.isqrt(math.isqrt(celdas))
+    if caja not in CAJAS or caja ** 4 != celdas or any(
+            len(tablero) != celdas for tablero in tableros):
+        raise ValueError('los tableros deben tener 81, 256 o 625 '
+                         'caracteres, todos la misma cantidad')
+
+    validos, primera = validador.validar_lote(
+        [Tablero.de_texto(tablero).celdas for tablero in tableros])
+    return {'validos': [bool(valido) for valido in validos],
+            'errores': [None if unidad < 0
+                        else validador.describir(int(unidad), caja)
+                        for unidad in primera]}
+
+
+# Operaciones que atienden los procesos, por ruta.
+OPERACIONES = {'generar': generar, 'resolver': resolver, 'contar': contar,
+               'validar': validar}
+
+
+def hacer_lote(trabajos):
+
+    '''
+    Funcion que ejecutan los procesos del grupo: atiende un lote de
+    trabajos.
+
+    param list trabajos: Tuplas (operacion, argumentos).
+
+    return list: Tuplas (estado HTTP, respuesta) en el mismo orden.
+    '''
+
+    resultados = []
+    for operacion, argumentos in trabajos:
+        try:
+            resultados.append((200, OPERACIONES[operacion](**argumentos)))
+        except (TypeError, ValueError) as error:
+            resultados.append((400, {'error': str(error)}))
+    return resultados
+
+
+def _calentar():
+
+    '''
+    Trabajo que se manda a cada proceso al arrancar, para que ya haya
+    importado todo y tenga las tablas listas antes de la primera
+    solicitud.
+    '''
+
+    hacer_lote([('generar', {'nivel': 1, 'semilla': 0}),
+                ('contar', {'sudoku': '0' * 81})])
+    return os.getpid()
+
+
+class Servicio:
+
+    '''
+    Clase con la cola de solicitudes, el grupo de procesos y el repartidor
+    de lotes.
+    '''
+
+    def __init__(self, procesos=None, cola=COLA, lote=LOTE):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int procesos: Procesos del grupo, None para uno por nucleo.
+        :param int cola: Solicitudes que pueden esperar en la cola.
+        :param int lote: Trabajos por lote como maximo.
+        '''
+
+        self.procesos = procesos or os.cpu_count()
+        self.lote = lote
+        self.cola = asyncio.Queue(cola)
+        self.grupo = None
+        self.repartidor = None
+
+        # Lotes que se estan ejecutando, para no perder las tareas.
+        self.tareas = set()
+
+        # Solicitudes atendidas y rechazadas, lotes y trabajos enviados.
+        self.cuentas = collections.Counter()
+
+    async def iniciar(self):
+
+        '''
+        Arranca y calienta los procesos, y arranca el repartidor.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        loop = asyncio.get_running_loop()
+        self.grupo = concurrent.futures.ProcessPoolExecutor(self.procesos)
+
+        # Con un trabajo por proceso a la vez, el grupo arranca todos los
+        # procesos y cada uno se calienta.
+        await asyncio.gather(*[loop.run_in_executor(self.grupo, _calentar)
+                               for _ in range(self.procesos)])
+
+        self.en_vuelo = asyncio.Semaphore(self.procesos * LOTES_POR_PROCESO)
+        self.repartidor = asyncio.create_task(self._repartir())
+
+    async def detener(self):
+
+        '''
+        Detiene el repartidor y los procesos.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if self.repartidor is not None:
+            self.repartidor.cancel()
+        if self.grupo is not None:
+            self.grupo.shutdown(cancel_futures=True)
+
+    async def enviar(self, operacion, argumentos):
+
+        '''
+        Pone un trabajo en la cola y espera su resultado.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str operacion: Llave de OPERACIONES.
+        :param dict argumentos: Argumentos de la operacion.
+
+        return tuple: (estado HTTP, respuesta). Lanza asyncio.QueueFull si
+                      la cola esta llena.
+        '''
+
+        futuro = asyncio.get_running_loop().create_future()
+        self.cola.put_nowait((operacion, argumentos, futuro))
+        return await futuro
+
+    async def _repartir(self):
+
+        '''
+        Saca los trabajos de la cola en lotes y se los pasa a los
+        procesos.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        while True:
+            trabajos = [await self.cola.get()]
+
+            # Espera a que un proceso tenga espacio; mientras tanto se
+            # siguen acumulando trabajos en la cola.
+            await self.en_vuelo.acquire()
+
+            # Los trabajos que esperan se reparten entre los procesos: con
+            # poca carga los lotes son de uno y no se espera a nadie, con
+            # mucha carga los lotes crecen hasta el maximo.
+            tamano = min(self.lote, max(1, (self.cola.qsize() + 1)
+                                        // self.procesos))
+            while len(trabajos) < tamano and not self.cola.empty():
+                trabajos.append(self.cola.get_nowait())
+
+            tarea = asyncio.create_task(self._ejecutar(trabajos))
+            self.tareas.add(tarea)
+            tarea.add_done_callback(self.tareas.discard)
+
+    async def _ejecutar(self, trabajos):
+
+        '''
+        Ejecuta un lote en el grupo de procesos y entrega los resultados.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param list trabajos: Tuplas (operacion, argumentos, futuro).
+        '''
+
+        self.cuentas['lotes'] += 1
+        self.cuentas['trabajos'] += len(trabajos)
+        try:
+            resultados = await asyncio.get_running_loop().run_in_executor(
+                self.grupo, hacer_lote,
+                [(operacion, argumentos)
+                 for operacion, argumentos, _ in trabajos])
+        except Exception as error:
+            # Por ejemplo un proceso que murio: el lote completo falla.
+            resultados = [(500, {'error': repr(error)})] * len(trabajos)
+        finally:
+            self.en_vuelo.release()
+
+        for (_, _, futuro), resultado in zip(trabajos, resultados):
+            if not futuro.done():
+                futuro.set_result(resultado)
+
+    def estado(self):
+
+        '''
+        Devuelve el estado del servicio, para /estado.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return dict: Procesos, cola y cuentas.
+        '''
+
+        lotes = self.cuentas['lotes']
+        return {'procesos': self.procesos, 'cola': self.cola.qsize(),
+                'maximo_cola': self.cola.maxsize,
+                'atendidas': self.cuentas['atendidas'],
+                'rechazadas': self.cuentas['rechazadas'],
+                'lotes': lotes,
+                'trabajos_por_lote': (self.cuentas['trabajos'] / lotes
+                                      if lotes else 0)}
+
+    async def responder(self, metodo, ruta, cuerpo):
+
+        '''
+        Atiende una solicitud ya leida.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param str metodo: Metodo HTTP.
+        :param str ruta: Ruta con los parametros de la URL.
+        :param bytes cuerpo: Cuerpo de la solicitud.
+
+        return tuple: (estado HTTP, respuesta).
+        '''
+
+        url = urllib.parse.urlsplit(ruta)
+        nombre = url.path.strip('/')
+        if metodo not in ('GET', 'POST'):
+            return 405, {'error': 'solo se aceptan GET y POST'}
+        if nombre == 'estado':
+            return 200, self.estado()
+        if nombre not in OPERACIONES:
+            return 404, {'error': f'no existe la ruta /{nombre}'}
+
+        # Los parametros numericos de la URL se convierten a enteros; los
+        # del cuerpo JSON ya vienen con su tipo.
+        argumentos = dict(urllib.parse.parse_qsl(url.query))
+        for llave in ENTEROS:
+            if llave in argumentos:
+                try:
+                    argumentos[llave] = int(argumentos[llave])
+                except ValueError:
+                    return 400, {'error': f'{llave} debe ser un entero'}
+        if cuerpo:
+            try:
+                datos = json.loads(cuerpo)
+            except ValueError:
+                return 400, {'error': 'el cuerpo no es JSON valido'}
+            if not isinstance(datos, dict):
+                return 400, {'error': 'el cuerpo debe ser un objeto JSON'}
+            argumentos.update(datos)
+
+        try:
+            estado, respuesta = await self.enviar(nombre, argumentos)
+        except asyncio.QueueFull:
+            self.cuentas['rechazadas'] += 1
+            return 503, {'error': 'el servicio esta ocupado'}
+        self.cuentas['atendidas'] += 1
+        return estado, respuesta
+
+    async def atender(self, lector, escritor):
+
+        '''
+        Atiende una conexion HTTP/1.1, con varias solicitudes seguidas si
+        el cliente mantiene la conexion abierta.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param asyncio.StreamReader lector: Lado de lectura de la conexion.
+        :param asyncio.StreamWriter escritor: Lado de escritura.
+        '''
+
+        try:
+            while True:
+                try:
+                    cabecera = await lector.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    _escribir(escritor, 413, {'error': 'cabecera muy larga'},
+                              False)
+                    break
+
+                linea, *campos = cabecera.decode('latin-1').split('\r\n')
+                partes = linea.split(' ')
+                cabeceras = {}
+                for campo in campos:
+                    llave, _, valor = campo.partition(':')
+                    cabeceras[llave.strip().lower()] = valor.strip()
+                try:
+                    largo = int(cabeceras.get('content-length', 0))
+                except ValueError:
+                    largo = -1
+                if len(partes) != 3 or not 0 <= largo:
+                    _escribir(escritor, 400, {'error': 'solicitud invalida'},
+                              False)
+                    break
+                if largo > MAXIMO_CUERPO:
+                    _escribir(escritor, 413, {'error': 'cuerpo muy grande'},
+                              False)
+                    break
+
+                metodo, ruta, version = partes
+                cuerpo = await lector.readexactly(largo) if largo else b''
+                estado, respuesta = await self.responder(metodo, ruta, cuerpo)
+
+                seguir = (version == 'HTTP/1.1' and
+                          cabeceras.get('connection', '').lower() != 'close')
+                _escribir(escritor, estado, respuesta, seguir)
+                await escritor.drain()
+                if not seguir:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+
+def _escribir(escritor, estado, respuesta, seguir):
+
+    '''
+    Escribe una respuesta HTTP con cuerpo JSON.
+
+    param asyncio.StreamWriter escritor: Lado de escritura de la conexion.
+    param int estado: Estado HTTP.
+    param dict respuesta: Respuesta, se manda como JSON.
+    param bool seguir: True si la conexion sigue abierta.
+    '''
+
+    cuerpo = json.dumps(respuesta).encode()
+    cabecera = (f'HTTP/1.1 {estado} {RAZONES[estado]}\r\n'
+                'Content-Type: application/json\r\n'
+                f'Content-Length: {len(cuerpo)}\r\n')
+    if estado == 503:
+        cabecera += 'Retry-After: 1\r\n'
+    if not seguir:
+        cabecera += 'Connection: close\r\n'
+    escritor.write(cabecera.encode() + b'\r\n' + cuerpo)
+
+
+async def servir(host=HOST, puerto=PUERTO, procesos=None, cola=COLA,
+                 lote=LOTE):
+
+    '''
+    Arranca el servicio y atiende solicitudes hasta que se cancele o
+    llegue SIGTERM o SIGINT; en los dos casos se detienen los procesos del
+    grupo antes de salir, para que no queden huerfanos.
+
+    param str host: Direccion en la que se escucha.
+    param int puerto: Puerto en el que se escucha.
+    param int procesos: Procesos del grupo, None para uno por nucleo.
+    param int cola: Solicitudes que pueden esperar en la cola.
+    param int lote: Trabajos por lote como maximo.
+    '''
+
+    # Las senales solo avisan; el servicio se detiene aqui mismo, en el
+    # ciclo de asyncio. En Windows no hay add_signal_handler() y queda
+    # Ctrl+C (KeyboardInterrupt en main()).
+    loop = asyncio.get_running_loop()
+    parar = asyncio.Event()
+    for senal in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(senal, parar.set)
+        except NotImplementedError:
+            pass
+
+    servicio = Servicio(procesos, cola, lote)
+    await servicio.iniciar()
+    try:
+        servidor = await asyncio.start_server(servicio.atender, host, puerto)
+        print(f'sirviendo en http://{host}:{puerto} con '
+              f'{servicio.procesos} procesos', flush=True)
+        async with servidor:
+            await parar.wait()
+    finally:
+        await servicio.detener()
+
+
+def main(argv=None):
+
+    '''
+    Punto de entrada de la linea de comandos.
+
+    param list argv: Argumentos, None para usar sys.argv.
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Servicio local de sudokus por HTTP/JSON.')
+    parser.add_argument('--host', default=HOST,
+                        help='direccion en la que se escucha')
+    parser.add_argument('--puerto', type=int, default=PUERTO,
+                        help='puerto en el que se escucha')
+    parser.add_argument('-j', '--procesos', type=int, default=None,
+                        help='procesos que hacen el trabajo pesado '
+                        '(por defecto uno por nucleo)')
+    parser.add_argument('--cola', type=int, default=COLA,
+                        help='solicitudes que pueden esperar; con la cola '
+                        'llena se responde 503')
+    parser.add_argument('--lote', type=int, default=LOTE,
+                        help='trabajos por lote como maximo')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.procesos, args.cola,
+                           args.lote))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,67 @@
 #!/usr/bin/python3
 
+import collections
+import os
 import sys
-import pygame
-import random
+
+from banco import Banco
+from grabacion import Grabadora
+from geometria import CAJAS, SIMBOLOS, numeros_mascara
+from nucleo import (generar_sudoku, rellenar_casilla,  # noqa: F401
+                    rellenar_sudoku, verificar)
+from partida import Autoguardado, empaquetar
+from perfilador import perfil
+from precarga import Precarga
+from recursos import Recursos, importar_al_usarse
+from restricciones import NUMEROS_MASCARA, Conteo, Notas
+
+pygame = importar_al_usarse('pygame')
+
+# Imagen de los botones y tamano al que se escala.
+IMAGEN_BOTON = "boton.png"
+TAMANO_BOTON = (268, 150)
+
+# Sonido de la introduccion de cada nivel, y de victorias y derrotas.
+SONIDO_NIVEL = {1: "principiante_sound.mp3", 2: "intermedio_sound.mp3",
+                3: "avanzado_sound.mp3"}
+SONIDO_VICTORIA = "win_sound.mp3"
+SONIDO_DERROTA = "gameover_sound.mp3"
+
+# Fuente de letra del juego.
+FUENTE = "WaHandwriting-Regular.ttf"
+
+# Texto de cada numero de una casilla, 0 para la casilla vacia. Del 10 en
+# adelante (en los tableros de 16x16 y 25x25) se escriben con letras.
+DIGITOS = [''] + list(SIMBOLOS[1:])
+
+# Numero que escribe cada tecla, con las letras en mayuscula o minuscula.
+TECLAS = {simbolo: k for k, simbolo in enumerate(SIMBOLOS) if k}
+TECLAS.update({simbolo.lower(): k for simbolo, k in TECLAS.items()})
+
+# Pixeles minimos de cada nota; si no caben, el tablero no tiene notas.
+NOTA_MINIMA = 10
+
+# Colores de los numeros que son pista, de los que escribe el jugador y
+# de los que se repiten en su fila, columna o cuadrante.
+COLOR_PISTA = (42, 22, 11)
+COLOR_JUGADOR = (47, 65, 125)
+COLOR_CONFLICTO = (190, 30, 30)
+
+# Color de las notas (los candidatos) de las casillas vacias.
+COLOR_NOTAS = (120, 120, 120)
+
+# Variables de entorno que encienden la instrumentacion: SUDOKU_PERFIL=1
+# muestra el panel de tiempos (F3 lo oculta y lo vuelve a mostrar) y
+# SUDOKU_TRAZA=archivo.json ademas guarda la traza al cerrar el juego.
+VARIABLE_PERFIL = "SUDOKU_PERFIL"
+VARIABLE_TRAZA = "SUDOKU_TRAZA"
+
+# Variable de entorno con el archivo donde se graba la sesion, para
+# reproducirla despues con grabacion.py.
+VARIABLE_GRABACION = "SUDOKU_GRABACION"
+
+# Milisegundos entre dos guardados automaticos de la partida en curso.
+AUTOGUARDADO_CADA = 5000
 
 '''
 Elián Jiménez Quesada C13983
@@ -26,7 +85,7 @@ class Sudoku:
     Clase que se encarga de crear las casillas del sudoku.
     '''
 
-    def __init__(self, x, y, w, h, text, id):
+    def __init__(self, x, y, w, h, tablero, k, conteo, notas, disposicion):
 
         '''
         Constructor de la clase.
@@ -36,8 +95,14 @@ class Sudoku:
         :param int y: Coordenada en y de la casilla.
         :param int w: Ancho de la casilla.
         :param int h: Alto de la casilla.
-        :param str text: Numero de la casilla.
-        :param int id: id de la casilla
+        :param Tablero tablero: Tablero del nivel, la casilla lee y escribe
+                                su numero directamente en el.
+        :param int k: Posicion de la casilla en el tablero.
+        :param Conteo conteo: Contadores de los numeros del tablero, que
+                              la casilla actualiza al escribir o borrar.
+        :param Notas notas: Candidatos de las casillas vacias del tablero.
+        :param Disposicion disposicion: Medidas, fuente y notas del
+                                        tablero.
         '''
 
         # Crea el cuadrado de la casilla, con tamano y coordenas.
@@ -45,17 +110,31 @@ class Sudoku:
 
         self.color = 'black'  # Color de la casilla.
 
-        self.id = id  # id de la casilla.
+        self.tablero = tablero  # Tablero al que pertenece la casilla.
 
-        self.text = text  # Numero de la casilla.
+        self.k = k  # Posicion de la casilla en el tablero.
 
-        # Lo que se muestra en pantalla
-        # El numero, que sea suave y color en RGB.
-        self.numero = fuente2.render(text, True, (42, 22, 11))
+        # Medidas, fuente y notas del tablero.
+        self.disposicion = disposicion
+
+        # Fila y columna de la casilla en el tablero.
+        self.fila, self.columna = divmod(k, disposicion.lado)
+
+        self.conteo = conteo  # Contadores de los numeros del tablero.
+
+        self.notas = notas  # Candidatos de las casillas vacias.
+
+        # Lo que se muestra en pantalla, el numero ya renderizado.
+        self.numero = None
 
         # Indicara si la casilla esta seleccionada o no.
         self.active = False
 
+        # Indicara si la casilla cambio y hay que volver a dibujarla.
+        self.sucio = True
+
+        self.pintar()
+
     def cuadros(self, screen):
 
         '''
@@ -65,72 +144,272 @@ class Sudoku:
         :param pygame.surface.Surface screen: Pantalla del juego.
         '''
 
+        if perfil.activo:
+            perfil.contar('cuadros')
+
         # Dibuja el cuadro en la pantalla de color blanco.
         pygame.draw.rect(screen, 'white', self.rect)
 
         # Proyecta el numero de la casilla en l cuadro dibujado,
         # centrado con ayuda de las coordenas, calculando que estuviera
         # en el centro.
-        screen.blit(self.numero, (self.rect.x+12, self.rect.y+2))
+        disposicion = self.disposicion
+        screen.blit(self.numero, (self.rect.x + disposicion.margen[0],
+                                  self.rect.y + disposicion.margen[1]))
+
+        # Si la casilla esta vacia y el jugador quiere ver las notas, se
+        # copian del atlas los numeros pequenos de los candidatos.
+        if self.notas.visibles and not self.tablero[self.k]:
+            disposicion.atlas.dibujar(screen, self.notas.mascaras[self.k],
+                                      self.rect.x + 4, self.rect.y + 4)
+
+        # Dibuja el borde el cuadro en la pantalla, color negro y de grosor 3
+        # en el tablero de 9x9 (mas delgado en los tableros grandes).
+        pygame.draw.rect(screen, self.color, self.rect, disposicion.borde)
+
+    def pintar(self):
+
+        '''
+        Escoge el color del numero de la casilla: rojo si se repite en su
+        fila, columna o cuadrante, y si no, el color de las pistas o el de
+        los numeros del jugador. Solo marca la casilla para volver a
+        dibujarla si el numero o el color cambiaron.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        numero = self.tablero[self.k]
+        if numero and self.conteo.en_conflicto(self.fila, self.columna,
+                                               numero):
+            color = COLOR_CONFLICTO
+        elif self.tablero.es_pista(self.k):
+            color = COLOR_PISTA
+        else:
+            color = COLOR_JUGADOR
+
+        # El numero, que sea suave y color en RGB.
+        superficie = cache_textos.render(self.disposicion.fuente,
+                                         DIGITOS[numero], color)
+        if superficie is not self.numero:
+            self.numero = superficie
+            self.sucio = True
+
+    def seleccionar(self, activo):
+
+        '''
+        Funcion que selecciona o deselecciona la casilla, para eventualmente
+        agregarle un numero.
 
-        # Dibuja el borde el cuadro en la pantalla, color negro y de grosor 3.
-        pygame.draw.rect(screen, self.color, self.rect, 3)
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param bool activo: True para seleccionar la casilla.
+        '''
+
+        self.active = activo
+
+        # Si la casilla esta activa, se pone de color azul, sino
+        # continua siendo negra. Solo se marca para volver a dibujarla
+        # si el color cambio.
+        color = 'blue' if self.active else 'black'
+        if color != self.color:
+            self.color = color
+            self.sucio = True
 
     def numeros(self, event):
 
         '''
-        Funcion que permite seleccionar casillas para eventualemte agregarles
-        un numero.
+        Funcion que agrega o borra el numero de la casilla seleccionada.
 
         :param self: Referencia al propio objeto dentro de la clase.
         :param Event-KeyDown event: Evento actual en el juego.
+
+        return int: El numero que cambio (el que se borro o el que se
+                    escribio), 0 si la casilla no cambio.
         '''
 
-        # La funcion mouse.get_pos() devuelve las coordenadas (x, y)
-        # actuales del cursor del mouse en la ventana del juego.
-        posicion_mouse = pygame.mouse.get_pos()
+        # Las pistas del sudoku no se pueden cambiar.
+        if self.tablero.es_pista(self.k):
+            return 0
+
+        # Si se presiona la tecla de borrar, se borra el numero,
+        # se descuenta y se actualiza en pantalla.
+        numero = self.tablero[self.k]
+        if event.key == pygame.K_BACKSPACE:
+            if numero:
+                self.tablero[self.k] = 0
+                self.conteo.quitar(self.fila, self.columna, numero)
+                self.pintar()
+                return numero
+
+        # Si la casilla esta en blanco, y se presiona un numero del 1 al 9
+        # (o una letra, en los tableros grandes), se escribe el numero en
+        # pantalla, en la casilla activa.
+        elif (not numero and 0 < TECLAS.get(event.unicode, 0)
+                <= self.disposicion.lado):
+            numero = TECLAS[event.unicode]
+            self.tablero[self.k] = numero
+            self.conteo.colocar(self.fila, self.columna, numero)
+            self.pintar()
+            return numero
+        return 0
+
+
+class Despachador:
 
-        # Este if verifica si el tipo de evento actual
-        # es pygame.MOUSEBUTTONDOWN.
-        # .MOUSEBUTTONDOWN es un evento que Pygame registra cuando
-        # se presiona un boton del mouse.
+    '''
+    Clase que reparte los eventos del mouse y del teclado a las casillas.
+    En lugar de pasarle cada evento a todas las casillas, calcula con la
+    posicion del click en que casilla cayo y guarda cual es la casilla
+    seleccionada, asi cada evento solo toca una o dos casillas sin
+    importar el tamano del tablero.
+    '''
+
+    def __init__(self, casillas, lado, x, y, paso, tamano):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param list casillas: Objetos Sudoku, en el orden en que se crearon
+                              (la casilla de la columna i y fila j de la
+                              pantalla esta en la posicion i * lado + j,
+                              que es tambien su posicion en el tablero).
+        :param int lado: Casillas por lado del tablero.
+        :param int x: Coordenada en x de la primera casilla.
+        :param int y: Coordenada en y de la primera casilla.
+        :param int paso: Distancia entre el inicio de dos casillas seguidas.
+        :param int tamano: Ancho y alto de cada casilla.
+        '''
+
+        self.casillas = casillas
+        self.lado = lado
+        self.x = x
+        self.y = y
+        self.paso = paso
+        self.tamano = tamano
+
+        # Casilla seleccionada, None si no hay ninguna.
+        self.seleccionada = None
+
+    def casilla_en(self, posicion):
+
+        '''
+        Calcula en que casilla cae una posicion de la pantalla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param tuple posicion: Coordenadas (x, y).
+
+        return Sudoku: La casilla, o None si la posicion cae fuera del
+                       tablero o en el espacio entre dos casillas.
+        '''
+
+        i, resto_x = divmod(posicion[0] - self.x, self.paso)
+        j, resto_y = divmod(posicion[1] - self.y, self.paso)
+        if (0 <= i < self.lado and 0 <= j < self.lado
+                and resto_x < self.tamano and resto_y < self.tamano):
+            return self.casillas[i * self.lado + j]
+        return None
+
+    def evento(self, event):
+
+        '''
+        Atiende un evento del juego.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.event.Event event: Evento actual en el juego.
+        '''
+
+        # Un click selecciona la casilla presionada y deselecciona la
+        # anterior; si se hace click fuera del tablero no queda ninguna.
         if event.type == pygame.MOUSEBUTTONDOWN:
+            casilla = self.casilla_en(event.pos)
+            if casilla is not self.seleccionada:
+                if self.seleccionada is not None:
+                    self.seleccionada.seleccionar(False)
+                if casilla is not None:
+                    casilla.seleccionar(True)
+                self.seleccionada = casilla
+
+        # Las teclas solo le llegan a la casilla seleccionada. Si cambio
+        # su numero, solo las casillas vecinas con ese mismo numero pueden
+        # haber entrado o salido de un conflicto.
+        elif event.type == pygame.KEYDOWN and self.seleccionada is not None:
+            numero = self.seleccionada.numeros(event)
+            if numero:
+                tablero = self.seleccionada.tablero
+                notas = self.seleccionada.notas
+                for v in notas.vecinas[self.seleccionada.k]:
+                    if tablero[v] == numero:
+                        self.casillas[v].pintar()
+
+                # Las notas solo cambian en la casilla y sus vecinas (20 en
+                # el tablero de 9x9).
+                for v in notas.actualizar(self.seleccionada.k):
+                    if notas.visibles:
+                        self.casillas[v].sucio = True
+
+
+class AtlasNotas:
 
-            # Si la casilla en toda su superficie es presionada.
-            # El estado de la casilla cambia a activo, sino
-            # se mantiene inactivo.
-            if self.rect.collidepoint(posicion_mouse):
-                self.active = True
-            else:
-                self.active = False
-
-            # Si la casilla esta activa, se pone de color azul, sino
-            # continua siendo negra.
-            if self.active:
-                self.color = 'blue'
-            else:
-                self.color = 'black'
+    '''
+    Clase con los numeros pequenos de las notas ya renderizados, todos en
+    una sola superficie. Dibujar las notas de una casilla es copiar a la
+    pantalla un pedazo del atlas por cada candidato, sin renderizar texto.
+    '''
 
-        # Este if verifica si el tipo de evento actual
-        # es pygame.KEYDOWN.
-        # .KEYDOWN es un evento que Pygame registra cuando
-        # se presionan teclas del teclado.
-        if event.type == pygame.KEYDOWN:
-
-            # Si la casilla esta activa.
-            if self.active:
-                # Si se presiona la tecla de borrar, se borra el numero.
-                # y se actualiza en pantalla.
-                if event.key == pygame.K_BACKSPACE:
-                    self.text = self.text[:-1]  # Eliminar el ultimo caracter
-                    self.numero = fuente2.render(self.text, True, 'black')
-
-                # Si la casilla esta en blanco, y se presiona cualquier numero,
-                # se escribe el numero en pantalla, en la casilla activa.
-                elif event.unicode.isdigit() and len(self.text) < 1:
-                    self.text += event.unicode
-                    self.numero = fuente2.render(self.text, True, (47, 65,
-                                                                   125))
+    def __init__(self, fuente, color, lado, caja=3):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.font.Font fuente: Fuente de letra de las notas.
+        :param color: Color de las notas, nombre o tupla RGB.
+        :param int lado: Ancho y alto del espacio de cada nota; las notas
+                         de una casilla se acomodan en caja filas de caja.
+        :param int caja: Casillas por lado de cada cuadrante del tablero.
+        '''
+
+        self.lado = lado
+        numeros = range(1, caja * caja + 1)
+
+        # En el tablero de 9x9 los numeros de cada mascara se leen de la
+        # tabla de restricciones.py, que es mas rapida.
+        self.numeros_mascara = (NUMEROS_MASCARA.__getitem__ if caja == 3
+                                else numeros_mascara)
+
+        # Superficie transparente con los numeros, cada uno centrado en su
+        # propio cuadro de lado x lado.
+        self.superficie = pygame.Surface((lado * len(numeros), lado),
+                                         pygame.SRCALPHA)
+        for numero in numeros:
+            texto = fuente.render(DIGITOS[numero], True, color)
+            centro = ((numero - 1) * lado + lado // 2, lado // 2)
+            self.superficie.blit(texto, texto.get_rect(center=centro))
+
+        # Pedazo del atlas de cada numero.
+        self.areas = [None] + [pygame.Rect((numero - 1) * lado, 0, lado, lado)
+                               for numero in numeros]
+
+        # Posicion de cada numero dentro de la casilla.
+        self.posiciones = [None] + [((numero - 1) % caja * lado,
+                                     (numero - 1) // caja * lado)
+                                    for numero in numeros]
+
+    def dibujar(self, screen, mascara, x, y):
+
+        '''
+        Dibuja las notas de una casilla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.surface.Surface screen: Pantalla del juego.
+        :param int mascara: Mascara de candidatos de la casilla.
+        :param int x: Coordenada en x de la esquina de las notas.
+        :param int y: Coordenada en y de la esquina de las notas.
+        '''
+
+        for numero in self.numeros_mascara(mascara):
+            dx, dy = self.posiciones[numero]
+            screen.blit(self.superficie, (x + dx, y + dy), self.areas[numero])
 
 
 class Botones:
@@ -159,19 +438,17 @@ class Botones:
         # Almacena el texto que se mostrara en el boton.
         self.texto_input = texto_input
 
-        # El metodo render() se utiliza para renderizar el texto.
-        # Texto, True para bordes suaves, color del texto.
-        self.texto = fuente.render(self.texto_input, True, "black")
-
         # Si no se quiere usar una imagen especifica, se utiliza
         # solamente el texto como boton.
-        if self.imagen is None:
-            self.texto = fuente.render(self.texto_input, True, "white")
+        self.sin_imagen = self.imagen is None
+
+        # El texto se toma del cache de textos ya renderizados.
+        # Texto, color del texto.
+        if self.sin_imagen:
+            self.texto = cache_textos.render(fuente, self.texto_input, "white")
             self.imagen = self.texto
         else:
-            # El metodo render() se utiliza para renderizar el texto.
-            # Texto, True para bordes suaves, color del texto.
-            self.texto = fuente.render(self.texto_input, True, "black")
+            self.texto = cache_textos.render(fuente, self.texto_input, "black")
 
         # Crea un rectangulo que envuelve la imagen del boton.
         # El rectangulo esta centrado en las coordenadas x_pos, y_pos.
@@ -181,6 +458,10 @@ class Botones:
         # El rectangulo esta centrado en las coordenadas x_pos, y_pos.
         self.texto_rect = self.texto.get_rect(center=(self.x_pos, self.y_pos))
 
+        # Indicara si el mouse esta encima del boton, None mientras no se
+        # haya revisado.
+        self.encima = None
+
     def update(self):
 
         '''
@@ -220,9 +501,7 @@ class Botones:
         # Si el mouse en su la coordenada y hace click en el rango
         # arriba-abajo del boton, se detecta el click y retorna
         # verdadero.
-        if posicion[0] in range(self.rect.left, self.rect.right) and posicion[1] in range(self.rect.top, self.rect.bottom): # noqa
-            return True
-        return False
+        return self.rect.collidepoint(posicion)
 
     def animacion_boton(self, posicion):
 
@@ -232,6 +511,10 @@ class Botones:
 
         :param self: Referencia al propio objeto dentro de la clase.
         :param tuple position: Coordenadas (x, y) del mouse.
+
+        return bool True: Si el boton cambio de color y hay que volver a
+                          dibujarlo.
+        return bool False: Si el boton se ve igual que antes.
         '''
 
         # Si el mouse en su la coordenada x se situa en el rango
@@ -239,492 +522,731 @@ class Botones:
         # Si el mouse en su la coordenada y se situa en el rango
         # arriba-abajo del boton, cambia el color de la letra.
         # Sino, no cambia el color.
+        encima = self.rect.collidepoint(posicion)
+
+        # Si el mouse sigue donde estaba (encima o fuera del boton) no hay
+        # nada que volver a renderizar.
+        if encima == self.encima:
+            return False
+        self.encima = encima
+
         # El primer if condiciona los botones que tienen imagen y los que no.
-        if self.imagen == self.texto:
-            if posicion[0] in range(self.rect.left, self.rect.right) and posicion[1] in range(self.rect.top, self.rect.bottom): # noqa
-                self.texto = fuente.render(self.texto_input, True, "red")
-            else:
-                self.texto = fuente.render(self.texto_input, True, "white")
+        # Los textos ya estan renderizados en el cache, solo se cambia
+        # cual se usa.
+        if encima:
+            color = "red"
+        elif self.sin_imagen:
+            color = "white"
         else:
-            if posicion[0] in range(self.rect.left, self.rect.right) and posicion[1] in range(self.rect.top, self.rect.bottom): # noqa
-                self.texto = fuente.render(self.texto_input, True, "red")
-            else:
-                self.texto = fuente.render(self.texto_input, True, "black")
+            color = "black"
+        self.texto = cache_textos.render(fuente, self.texto_input, color)
+
+        # El boton sin imagen es el mismo texto.
+        if self.sin_imagen:
+            self.imagen = self.texto
+        return True
 
 
-def verificar(sudoku, fila, columna, numero):
+class CacheTexto:
 
     '''
-    Esta funcion se encarga de verificar que los numeros generados por la
-    funcion rellenar celda no se encuentre ya en la misla fila, columna o
-    cuadrante del sudoku.
+    Clase que guarda los textos ya renderizados, para que los ciclos del
+    juego solo copien superficies a la pantalla en lugar de volver a
+    renderizar el mismo texto en cada cuadro. Tiene un tamano maximo; si
+    se llena, se descarta el texto que tiene mas tiempo sin usarse.
+    '''
 
-    param list sudoku: Lista de listas que contiene los numeros del
-                       sudoku a generase.
-    param int fila: Especifica la fila actual del sudoku.
-    param int columna: Especifica la columna actual del sudoku.
-    param int numero: Especifica el numero presente en la casilla.
+    def __init__(self, maximo=256):
 
-    return bool True: Si el numero no se encuentra ya en la misla fila,
-                      columna o cuadrante del sudoku.
-    return bool False: Si el numero ya se encuentra en la misla fila,
-                      columna o cuadrante del sudoku.
-    '''
+        '''
+        Constructor de la clase.
 
-    # Itera sobre cada fila de toda una columna
-    # y verifica que el numero no este en la misma columna.
-    for i in range(9):
-        if sudoku[i][columna] == numero:
-            return False
-    # Itera sobre cada columna de toda una fila
-    # y verifica que el numero no este en la misma fila.
-    for i in range(9):
-        if sudoku[fila][i] == numero:
-            return False
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int maximo: Cantidad maxima de textos guardados.
+        '''
+
+        self.maximo = maximo
+
+        # Superficies guardadas por (fuente, texto, color), en orden de uso.
+        self.superficies = collections.OrderedDict()
+
+    def render(self, fuente, texto, color):
+
+        '''
+        Devuelve el texto renderizado, renderizandolo solo la primera vez.
+        Las superficies se comparten, no se deben modificar.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.font.Font fuente: Fuente de letra.
+        :param str texto: Texto a renderizar.
+        :param color: Color del texto, nombre o tupla RGB.
 
-    # Calcula la celda de la esquina superior izquierda
-    # de la submatriz 3x3 a la que pertenece la
-    # celda analizada (fila, columna).
-    fila2 = (fila // 3) * 3
-    columna2 = (columna // 3) * 3
+        return pygame.surface.Surface: Texto renderizado con bordes suaves.
+        '''
 
-    # Estos dos for recorren la matriz 3x3 y con el if
-    # se verifica si el numero ya esta presente en ese
-    # cuadrante.
-    for i in range(3):
-        for j in range(3):
-            if sudoku[fila2 + i][columna2 + j] == numero:
-                return False
-    return True
+        clave = (fuente, texto, color)
+        superficie = self.superficies.get(clave)
+        if superficie is None:
+            if perfil.activo:
+                perfil.contar('textos')
+            superficie = fuente.render(texto, True, color)
+            self.superficies[clave] = superficie
+            if len(self.superficies) > self.maximo:
+                self.superficies.popitem(last=False)
+        else:
+            self.superficies.move_to_end(clave)
+        return superficie
 
+    def precargar(self, fuente, textos, colores):
 
-def rellenar_casilla(i, j, sudoku, numeros):
+        '''
+        Renderiza de una vez todas las combinaciones de textos y colores.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.font.Font fuente: Fuente de letra.
+        :param iterable textos: Textos a renderizar.
+        :param iterable colores: Colores de cada texto.
+        '''
+
+        for texto in textos:
+            for color in colores:
+                self.render(fuente, texto, color)
+
+
+class RenderTablero:
 
     '''
-    Esta funcion se encarga de rellenar todas las casillas del sudoku,
-    utilizando la funcion verificar() verifica que el numero que va a colocar
-    en la casilla no se encuentre ya en la misma fila, columna o cuadrante.
-    Al hacerlo podria llegar a un punto en el que no tenga ningun numero
-    posible a colocar en la casilla, por lo tanto el sudoku quedaria
-    incompleto en cierto punto. Para esto se utiliza una recursion en la que
-    la funcion se llama a si misma en para que dado caso que llegue a un punto
-    muerto pueda devolverse unas cuantas casillas y tomar otro camino,
-    generando asi un sudoku completamente validado.
+    Clase que dibuja el tablero del nivel. La primera vez dibuja todo y
+    guarda una copia de la pantalla (fondo, lineas y numeros iniciales);
+    despues solo vuelve a dibujar las casillas y botones que cambiaron, y
+    solo actualiza esas partes de la pantalla.
+    '''
+
+    def __init__(self, casillas, botones, disposicion):
 
-    param int i: Fila de la casilla.
-    param int j: Columna de la casilla.
-    param list sudoku: Lista de 9 listas con 9 elementos iguales a 0 cada una.
-    param list numeros: Lista de numeros del 1 al 9 en desorden.
+        '''
+        Constructor de la clase.
 
-    return bool True: Si todas las casillas han sido rellenadas correctamente.
-    return bool False: Si no se lograron rellenar todas las casillas con
-                       ese camino.
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param list casillas: Objetos Sudoku del tablero.
+        :param list botones: Objetos Botones que se muestran en el nivel.
+        :param Disposicion disposicion: Medidas del tablero.
+        '''
+
+        self.casillas = casillas
+        self.botones = botones
+        self.disposicion = disposicion
+
+        # Copia de la pantalla sin los botones, para borrar un boton antes
+        # de volver a dibujarlo.
+        self.fondo = None
+
+    def iniciar(self, screen):
+
+        '''
+        Dibuja el tablero completo y guarda la copia del fondo.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.surface.Surface screen: Pantalla del juego.
+        '''
+
+        with perfil.fase('dibujo'):
+            dibujar_lineas(screen, self.disposicion)
+            for casilla in self.casillas:
+                casilla.cuadros(screen)
+                casilla.sucio = False
+
+            # Guarda el tablero ya dibujado.
+            self.fondo = screen.copy()
+
+            posicion_mouse = ritmo.mouse
+            for boton in self.botones:
+                boton.animacion_boton(posicion_mouse)
+                boton.update()
+
+            # La primera vez se actualiza toda la pantalla.
+            voltear()
+
+    def dibujar(self, screen, posicion_mouse):
+
+        '''
+        Vuelve a dibujar solo lo que cambio desde el cuadro anterior.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.surface.Surface screen: Pantalla del juego.
+        :param tuple posicion_mouse: Coordenadas (x, y) del mouse.
+        '''
+
+        # Rectangulos de la pantalla que hay que actualizar.
+        cambios = []
+
+        with perfil.fase('dibujo'):
+            for boton in self.botones:
+                if boton.animacion_boton(posicion_mouse):
+                    area = boton.rect.union(boton.texto_rect)
+
+                    # Borra el boton anterior copiando el fondo guardado.
+                    screen.blit(self.fondo, area, area)
+                    boton.update()
+                    cambios.append(area)
+
+            for casilla in self.casillas:
+                if casilla.sucio:
+                    casilla.cuadros(screen)
+                    casilla.sucio = False
+                    cambios.append(casilla.rect)
+
+            # Si nada cambio no se actualiza la pantalla.
+            if cambios:
+                voltear(cambios)
+
+
+class Ritmo:
+
+    '''
+    Clase que controla el ritmo de los ciclos del juego. Cuando no hay nada
+    animandose, el ciclo duerme esperando el siguiente evento en lugar de
+    girar sin parar; cuando hay animacion, limita los cuadros por segundo.
     '''
 
-    # Se comprueba si ya se ha llegado a la ultima fila del sudoku.
-    if i == 9:
-        return True
+    def __init__(self, fps=60, espera=500):
+
+        '''
+        Constructor de la clase.
 
-    # Se actualizan los indices next_i y next_j para la proxima celda que se va
-    # a rellenar. Si se esta la ultima columna avanza a la siguiente fila y
-    # comienza desde la primera columna. En caso contrario, avanza a la
-    # siguiente columna de la misma fila.
-    next_i = i + 1 if j == 8 else i
-    next_j = 0 if j == 8 else j + 1
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int fps: Cuadros por segundo maximos al animar.
+        :param int espera: Milisegundos maximos que se duerme esperando un
+                           evento, para que el ciclo siga revisando cosas
+                           como si termino un sonido.
+        '''
 
-    # Verifica si la celda actual ya esta llena. Si la celda esta llena,
-    # la funcion se llama a si misma para rellenar la siguiente celda.
-    if sudoku[i][j] != 0:
-        return rellenar_casilla(next_i, next_j, sudoku, numeros)
+        self.fps = fps
+        self.espera = espera
 
-    # Este for itera sobre cada numero en la lista numeros.
-    for num in numeros:
+        # El reloj de pygame mide los cuadros por segundo conseguidos.
+        self.reloj = pygame.time.Clock()
 
-        # Llama a la funcion verificar() para verificar si el numero
-        # puede ser colocado en la casilla.
-        if verificar(sudoku, i, j, num):
-            sudoku[i][j] = num
+        # Milisegundos de pygame y posicion del mouse de la vuelta actual.
+        # Las escenas los leen de aqui y no de pygame, asi una vuelta ve
+        # siempre el mismo momento y una reproduccion puede darles los
+        # valores grabados.
+        self.ahora = 0
+        self.mouse = (0, 0)
 
-            # La funcion se llama a si misma para rellenar la siguiente celda,
-            # si retorna True significa que todas las casillas han sido
-            # rellenadas correctamente.
-            # En el caso contrario se rellena con 0 y se sigue probando
-            # con otros numeros.
-            if rellenar_casilla(next_i, next_j, sudoku, numeros):
-                return True
-            sudoku[i][j] = 0
-    return False
+    def eventos(self, espera=None):
 
+        '''
+        Duerme hasta que llegue un evento (o pase el tiempo de espera) y
+        devuelve todos los eventos pendientes.
 
-def rellenar_sudoku(sudoku):
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int espera: Milisegundos maximos de espera, None para usar
+                           la espera de la clase.
+
+        return list: Eventos pendientes, puede estar vacia.
+        '''
+
+        with perfil.fase('espera'):
+            evento = pygame.event.wait(self.espera if espera is None
+                                       else espera)
+        self.ahora = pygame.time.get_ticks()
+        self.mouse = pygame.mouse.get_pos()
+        if evento.type == pygame.NOEVENT:
+            return []
+        return [evento] + pygame.event.get()
+
+    def limitar(self, animando):
+
+        '''
+        Cierra la vuelta del ciclo: la cuenta en el reloj, para los cuadros
+        por segundo conseguidos, y si hay animacion espera lo necesario
+        para no pasar de los cuadros por segundo maximos.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param bool animando: True si la escena de esta vuelta anima algo.
+        '''
+
+        self.reloj.tick(self.fps if animando else 0)
+
+    def fps_reales(self):
+
+        '''
+        Devuelve los cuadros por segundo conseguidos, promediando los
+        ultimos cuadros.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return float: Cuadros por segundo.
+        '''
+
+        return self.reloj.get_fps()
+
+
+class PanelPerfil:
 
     '''
-    Esta funcion se encarga de rellenar el sudoku con valores entre 1 y 9
-    casilla por casilla haciendo uso de la funcion rellenar_casilla().
+    Clase que muestra en una esquina de la pantalla cuanto tardo el ultimo
+    cuadro, en que fases se fue el tiempo y los contadores de la
+    instrumentacion. Se dibuja encima de la escena al final de cada cuadro
+    y guarda lo que tapa para devolverlo antes del siguiente, asi las
+    escenas pueden seguir dibujando solo lo que cambio. El tiempo del
+    propio panel no se cuenta en el cuadro.
+    '''
+
+    # Orden en que se muestran las fases.
+    FASES = ('eventos', 'logica', 'dibujo', 'voltear', 'cambio')
+
+    def __init__(self, fuente, rect):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.font.Font fuente: Fuente de letra del panel.
+        :param tuple rect: (x, y, ancho, alto) del panel.
+        '''
+
+        self.fuente = fuente
+        self.rect = pygame.Rect(rect)
+        self.visible = True
+
+        # Copia de lo que tapa el panel, y si se mostro en el ultimo cuadro.
+        self.debajo = None
+        self.mostrado = False
 
-    param list sudoku: Lista de 9 listas con 9 elementos iguales a 0 cada una.
+    def borrar(self, screen):
 
-    return function rellenar_casilla(): Retorna esta funcion para que rellene
-                                        todas las casillas.
+        '''
+        Devuelve a la pantalla lo que tapaba el panel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.surface.Surface screen: Pantalla del juego.
+        '''
+
+        if self.debajo is not None:
+            screen.blit(self.debajo, self.rect)
+
+    def dibujar(self, screen):
+
+        '''
+        Guarda lo que va a tapar y dibuja el panel con el resumen del
+        ultimo cuadro.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.surface.Surface screen: Pantalla del juego.
+        '''
+
+        self.debajo = screen.subsurface(self.rect).copy()
+        resumen = perfil.resumen()
+
+        if self.visible and resumen is not None:
+            fases = resumen['fases']
+            contadores = sorted(resumen['contadores'].items())
+            lineas = [f"cuadro {resumen['cuadro'] * 1e3:.2f} ms  "
+                      f"max {resumen['maximo'] * 1e3:.1f}  "
+                      f"{ritmo.fps_reales():.0f} fps"]
+            nombres = [nombre for nombre in self.FASES if nombre in fases]
+            for k in range(0, len(nombres), 2):
+                lineas.append('  '.join(f'{nombre} {fases[nombre] * 1e3:.2f}'
+                                        for nombre in nombres[k:k + 2]))
+            for k in range(0, len(contadores), 2):
+                lineas.append('  '.join(f'{nombre} {cantidad}'
+                                        for nombre, cantidad
+                                        in contadores[k:k + 2]))
+
+            screen.fill('black', self.rect)
+            y = self.rect.y + 3
+            for linea in lineas:
+                texto = self.fuente.render(linea, True, 'yellow')
+                screen.blit(texto, (self.rect.x + 4, y))
+                y += self.fuente.get_linesize()
+
+        # Si el panel se acaba de ocultar, se actualiza una vez mas para
+        # quitarlo de la pantalla.
+        if self.visible or self.mostrado:
+            pygame.display.update(self.rect)
+        self.mostrado = self.visible
+
+
+class Disposicion:
+
+    '''
+    Clase con las medidas del tablero en la pantalla, calculadas a partir
+    del tamano del sudoku: el tablero ocupa siempre el mismo cuadro de la
+    pantalla y las casillas se achican para que quepan. Con caja = 3 salen
+    las medidas del tablero de 9x9 (casillas de 50 pixeles separadas por
+    5). La fuente y el atlas de las notas se cargan con cargar().
     '''
 
-    # Lista con numeros posibles del sudoku, es decir del 1 al 9.
-    numeros = list(range(1, 10))
+    def __init__(self, caja, x=270, y=40, tamano=495):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int caja: Casillas por lado de cada cuadrante.
+        :param int x: Coordenada en x de la primera casilla.
+        :param int y: Coordenada en y de la primera casilla.
+        :param int tamano: Ancho y alto del cuadro de la pantalla en el que
+                           va el tablero.
+        '''
+
+        lado = caja * caja
+        self.caja = caja
+        self.lado = lado
+
+        # Distancia entre el inicio de dos casillas seguidas, espacio entre
+        # ellas y ancho de cada casilla.
+        self.paso = tamano // lado
+        self.hueco = max(2, self.paso // 11)
+        self.celda = self.paso - self.hueco
+
+        # Los pixeles que sobran al dividir el cuadro entre las casillas se
+        # reparten a los dos lados, para que el tablero quede centrado.
+        sobra = (tamano - lado * self.paso) // 2
+        self.x = x + sobra
+        self.y = y + sobra
+
+        # Ancho de todas las casillas juntas, sin el espacio del final.
+        self.largo = lado * self.paso - self.hueco
+
+        # Grosor del borde de cada casilla y de las lineas de los
+        # cuadrantes, que tapan el espacio entre dos casillas.
+        self.borde = max(1, self.celda // 16)
+        self.grosor = 2 * self.hueco
+
+        # Tamano de la letra de los numeros y distancia del numero a la
+        # esquina de la casilla, en proporcion a la casilla de 9x9.
+        self.tamano_fuente = round(60 * self.celda / 50)
+        self.margen = (round(12 * self.celda / 50),
+                       round(2 * self.celda / 50))
+
+        # Ancho y alto de cada nota; None si no caben legibles.
+        nota = (self.celda - 8) // caja
+        self.nota = nota if nota >= NOTA_MINIMA else None
+
+        self.fuente = None
+        self.atlas = None
+
+    def cargar(self):
 
-    # random.shuffle desordena la lista numeros.
-    random.shuffle(numeros)
-    return rellenar_casilla(0, 0, sudoku, numeros)
+        '''
+        Carga la fuente de los numeros y el atlas de las notas. El tablero
+        de 9x9 usa los que se cargaron al iniciar el juego.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        if self.caja == 3:
+            self.fuente = fuente2
+            self.atlas = atlas_notas
+            return
+        self.fuente = recursos.fuente(FUENTE, self.tamano_fuente)
+        if self.nota is not None:
+            self.atlas = AtlasNotas(
+                recursos.fuente(FUENTE, round(self.nota * 10 / 7)),
+                COLOR_NOTAS, self.nota, self.caja)
+
+    def lineas(self):
+
+        '''
+        Calcula las lineas gruesas que separan los cuadrantes.
 
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return list: Tuplas (punto_inicio, punto_final) de cada linea.
+        '''
+
+        # Las lineas van en el espacio antes de la primera casilla de cada
+        # cuadrante y un poco mas alla de las casillas de los extremos.
+        atras = self.hueco - 1
+        lineas = []
+        for b in range(self.caja + 1):
+            posicion = b * self.caja * self.paso - atras
+            lineas.append(((self.x + posicion, self.y),
+                           (self.x + posicion, self.y + self.largo - 1)))
+        for b in range(self.caja + 1):
+            posicion = b * self.caja * self.paso - atras
+            lineas.append(((self.x - 2 * atras, self.y + posicion),
+                           (self.x + self.largo + 2 * atras - 1,
+                            self.y + posicion)))
+        return lineas
 
-def generar_sudoku():
+
+def dibujar_lineas(screen, disposicion):
 
     '''
-    Genera el sudoku final, creando una lista de 9 listas con
-    9 elementos y usando la funcion rellenar_sudoku lo completa.
+    Dibuja las lineas gruesas que separan los cuadrantes del sudoku.
 
-    return list sudoku: Retorna el sudoku completo y validado.
+    param pygame.surface.Surface screen: Pantalla del juego.
+    param Disposicion disposicion: Medidas del tablero.
     '''
 
-    # [0] * 9 crea una lista con 9 elementos iguales a 0.
-    # 9 for i in range(9) genera 9 listas de las que tienen 9 elementos
-    # iguales a 0
-    # Por lo tanto sudoku es una lista de 9 listas con 9 elementos cada una.
-    sudoku = [[0] * 9 for i in range(9)]
+    # (pantalla, color, punto_inicio, punto_final, grosor).
+    for inicio, fin in disposicion.lineas():
+        pygame.draw.line(screen, 'black', inicio, fin, disposicion.grosor)
 
-    # Llama la funcion rellenar_sudoku().
-    rellenar_sudoku(sudoku)
-    return sudoku
 
+def voltear(rects=None):
 
-def general_nivel(boton_menu, boton_terminar, n, win_sound, gameover_sound):
+    '''
+    Actualiza la pantalla (toda, o solo los rectangulos dados) y mide
+    cuanto tarda, para la instrumentacion.
 
+    param list rects: Rectangulos a actualizar, None para toda la pantalla.
     '''
-    Esta funcion se encarga de generar el nivel segun corresponda,
-    dependiendo del nivel al que haga click el usuario, generara
-    otra ventana con su respectivo sudoku, un boton para regresar al menu
-    principal y un boton para revisar el sudoku cuando el usuario lo complete.
 
-    param Boton boton_menu: Boton para regresar al menu principal.
-    param Boton boton_terminar: Boton para ir a revisar la solucion del sudoku.
-    param int n: Numero para especificar el nivel de dificultad,
-                 1 para principiante,2 para intermedio y 3 para avanzado.
-    param pygame.mixer.Sound win_sound: Sonido que se escuchara si el sudoku
-                                        tiene la solucion correcta.
-    param pygame.mixer.Sound gameover_sound: Sonido que se escuchara si el
-                                             sudoku tiene la solucion
-                                             incorrecta.
+    with perfil.fase('voltear'):
+        if perfil.activo:
+            perfil.contar('actualizaciones')
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+
+
+class Escena:
+
+    '''
+    Clase base de las escenas del juego (menu, carga, nivel y resultado).
+    El gestor de escenas llama entrar() al mostrar la escena, evento() por
+    cada evento, actualizar() en cada vuelta del ciclo y salir() al
+    cambiar a otra escena. evento() y actualizar() devuelven la siguiente
+    escena, o None para seguir en la misma.
     '''
 
-    # Llama la funcion generar_sudoku().
-    sudoku = generar_sudoku()
+    # Milisegundos maximos que el ciclo duerme esperando eventos en esta
+    # escena, None para usar la espera del ritmo. Las escenas que la fijan
+    # se animan solas y el ciclo las limita a los cuadros por segundo del
+    # ritmo.
+    espera = None
 
-    # Copia del sudoku.
-    sudoku_copia = sudoku
+    def entrar(self):
 
-    # Con estos dos for los numeros del sudoku se guardan en una lista
-    # de manera convencional, en fila, no como una lista de listas.
-    numeros_sudoku = [str(numero) for fila in sudoku for numero in fila]
+        '''
+        Prepara y dibuja la escena.
 
-    # Si el nivel es principiante se eliminan 38 numeros del sudoku para que
-    # el usuario lo complete.
-    if n == 1:
-        # Crea una lista de tuplas donde cada tupla representa un par de
-        # indices (i, j) correspondientes a una casilla en el Sudoku.
-        indices = [(i, j) for i in range(9) for j in range(9)]
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
 
-        # Selecciona aleatoriamente 38 indices unicos.
-        indices_a_eliminar = random.sample(indices, 38)
+    def evento(self, event):
 
-        # Borra el numero de las celdas seleccionadas.
-        for i, j in indices_a_eliminar:
-            sudoku_copia[i][j] = ''
+        '''
+        Atiende un evento.
 
-    elif n == 2:
-        # Crea una lista de tuplas donde cada tupla representa un par de
-        # indices (i, j) correspondientes a una casilla en el Sudoku.
-        indices = [(i, j) for i in range(9) for j in range(9)]
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.event.Event event: Evento actual en el juego.
 
-        # Selecciona aleatoriamente 48 indices unicos.
-        indices_a_eliminar = random.sample(indices, 48)
+        return Escena: Siguiente escena, o None para seguir en esta.
+        '''
 
-        # Borra el numero de las celdas seleccionadas.
-        for i, j in indices_a_eliminar:
-            sudoku_copia[i][j] = ''
+        return None
 
-    elif n == 3:
-        # Crea una lista de tuplas donde cada tupla representa un par de
-        # indices (i, j) correspondientes a una casilla en el Sudoku.
-        indices = [(i, j) for i in range(9) for j in range(9)]
+    def actualizar(self):
 
-        # Selecciona aleatoriamente 64 indices unicos.
-        indices_a_eliminar = random.sample(indices, 64)
+        '''
+        Revisa el estado de la escena y dibuja lo que haya cambiado.
 
-        # Borra el numero de las celdas seleccionadas.
-        for i, j in indices_a_eliminar:
-            sudoku_copia[i][j] = ''
+        :param self: Referencia al propio objeto dentro de la clase.
 
-    # Este valor de numeros a eliminar es muy facil de
-    # modificar para futuros proyectos en los quieran mas niveles de sudokus.
+        return Escena: Siguiente escena, o None para seguir en esta.
+        '''
 
-    # Anchura del cuadro del sudoku.
-    ancho = 50
+        return None
 
-    # Altura del cuadro del sudoku.
-    alto = 50
+    def salir(self):
 
-    # Lista para almacenar los objetos de las casillas.
-    casillas = []
+        '''
+        Libera los recursos de la escena.
 
-    # id que identificara a cada casilla.
-    id = 1
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
 
-    # Estos dos for generan las 81 casillas mostradas en pantalla.
-    for i in range(9):
-        for j in range(9):
-
-            # Itera sobre cada numero dentro del sudoku generado.
-            numero = sudoku[i][j]
-            # Convierte cada numero en string.
-            numero = str(numero)
-
-            # Crea los objetos, con sus coordenadas en (x, y), un
-            # espacio de 5 entre casa casilla, ancho y alto de la casilla,
-            # el numero que lleva la casilla y el id de la casilla.
-            casilla = Sudoku(270+(i*(ancho+5)), 40+(j*(alto+5)),
-                             alto, ancho, numero, id)
-
-            # Agrega los objetos a una lista.
-            casillas.append(casilla)
-
-            # Aumenta el numero de id para que cada casilla tenga un id
-            # diferente.
-            id += 1
-
-    while True:
-
-        # La funcion mouse.get_pos() devuelve las coordenadas (x, y)
-        # actuales del cursor del mouse en la ventana del juego.
-        posicion_mouse = pygame.mouse.get_pos()
-
-        # Llama el metodo animacion_boton().
-        boton_menu.animacion_boton(posicion_mouse)
-        boton_terminar.animacion_boton(posicion_mouse)
-
-        # Lineas para separar los 9 cuadrantes.
-        # (pantalla, color, punto_inicio, punto_final, grosor).
-        pygame.draw.line(screen, 'black', (266, 40), (266, 529), 10)
-        pygame.draw.line(screen, 'black', (431, 40), (431, 529), 10)
-        pygame.draw.line(screen, 'black', (596, 40), (596, 529), 10)
-        pygame.draw.line(screen, 'black', (762, 40), (762, 529), 10)
-
-        pygame.draw.line(screen, 'black', (262, 36), (767, 36), 10)
-        pygame.draw.line(screen, 'black', (262, 201), (767, 201), 10)
-        pygame.draw.line(screen, 'black', (262, 366), (767, 366), 10)
-        pygame.draw.line(screen, 'black', (262, 531), (767, 531), 10)
-
-        # Este for itera sobre cada evento que ocurre en pygame.
-        # pygame.event.get() devuelve una lista de todos los eventos que
-        # han ocurrido desde la ultima vez que se llamo.
-        for event in pygame.event.get():
-
-            # Este if verifica si el tipo de evento actual es pygame.QUIT.
-            # .QUIT se genera cuando el usuario intenta cerrar
-            # la ventana pygame.
-            # En caso True, se cierra pygame con pygame.quit() y se finaliza
-            # la ejecucion del
-            # programa con sys.exit()
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            # Para objeto de la lista casillas, llama la funcion numeros().
-            for box in casillas:
-                box.numeros(event)
-
-            # Este if verifica si el tipo de evento actual
-            # es pygame.MOUSEBUTTONDOWN.
-            # .MOUSEBUTTONDOWN es un evento que Pygame registra cuando
-            # se presiona un boton del mouse.
-            if event.type == pygame.MOUSEBUTTONDOWN:
-
-                # Estos dos if utilizan el metodo clickeos_mouse() para
-                # ejecutar la funcion que implica presionar el boton
-                # menu o el boton terminar.
-                if boton_menu.clickeos_mouse(posicion_mouse):
-                    main_menu(imagen_boton, imagen_fondo_menu,
-                              principiante_sound, intermedio_sound,
-                              avanzado_sound)
-
-                if boton_terminar.clickeos_mouse(posicion_mouse):
-                    lista_a_ravisar = []
-
-                    # Para todos los numeros del sudoku final del usuario
-                    # los agrega a una lista vacia.
-                    for box in casillas:
-                        lista_a_ravisar.append(box.text)
-
-                    # Si dicha lista es igual a la lista original del sudoku
-                    # significa que el usuario completo el sudoku correctamente
-                    # en el caso contrario significa que el usuario completo
-                    # el sudoku incorrectamente.
-                    if lista_a_ravisar == numeros_sudoku:
-
-                        # Detiene la musica de fondo.
-                        pygame.mixer.music.stop()
-
-                        # Reproduce el sonido para el nivel avanzado.
-                        win_sound = win_sound.play()
-
-                        # El metodo render() se utiliza para renderizar
-                        # el texto.
-                        # Texto, True para bordes suaves, color del texto.
-                        win1 = fuente.render('Felicidades :D', True, 'white')
-                        win2 = fuente.render('sudoku conseguido!', True,
-                                             'white')
-
-                        # Crea un rectangulo que envuelve el texto del boton.
-                        # El rectangulo esta centrado en las coordenadas
-                        # indicadas.
-                        win1_rect = win1.get_rect(center=(550, 580))
-                        win2_rect = win2.get_rect(center=(550, 610))
-
-                        # Esto ciclo se ejecuta en el tiempo que dure el
-                        # sonido para cuando se gana.
-                        # get_busy() verifica si el programa esta
-                        # actualmente reproduciendo algun sonido.
-                        # Devuelve True si el programa esta reproduciendo
-                        # algun sonido y False en caso contrario.
-                        while win_sound.get_busy():
-                            # Esto dibuja el texto en la pantalla, en la
-                            # posicion especificada por win1_rect y
-                            # win2_rect.
-                            screen.blit(win1, win1_rect)
-                            screen.blit(win2, win2_rect)
-
-                            # Esta funcion actualiza la pantalla
-                            # constantemente.
-                            pygame.display.update()
-
-                        # Espera 1 segundo para regresar al menu principal.
-                        pygame.time.delay(1000)
-                        main_menu(imagen_boton, imagen_fondo_menu,
-                                  principiante_sound, intermedio_sound,
-                                  avanzado_sound)
-                    else:
-                        # Detiene la musica de fondo.
-                        pygame.mixer.music.stop()
-
-                        # Reproduce el sonido para el nivel avanzado.
-                        gameover_sound = gameover_sound.play()
-
-                        # El metodo render() se utiliza para renderizar
-                        # el texto.
-                        # Texto, True para bordes suaves, color del texto.
-                        gameover = fuente.render('GAME OVER D:', True, 'white')
-
-                        # Crea un rectangulo que envuelve el texto del boton.
-                        # El rectangulo esta centrado en las coordenadas
-                        # indicadas.
-                        gameover_rect = gameover.get_rect(center=(550, 600))
-
-                        # Esto ciclo se ejecuta en el tiempo que dure el
-                        # sonido para cuando se pierde.
-                        # get_busy() verifica si el programa esta
-                        # actualmente reproduciendo algun sonido.
-                        # Devuelve True si el canal esta reproduciendo algun
-                        # sonido y False en caso contrario.
-                        while gameover_sound.get_busy():
-                            # Esto dibuja el texto en la pantalla, en
-                            # la posicion especificada por gameover_rect.
-                            screen.blit(gameover, gameover_rect)
-
-                            # Esta funcion actualiza la pantalla
-                            # constantemente.
-                            pygame.display.update()
-
-                        # Espera 2 segundos para regresar al menu principal.
-                        pygame.time.delay(2000)
-                        main_menu(imagen_boton, imagen_fondo_menu,
-                                  principiante_sound, intermedio_sound,
-                                  avanzado_sound)
-
-        # Para objeto de la lista casillas, llama la funcion numeros().
-        for box in casillas:
-            box.cuadros(screen)
-
-        # Llama el metodo update().
-        boton_menu.update()
-        boton_terminar.update()
-
-        # Esta funcion actualiza la pantalla constantemente.
-        pygame.display.update()
-
-
-def boton_nivel(imagen_boton, imagen_fondo, n, sonido):
-
-    '''
-    Esta funcion ejecuta el proceso que implica presionar con el mouse
-    un boton de nivel, la animacion de la musica, la animacion de cargando
-    y la deteccion del nivel que fue seleccionado.
-
-    param pygame.surface.Surface imagen_boton: Imagen de los botones de nivel.
-    param pygame.surface.Surface imagen_fondo: Imagen del fondo de los niveles.
-    param int n: Numero para especificar el nivel de dificultad,
-                 1 para principiante,2 para intermedio y 3 para avanzado.
-    param pygame.mixer.Sound sonido: Sonido que se escuchara cuando se abra
-                                     un nivel en especifico.
-    '''
-
-    # Detiene la musica de fondo.
-    pygame.mixer.music.stop()
-
-    # Reproduce el sonido para el nivel avanzado.
-    sonido = sonido.play()
-
-    # El metodo render() se utiliza para renderizar el texto.
-    # Texto, True para bordes suaves, color del texto.
-    cargando = fuente.render('Cargando . . .', True, 'white')
-
-    # Crea un rectangulo que envuelve el texto del boton.
-    # El rectangulo esta centrado en las coordenadas indicadas.
-    cargando_rect = cargando.get_rect(center=(500, 350))
-
-    # Esto ciclo se ejecuta en el tiempo que dure el sonido para
-    # el nivel elegido.
-    # get_busy() verifica si el programa esta actualmente reproduciendo
-    # algun sonido. Devuelve True si el programa esta reproduciendo
-    # algun sonido y False en caso contrario.
-    while sonido.get_busy():
 
-        # Esto dibuja el texto en la pantalla, en la posicion
-        # especificada por cargando_rect
-        screen.blit(cargando, cargando_rect)
+class GestorEscenas:
+
+    '''
+    Clase que ejecuta la escena actual y hace los cambios de escena. Las
+    escenas no se llaman entre si, solo le devuelven al gestor la siguiente
+    escena, asi la pila de llamadas no crece al ir y volver del menu a los
+    niveles y los recursos de cada escena se liberan al salir de ella.
+    '''
+
+    def __init__(self, escena):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param Escena escena: Primera escena del juego.
+        '''
+
+        self.escena = escena
+
+        # Cambios de escena hechos, y los numeros del ultimo tablero de un
+        # nivel que se dejo (None si todavia no se jugo ninguno). Con esto
+        # una reproduccion se compara con su grabacion.
+        self.cambios = 0
+        self.tablero = None
+
+        self.escena.entrar()
+
+    def cambiar(self, escena):
 
-        # Esta funcion actualiza la pantalla constantemente.
-        pygame.display.update()
+        '''
+        Sale de la escena actual y entra a la siguiente.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param Escena escena: Siguiente escena.
+        '''
+
+        self._salir()
+        self.escena = escena
+        self.cambios += 1
+        self.escena.entrar()
+
+    def _salir(self):
+
+        '''
+        Sale de la escena actual, guardando antes los numeros del tablero
+        si es un nivel.
 
-    # Reproduce la musica de fondo.
-    # -1 para que sea un bucle infinito.
-    pygame.mixer.music.play(-1)
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        tablero = getattr(self.escena, 'tablero', None)
+        if tablero is not None:
+            self.tablero = bytes(tablero.celdas)
+        self.escena.salir()
+
+    def procesar(self, eventos):
 
-    # Este while mantiene el juego en funcionamiento continuamente
-    while True:
+        '''
+        Hace una vuelta del ciclo del juego con los eventos dados.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param list eventos: Eventos a atender.
+        '''
+
+        perfil.empezar_cuadro()
+
+        # La vuelta se graba antes de atenderla, por si cierra el juego.
+        if grabadora is not None:
+            grabadora.cuadro(self, ritmo.ahora, ritmo.mouse, eventos)
+
+        # Quita el panel de la instrumentacion antes de que la escena
+        # dibuje, y lo vuelve a poner al final del cuadro.
+        if panel_perfil is not None:
+            panel_perfil.borrar(screen)
+
+        siguiente = None
+        with perfil.fase('eventos'):
+            for event in eventos:
+
+                # Este if verifica si el tipo de evento actual es
+                # pygame.QUIT. .QUIT se genera cuando el usuario intenta
+                # cerrar la ventana pygame.
+                if event.type == pygame.QUIT:
+                    self._salir()
+                    quit()
+
+                # F3 muestra u oculta el panel de la instrumentacion.
+                if (panel_perfil is not None
+                        and event.type == pygame.KEYDOWN
+                        and event.key == pygame.K_F3):
+                    panel_perfil.visible = not panel_perfil.visible
+                    continue
+
+                siguiente = self.escena.evento(event)
+
+                # Si la escena cambio, los eventos que quedan eran para la
+                # escena anterior y se descartan.
+                if siguiente is not None:
+                    break
+
+        # Si ningun evento cambio la escena, la escena revisa su estado y
+        # dibuja lo que haya cambiado.
+        if siguiente is None:
+            with perfil.fase('logica'):
+                siguiente = self.escena.actualizar()
+
+        if siguiente is not None:
+            with perfil.fase('cambio'):
+                self.cambiar(siguiente)
+
+        perfil.terminar_cuadro()
+        if panel_perfil is not None:
+            panel_perfil.dibujar(screen)
+
+    def ejecutar(self):
+
+        '''
+        Ciclo principal del juego: duerme hasta que haya eventos (o pase la
+        espera de la escena) y los procesa.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        while True:
+            animando = self.escena.espera is not None
+            self.procesar(ritmo.eventos(self.escena.espera))
+            ritmo.limitar(animando)
+
+
+class Nivel(Escena):
+
+    '''
+    Escena que muestra el sudoku del nivel segun corresponda, un boton
+    para regresar al menu principal y un boton para revisar el sudoku
+    cuando el usuario lo complete.
+    '''
+
+    def __init__(self, n, caja=3, partida=None):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int n: Numero para especificar el nivel de dificultad,
+                      1 para principiante,2 para intermedio y 3 para
+                      avanzado.
+        :param int caja: Casillas por lado de cada cuadrante: 3 para el
+                         tablero de 9x9, 4 para 16x16 y 5 para 25x25.
+        :param Partida partida: Partida guardada que se continua, None
+                                para empezar un sudoku nuevo.
+        '''
+
+        self.n = n
+        self.caja = caja
+        self.partida = partida
+
+    def entrar(self):
+
+        '''
+        Toma el sudoku del nivel, crea las casillas y dibuja el tablero.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        # Reproduce la musica de fondo, si hay.
+        recursos.tocar_musica()
 
         # Se escribe el nivel de dificultad, dependiendo del valor de n.
-        if n == 1:
+        if self.n == 1:
             nivel = 'Principiante'
-        elif n == 2:
+        elif self.n == 2:
             nivel = 'Intermedio'
-        elif n == 3:
+        elif self.n == 3:
             nivel = 'Avanzado'
 
         # Se pone el fondo de la imagen cargada.
-        screen.blit(imagen_fondo, (0, 0))
+        screen.blit(recursos.imagen("fondo.jpg"), (0, 0))
 
-        # El metodo render() se utiliza para renderizar el texto.
-        # Texto, True para bordes suaves, color del texto.
-        nivel_texto = fuente.render('Nivel', True, 'black')
-        nivel = fuente.render(nivel, True, 'black')
+        # El metodo render() del cache de textos devuelve el texto ya
+        # renderizado. Fuente, texto, color del texto.
+        nivel_texto = cache_textos.render(fuente, 'Nivel', 'black')
+        nivel = cache_textos.render(fuente, nivel, 'black')
 
         # Crea un rectangulo que envuelve el texto del boton.
         # El rectangulo esta centrado en las coordenadas indicadas.
@@ -736,26 +1258,373 @@ def boton_nivel(imagen_boton, imagen_fondo, n, sonido):
         screen.blit(nivel_texto, nivel_texto_rect)
         screen.blit(nivel, nivel_rect)
 
+        # Medidas del tablero segun su tamano.
+        self.disposicion = Disposicion(self.caja)
+        self.disposicion.cargar()
+        lado = self.disposicion.lado
+
+        # Indica la tecla para mostrar las notas y, en los tableros grandes,
+        # el tamano y las letras que se usan.
+        ayudas = []
+        if self.caja != 3:
+            ayudas.append(f'Tablero {lado}x{lado}')
+            ayudas.append(f'Letras A-{DIGITOS[lado]}: 10-{lado}')
+        if self.disposicion.atlas is not None:
+            ayudas.append('Tab: notas')
+        for k, texto in enumerate(ayudas):
+            ayuda = cache_textos.render(fuente_notas, texto, 'black')
+            screen.blit(ayuda, ayuda.get_rect(center=(125, 150 + k * 22)))
+
         # Crea el objeto del boton menu.
-        boton_menu = Botones(imagen_boton, 150, 600, 'Menu Principal')
-        boton_terminar = Botones(imagen_boton, 130, 350, 'Revisar Sudoku')
+        imagen_boton = recursos.imagen(IMAGEN_BOTON, TAMANO_BOTON, alfa=True)
+        self.boton_menu = Botones(imagen_boton, 150, 600, 'Menu Principal')
+        self.boton_terminar = Botones(imagen_boton, 130, 350,
+                                      'Revisar Sudoku')
+
+        # Toma un sudoku listo de la cola del nivel. El hilo de precarga lo
+        # genero (o lo leyo del banco, si existe) mientras sonaba la
+        # introduccion del nivel. El tablero tiene las casillas borradas
+        # (cuidando que tenga una unica solucion) y la solucion; las
+        # casillas escriben directamente en el.
+        # Al continuar una partida guardada el tablero ya viene con los
+        # numeros que habia escrito el jugador.
+        if self.partida is None:
+            self.tablero = precarga.tomar(self.n, self.caja)
+            self.jugado = 0
+            if grabadora is not None:
+                grabadora.tablero(self.tablero, self.n, self.caja)
+        else:
+            self.tablero = self.partida.tablero
+            self.jugado = self.partida.milisegundos
+            self.partida = None
+
+        # El tiempo jugado se cuenta desde aqui, y la partida se guarda
+        # cada AUTOGUARDADO_CADA milisegundos.
+        self.inicio = self.ultimo_guardado = ritmo.ahora
+
+        # Si el nivel termina, la partida guardada se borra en lugar de
+        # guardarse al salir.
+        self.terminado = False
+
+        # Cuenta los numeros de cada fila, columna y cuadrante mientras el
+        # jugador escribe, para marcar los repetidos y saber en O(1) si el
+        # sudoku esta resuelto.
+        self.conteo = Conteo(self.tablero.celdas, self.caja)
+
+        # Candidatos de las casillas vacias, que el jugador puede mostrar
+        # u ocultar con la tecla Tab.
+        self.notas = Notas(self.conteo, self.tablero.celdas)
+
+        # Lista para almacenar los objetos de las casillas.
+        self.casillas = []
+
+        # Estos dos for generan las casillas mostradas en pantalla (81 en
+        # el tablero de 9x9).
+        d = self.disposicion
+        for i in range(lado):
+            for j in range(lado):
+
+                # Crea los objetos, con sus coordenadas en (x, y), ancho y
+                # alto de la casilla, el tablero y la posicion de la
+                # casilla en el tablero (fila i, columna j).
+                casilla = Sudoku(d.x + i * d.paso, d.y + j * d.paso,
+                                 d.celda, d.celda, self.tablero,
+                                 i * lado + j, self.conteo, self.notas, d)
+
+                # Agrega los objetos a una lista.
+                self.casillas.append(casilla)
+
+        # Reparte los clicks y las teclas a las casillas, con las mismas
+        # medidas con las que se crearon.
+        self.despachador = Despachador(self.casillas, lado, d.x, d.y,
+                                       d.paso, d.celda)
+
+        # Dibuja el tablero completo una sola vez; despues solo se vuelven
+        # a dibujar las casillas y botones que cambien.
+        self.render = RenderTablero(self.casillas,
+                                    [self.boton_menu, self.boton_terminar], d)
+        self.render.iniciar(screen)
+
+    def evento(self, event):
+
+        '''
+        Atiende los clicks y las teclas del nivel.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.event.Event event: Evento actual en el juego.
+
+        return Escena: El menu principal o el resultado, o None.
+        '''
+
+        # La tecla Tab muestra u oculta las notas; solo hay que volver a
+        # dibujar las casillas vacias. Si las notas no caben en las
+        # casillas, la tecla no hace nada.
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+            if self.disposicion.atlas is None:
+                return None
+            self.notas.visibles = not self.notas.visibles
+            for casilla in self.casillas:
+                if not self.tablero[casilla.k]:
+                    casilla.sucio = True
+            return None
+
+        # El despachador le pasa el evento solo a la casilla afectada.
+        self.despachador.evento(event)
+
+        # Este if verifica si el tipo de evento actual
+        # es pygame.MOUSEBUTTONDOWN.
+        # .MOUSEBUTTONDOWN es un evento que Pygame registra cuando
+        # se presiona un boton del mouse.
+        if event.type == pygame.MOUSEBUTTONDOWN:
+
+            # Estos dos if utilizan el metodo clickeos_mouse() para
+            # ejecutar la funcion que implica presionar el boton
+            # menu o el boton terminar.
+            if self.boton_menu.clickeos_mouse(event.pos):
+                return MenuPrincipal()
+
+            if self.boton_terminar.clickeos_mouse(event.pos):
+                self.terminado = True
+                autoguardado.borrar()
+
+                # Si el tablero esta lleno y ningun numero se repite
+                # significa que el usuario completo el sudoku correctamente
+                # (aunque no sea la misma solucion que se genero), en el
+                # caso contrario significa que el usuario completo el
+                # sudoku incorrectamente.
+                if self.conteo.resuelto():
+                    return Resultado(recursos.sonido(SONIDO_VICTORIA),
+                                     ['Felicidades :D',
+                                      'sudoku conseguido!'],
+                                     (550, 580), 1000)
+                return Resultado(recursos.sonido(SONIDO_DERROTA),
+                                 ['GAME OVER D:'],
+                                 (550, 600), 2000)
+        return None
+
+    def actualizar(self):
+
+        '''
+        Dibuja solo lo que cambio y actualiza esa parte de la pantalla.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        # ritmo.mouse tiene las coordenadas (x, y) del cursor del mouse
+        # en la ventana del juego en esta vuelta.
+        self.render.dibujar(screen, ritmo.mouse)
+
+        # Guarda la partida cada tanto; el ciclo despierta al menos cada
+        # medio segundo aunque no haya eventos.
+        ahora = ritmo.ahora
+        if ahora - self.ultimo_guardado >= AUTOGUARDADO_CADA:
+            self.guardar()
+        return None
+
+    def guardar(self):
+
+        '''
+        Pide guardar la partida. Aqui solo se copian los bytes del tablero,
+        el archivo lo escribe el hilo del autoguardado.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        ahora = ritmo.ahora
+        self.ultimo_guardado = ahora
+        autoguardado.guardar(empaquetar(self.tablero, self.n, self.caja,
+                                        self.jugado + ahora - self.inicio))
+
+    def salir(self):
+
+        '''
+        Guarda la partida, si no termino, y libera las casillas, los
+        botones y la copia del tablero.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        # Al volver al menu o cerrar la ventana la partida se guarda, para
+        # poder continuarla desde el menu.
+        if not self.terminado:
+            self.guardar()
+
+        self.casillas = None
+        self.despachador = None
+        self.render = None
+        self.disposicion = None
+        self.boton_menu = None
+        self.boton_terminar = None
+        self.tablero = None
+        self.conteo = None
+        self.notas = None
+
+
+class Resultado(Escena):
+
+    '''
+    Escena que muestra si el sudoku se completo bien o no, mientras suena
+    el sonido correspondiente, y luego regresa al menu principal.
+    '''
+
+    # Revisa cada 50 ms si ya termino el sonido.
+    espera = 50
+
+    def __init__(self, sonido, textos, centro, demora):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.mixer.Sound sonido: Sonido que se escuchara.
+        :param list textos: Lineas de texto a mostrar.
+        :param tuple centro: Centro (x, y) de la primera linea, las demas
+                             van 30 pixeles mas abajo cada una.
+        :param int demora: Milisegundos a esperar despues del sonido.
+        '''
+
+        self.sonido = sonido
+        self.textos = textos
+        self.centro = centro
+        self.demora = demora
+
+    def entrar(self):
+
+        '''
+        Reproduce el sonido y muestra los textos.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        # Detiene la musica de fondo y reproduce el sonido.
+        recursos.detener_musica()
+        self.canal = self.sonido.play() if self.sonido is not None else None
+
+        # Esto dibuja los textos en la pantalla, uno debajo del otro.
+        rects = []
+        x, y = self.centro
+        for k, texto in enumerate(self.textos):
+            superficie = cache_textos.render(fuente, texto, 'white')
+            rects.append(superficie.get_rect(center=(x, y + k * 30)))
+            screen.blit(superficie, rects[-1])
+        voltear(rects)
+
+        # Momento en que termino el sonido, None mientras suena.
+        self.fin = None
+
+    def actualizar(self):
+
+        '''
+        Espera a que termine el sonido y la demora para volver al menu.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return Escena: El menu principal, o None mientras tanto.
+        '''
+
+        # get_busy() verifica si el canal esta actualmente reproduciendo
+        # algun sonido.
+        if self.canal is not None and self.canal.get_busy():
+            return None
+        if self.fin is None:
+            self.fin = ritmo.ahora
+        if ritmo.ahora - self.fin >= self.demora:
+            return MenuPrincipal()
+        return None
+
+    def salir(self):
 
-        # Se ingresa al nivel presionado con el mouse.
+        '''
+        Suelta el canal de sonido.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        self.canal = None
+
+
+class CargaNivel(Escena):
+
+    '''
+    Escena que se muestra al presionar con el mouse un boton de nivel:
+    suena la introduccion del nivel con el texto de cargando mientras el
+    hilo de precarga tiene listo el sudoku.
+    '''
+
+    # Revisa cada 50 ms si ya termino el sonido.
+    espera = 50
+
+    def __init__(self, n, sonido, caja=3):
 
-        # Nivel principiante.
-        if n == 1:
-            general_nivel(boton_menu, boton_terminar, n,
-                          win_sound, gameover_sound)
+        '''
+        Constructor de la clase.
 
-        # Nivel intermedio.
-        elif n == 2:
-            general_nivel(boton_menu, boton_terminar, n,
-                          win_sound, gameover_sound)
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int n: Numero para especificar el nivel de dificultad,
+                      1 para principiante,2 para intermedio y 3 para
+                      avanzado.
+        :param pygame.mixer.Sound sonido: Sonido que se escuchara cuando se
+                                          abra un nivel en especifico.
+        :param int caja: Casillas por lado de cada cuadrante del tablero.
+        '''
 
-        # Nivel avanzado.
-        elif n == 3:
-            general_nivel(boton_menu, boton_terminar, n,
-                          win_sound, gameover_sound)
+        self.n = n
+        self.sonido = sonido
+        self.caja = caja
+
+    def entrar(self):
+
+        '''
+        Reproduce la introduccion del nivel y muestra el texto de cargando.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        # Le pide al hilo de precarga que tenga listo un sudoku de este
+        # nivel mientras suena la introduccion.
+        precarga.preparar(self.n, self.caja)
+
+        # Detiene la musica de fondo y reproduce el sonido del nivel.
+        recursos.detener_musica()
+        self.canal = self.sonido.play() if self.sonido is not None else None
+
+        # El metodo render() del cache de textos devuelve el texto ya
+        # renderizado. Fuente, texto, color del texto.
+        cargando = cache_textos.render(fuente, 'Cargando . . .', 'white')
+
+        # Crea un rectangulo que envuelve el texto del boton.
+        # El rectangulo esta centrado en las coordenadas indicadas.
+        cargando_rect = cargando.get_rect(center=(500, 350))
+
+        # Esto dibuja el texto en la pantalla una sola vez.
+        screen.blit(cargando, cargando_rect)
+        voltear([cargando_rect])
+
+    def actualizar(self):
+
+        '''
+        Pasa al nivel cuando termina la introduccion. Mientras tanto el
+        ciclo duerme, y el hilo de precarga tiene el procesador libre para
+        generar el sudoku.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return Escena: El nivel, o None mientras suena la introduccion.
+        '''
+
+        if self.canal is not None and self.canal.get_busy():
+            return None
+        return Nivel(self.n, self.caja)
+
+    def salir(self):
+
+        '''
+        Suelta el canal de sonido.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        self.canal = None
 
 
 def quit():
@@ -764,151 +1633,318 @@ def quit():
     Funcion que se encarga de cerrar el juego.
     '''
 
+    # Deja de decodificar los sonidos que falten.
+    recursos.cerrar()
+    # Termina de escribir la partida guardada y la grabacion.
+    autoguardado.detener()
+    if grabadora is not None:
+        grabadora.cerrar()
+    # Guarda la traza de la instrumentacion, si se pidio.
+    if perfil.trazando:
+        perfil.exportar(os.environ[VARIABLE_TRAZA])
     # Utiliza pygame.quit() para cerrar el modulo de Pygame.
     pygame.quit()
     # Utiliza sys.exit() para salir del programa.
     sys.exit()
 
 
-def main_menu(imagen_boton, imagen_fondo_menu, principiante_sound,
-              intermedio_sound, avanzado_sound):
+class MenuPrincipal(Escena):
 
     '''
-    Esta funcion genera el menu principal del juego, con 4 botones,
-    3 botones de nivel de juego y un boton para salir.
-
-    param pygame.surface.Surface imagen_boton: Imagen de los botones de nivel.
-    param pygame.surface.Surface imagen_fondo_menu: Imagen del fondo del menu.
-    param pygame.mixer.Sound principiante_sound: Sonido para nivel
-                                                 principiante.
-    param pygame.mixer.Sound intermedio_sound: Sonido para nivel intermedio.
-    param pygame.mixer.Sound avanzado_sound: Sonido para nivel avanzado.
+    Escena del menu principal del juego, con 5 botones, 3 botones de
+    nivel de juego, uno para escoger el tamano del tablero y un boton para
+    salir. Si hay una partida guardada, un sexto boton la continua.
     '''
 
-    # Se define un numero para cada nivel.
-    p = 1
-    i = 2
-    a = 3
+    # Tamano de cuadrante escogido. Es de la clase y no de cada menu, para
+    # que se mantenga al volver al menu despues de un nivel.
+    caja = 3
 
-    # Reproduce la musica de fondo.
-    # -1 para que sea un bucle infinito.
-    pygame.mixer.music.play(-1)
+    def entrar(self):
 
-    # Este while mantiene el juego en funcionamiento continuamente
-    while True:
+        '''
+        Crea los botones del menu y reproduce la musica de fondo.
 
-        # La funcion mouse.get_pos() devuelve las coordenadas (x, y)
-        # actuales del cursor del mouse en la ventana del juego.
-        posicion_mouse = pygame.mouse.get_pos()
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
+
+        # Reproduce la musica de fondo, si hay.
+        recursos.tocar_musica()
 
         # Crea el objeto del boton Principiante.
-        boton_principiante = Botones(imagen_boton, 170, 300, "PRINCIPIANTE")
+        imagen_boton = recursos.imagen(IMAGEN_BOTON, TAMANO_BOTON, alfa=True)
+        self.boton_principiante = Botones(imagen_boton, 170, 300,
+                                          "PRINCIPIANTE")
 
         # Crea el objeto del boton Intermedio.
-        boton_intermedio = Botones(imagen_boton, 170, 450, "INTERMEDIO")
+        self.boton_intermedio = Botones(imagen_boton, 170, 450, "INTERMEDIO")
 
         # Crea el objeto del boton Avanzado.
-        boton_avanzado = Botones(imagen_boton, 170, 600, "AVANZADO")
+        self.boton_avanzado = Botones(imagen_boton, 170, 600, "AVANZADO")
 
-        # Crea el objeto del boton Avanzado.
-        boton_quit = Botones(imagen=None, x_pos=730,
-                             y_pos=620, texto_input="Quit.")
+        # Crea el objeto del boton Quit.
+        self.boton_quit = Botones(imagen=None, x_pos=730,
+                                  y_pos=620, texto_input="Quit.")
+
+        # Crea el boton que cambia el tamano del tablero.
+        self.boton_tamano = Botones(imagen=None, x_pos=620, y_pos=560,
+                                    texto_input=texto_tamano(self.caja))
+
+        self.botones = [self.boton_principiante, self.boton_intermedio,
+                        self.boton_avanzado, self.boton_tamano,
+                        self.boton_quit]
+
+        # Crea el boton para continuar la partida guardada, si hay una.
+        self.boton_continuar = None
+        if autoguardado.hay_partida():
+            self.boton_continuar = Botones(imagen=None, x_pos=620,
+                                           y_pos=500,
+                                           texto_input="Continuar")
+            self.botones.append(self.boton_continuar)
+
+        # La primera vez se dibuja todo el menu.
+        self.dibujar(ritmo.mouse)
+
+    def evento(self, event):
+
+        '''
+        Atiende los clicks en los botones del menu.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param pygame.event.Event event: Evento actual en el juego.
+
+        return Escena: La carga del nivel escogido, o None.
+        '''
+
+        # Este if verifica si el tipo de evento actual
+        # es pygame.MOUSEBUTTONDOWN.
+        # .MOUSEBUTTONDOWN es un evento que Pygame registra cuando
+        # se presiona un boton del mouse.
+        if event.type == pygame.MOUSEBUTTONDOWN:
+
+            # Estos tres if utilizan el metodo clickeos_mouse() para
+            # ejecutar la funcion que implica presionar un boton
+            # en especifico.
+            if self.boton_principiante.clickeos_mouse(event.pos):
+                return CargaNivel(1, recursos.sonido(SONIDO_NIVEL[1]),
+                                  self.caja)
+            if self.boton_intermedio.clickeos_mouse(event.pos):
+                return CargaNivel(2, recursos.sonido(SONIDO_NIVEL[2]),
+                                  self.caja)
+            if self.boton_avanzado.clickeos_mouse(event.pos):
+                return CargaNivel(3, recursos.sonido(SONIDO_NIVEL[3]),
+                                  self.caja)
+
+            # El boton del tamano pasa al siguiente tamano de tablero y se
+            # vuelve a dibujar el menu con el texto nuevo.
+            if self.boton_tamano.clickeos_mouse(event.pos):
+                MenuPrincipal.caja = CAJAS[(CAJAS.index(self.caja) + 1)
+                                           % len(CAJAS)]
+                self.boton_tamano = Botones(imagen=None, x_pos=620,
+                                            y_pos=560,
+                                            texto_input=texto_tamano(
+                                                self.caja))
+                self.botones[3] = self.boton_tamano
+                self.dibujar(event.pos)
+
+            # Continuar la partida guardada no pasa por la introduccion
+            # del nivel: el tablero sale del registro que ya esta en
+            # memoria.
+            if (self.boton_continuar is not None
+                    and self.boton_continuar.clickeos_mouse(event.pos)):
+                partida = autoguardado.reanudar()
+                if partida is not None:
+                    return Nivel(partida.nivel, partida.caja, partida)
+            if self.boton_quit.clickeos_mouse(event.pos):
+                quit()
+        return None
+
+    def actualizar(self):
+
+        '''
+        Vuelve a dibujar el menu si algun boton cambio de color.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
 
         # Este for ejecuta la animacion del boton a los 4 botones creados,
         # utilizando el metodo creado animacion_boton y utilizando
-        # pygame.mouse.get_pos() que se guarda en posicion_mouse.
-        for boton in [boton_principiante, boton_intermedio,
-                      boton_avanzado, boton_quit]:
-            boton.animacion_boton(posicion_mouse)
-
-        # Este for itera sobre cada evento que ocurre en pygame.
-        # pygame.event.get() devuelve una lista de todos los eventos que
-        # han ocurrido desde la ultima vez que se llamo.
-        for event in pygame.event.get():
-
-            # Este if verifica si el tipo de evento actual es pygame.QUIT.
-            # .QUIT se genera cuando el usuario intenta cerrar
-            # la ventana pygame.
-            # En caso True, se cierra pygame con pygame.quit() y se finaliza
-            # la ejecucion del programa con sys.exit()
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            # Este if verifica si el tipo de evento actual
-            # es pygame.MOUSEBUTTONDOWN.
-            # .MOUSEBUTTONDOWN es un evento que Pygame registra cuando
-            # se presiona un boton del mouse.
-            if event.type == pygame.MOUSEBUTTONDOWN:
-
-                # Estos tres if utilizan el metodo clickeos_mouse() para
-                # ejecutar la funcion que implica presionar un boton
-                # en especifico.
-                if boton_principiante.clickeos_mouse(posicion_mouse):
-                    boton_nivel(imagen_boton, imagen_fondo, p,
-                                principiante_sound)
-                if boton_intermedio.clickeos_mouse(posicion_mouse):
-                    boton_nivel(imagen_boton, imagen_fondo, i,
-                                intermedio_sound)
-                if boton_avanzado.clickeos_mouse(posicion_mouse):
-                    boton_nivel(imagen_boton, imagen_fondo, a,
-                                avanzado_sound)
-                if boton_quit.clickeos_mouse(posicion_mouse):
-                    quit()
+        # la posicion del mouse en esta vuelta, que se guarda en
+        # posicion_mouse.
+        posicion_mouse = ritmo.mouse
+        cambios = [boton.animacion_boton(posicion_mouse)
+                   for boton in self.botones]
+        if any(cambios):
+            self.dibujar(posicion_mouse)
+
+        # Si se puede continuar una partida, carga el fondo del nivel
+        # mientras el menu esta quieto, para que continuar no tenga que
+        # esperar a decodificar la imagen.
+        elif self.boton_continuar is not None:
+            recursos.imagen("fondo.jpg")
+        return None
+
+    def dibujar(self, posicion_mouse):
 
-        # Se pone el fondo de la imagen cargada.
-        screen.blit(imagen_fondo_menu, (0, 0))
+        '''
+        Dibuja el fondo y los botones del menu.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param tuple posicion_mouse: Coordenadas (x, y) del mouse.
+        '''
 
-        # Llama el metodo update().
-        boton_principiante.update()
-        boton_intermedio.update()
-        boton_avanzado.update()
-        boton_quit.update()
+        with perfil.fase('dibujo'):
+            for boton in self.botones:
+                boton.animacion_boton(posicion_mouse)
 
-        # Esta funcion actualiza la pantalla constantemente.
-        pygame.display.update()
+            # Se pone el fondo de la imagen cargada.
+            screen.blit(recursos.imagen("fondo_menu.jpg"), (0, 0))
 
+            # Llama el metodo update().
+            for boton in self.botones:
+                boton.update()
 
-if __name__ == '__main__':
-    pygame.init()  # Inicializa pygame.
-    screen = pygame.display.set_mode((800, 700))  # Genera la pantalla.
-    pygame.display.set_caption("sudoku.py")
-    # fuente de letra a utilizar.
-    fuente = pygame.font.Font("WaHandwriting-Regular.ttf", 37)
-    # fuente de letra a utilizar para los numeros.
-    fuente2 = pygame.font.Font("WaHandwriting-Regular.ttf", 60)
+            # Esta funcion actualiza la pantalla.
+            voltear()
 
-    # Carga la imagen de los botones para el nivel
-    # de dificultad.
-    imagen_boton = pygame.image.load("boton.png")
+    def salir(self):
 
-    # Ajusta el tamano de los botones para el nivel de dificultad.
-    imagen_boton = pygame.transform.scale(imagen_boton, (268, 150))
+        '''
+        Libera los botones del menu.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        '''
 
-    # Carga la imagen de fondo del menu.
-    imagen_fondo_menu = pygame.image.load("fondo_menu.jpg")
+        self.botones = None
+        self.boton_principiante = None
+        self.boton_intermedio = None
+        self.boton_avanzado = None
+        self.boton_tamano = None
+        self.boton_quit = None
+        self.boton_continuar = None
 
-    # Carga la imagen de fondo general.
-    imagen_fondo = pygame.image.load("fondo.jpg")
 
-    # Carga la musica de fondo.
-    pygame.mixer.music.load("20200317.wav")
+def texto_tamano(caja):
 
-    # Carga el sonido para el nivel principiante.
-    principiante_sound = pygame.mixer.Sound("principiante_sound.mp3")
+    '''
+    Texto del boton del tamano del tablero.
+
+    param int caja: Casillas por lado de cada cuadrante.
+
+    return str: El texto, por ejemplo 'Tablero 9x9'.
+    '''
 
-    # Carga el sonido para el nivel intermedio.
-    intermedio_sound = pygame.mixer.Sound("intermedio_sound.mp3")
+    return f'Tablero {caja * caja}x{caja * caja}'
 
-    # Carga el sonido para el nivel avanzado.
-    avanzado_sound = pygame.mixer.Sound("avanzado_sound.mp3")
 
-    # Carga el sonido para victorias.
-    win_sound = pygame.mixer.Sound("win_sound.mp3")
+def iniciar(ruta_banco="sudokus.bin", sonido=True,
+            ruta_partida="partida.sav"):
 
-    # Carga el sonido para derrotas.
-    gameover_sound = pygame.mixer.Sound("gameover_sound.mp3")
+    '''
+    Abre la ventana del juego y prepara lo necesario para mostrar el menu
+    principal lo antes posible: la pantalla, las fuentes y los textos del
+    menu. Las imagenes se cargan cuando se dibujan por primera vez y los
+    sonidos se decodifican en un hilo aparte.
+
+    param str ruta_banco: Banco de sudokus pregenerados, si no existe (o
+                          es None) los sudokus se generan al empezar cada
+                          nivel.
+    param bool sonido: False para jugar sin sonido.
+    param str ruta_partida: Archivo donde se guarda la partida en curso,
+                            None para no guardarla.
+    '''
+
+    global screen, fuente, fuente2, fuente_notas, atlas_notas, cache_textos
+    global recursos, banco, precarga, ritmo, panel_perfil, autoguardado
+    global grabadora
+
+    # Enciende la instrumentacion si se pidio, antes de arrancar la
+    # precarga para que la traza tambien tenga la generacion.
+    traza = os.environ.get(VARIABLE_TRAZA)
+    if os.environ.get(VARIABLE_PERFIL) or traza:
+        perfil.activar(trazar=bool(traza))
+
+    pygame.init()  # Inicializa pygame.
+    if not sonido:
+        pygame.mixer.quit()
+    screen = pygame.display.set_mode((800, 700))  # Genera la pantalla.
+    pygame.display.set_caption("sudoku.py")
+
+    # Carga las imagenes, fuentes y sonidos de la carpeta del juego.
+    recursos = Recursos(os.path.dirname(os.path.abspath(__file__)))
+
+    # fuente de letra a utilizar.
+    fuente = recursos.fuente(FUENTE, 37)
+    # fuente de letra a utilizar para los numeros.
+    fuente2 = recursos.fuente(FUENTE, 60)
+    # fuente de letra a utilizar para las notas.
+    fuente_notas = recursos.fuente(FUENTE, 20)
+
+    # Numeros pequenos de las notas, renderizados una sola vez.
+    atlas_notas = AtlasNotas(fuente_notas, COLOR_NOTAS, 14)
+
+    # Cache de textos renderizados. Se renderizan desde el inicio los
+    # 9 numeros en los colores de las casillas y los textos de los
+    # botones en cada color, para no renderizar nada en los ciclos.
+    cache_textos = CacheTexto()
+    cache_textos.precargar(fuente2, DIGITOS[:10],
+                           [COLOR_PISTA, COLOR_JUGADOR, COLOR_CONFLICTO])
+    cache_textos.precargar(fuente_notas, ['Tab: notas'], ['black'])
+    cache_textos.precargar(fuente, ["PRINCIPIANTE", "INTERMEDIO", "AVANZADO",
+                                    "Menu Principal", "Revisar Sudoku"],
+                           ["black", "red"])
+    cache_textos.precargar(fuente, ["Quit.", "Continuar"]
+                           + [texto_tamano(caja) for caja in CAJAS],
+                           ["white", "red"])
+    cache_textos.precargar(fuente, ['Nivel', 'Principiante', 'Intermedio',
+                                    'Avanzado'], ['black'])
+    cache_textos.precargar(fuente, ['Cargando . . .', 'Felicidades :D',
+                                    'sudoku conseguido!', 'GAME OVER D:'],
+                           ['white'])
+
+    # Carga la musica de fondo; si no esta, el juego sigue sin musica.
+    recursos.cargar_musica("20200317.wav")
+
+    # Decodifica los sonidos de los niveles en segundo plano, mientras se
+    # muestra el menu.
+    recursos.precargar_sonidos([SONIDO_NIVEL[1], SONIDO_NIVEL[2],
+                                SONIDO_NIVEL[3], SONIDO_VICTORIA,
+                                SONIDO_DERROTA])
+
+    # Abre el banco de sudokus pregenerados, si existe.
+    banco = None
+    if ruta_banco is not None and os.path.exists(ruta_banco):
+        banco = Banco(ruta_banco)
+
+    # Arranca el hilo que va dejando sudokus listos de cada nivel.
+    precarga = Precarga(banco=banco)
+    precarga.iniciar()
+
+    # Lee la partida guardada, si hay, y arranca el hilo que la escribe.
+    autoguardado = Autoguardado(ruta_partida)
+    autoguardado.iniciar()
+
+    # Graba la sesion, si se pidio, empezando por la partida que se puede
+    # continuar desde el menu.
+    grabadora = None
+    if os.environ.get(VARIABLE_GRABACION):
+        grabadora = Grabadora(os.environ[VARIABLE_GRABACION])
+        grabadora.iniciar(autoguardado.ultima)
+
+    # Controla el ritmo de los ciclos del juego.
+    ritmo = Ritmo()
+
+    # Panel con los tiempos de cada cuadro; si solo se pidio la traza
+    # empieza oculto y se muestra con F3.
+    panel_perfil = None
+    if perfil.activo:
+        panel_perfil = PanelPerfil(pygame.font.Font(None, 18),
+                                   (0, 0, 262, 72))
+        panel_perfil.visible = bool(os.environ.get(VARIABLE_PERFIL))
+
+
+if __name__ == '__main__':
+    iniciar()
 
-    # Llama al menu principal.
-    main_menu(imagen_boton, imagen_fondo_menu, principiante_sound,
-              intermedio_sound, avanzado_sound)
+    # Empieza el juego en el menu principal.
+    GestorEscenas(MenuPrincipal()).ejecutar()
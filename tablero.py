@@ -0,0 +1,241 @@
+'''
+Tablero compacto del sudoku.
+
+Un solo tipo de tablero que comparten el generador, el banco, las casillas
+de la pantalla y la revision final. Las 81 casillas se guardan por filas en
+un bytearray (0 para las casillas vacias), las pistas en un mapa de 81 bits
+y la solucion en 81 bytes. Copiar un tablero es copiar 81 bytes y comparar
+el tablero con la solucion es una sola comparacion de bytes, sin pasar
+por cadenas de texto.
+
+Los tableros de 16x16 y 25x25 usan la misma clase con mas casillas: se
+crean con Tablero.de_celdas() y en el texto los numeros del 10 en adelante
+se escriben con letras.
+'''
+
+import math
+
+# Mapa de pistas de un tablero completo, con las 81 casillas como pista.
+PISTAS_TODAS = (1 << 81) - 1
+
+# Tabla para traducir los numeros 0-25 a los caracteres '0'-'9' y 'A'-'P'
+# con bytes.translate(), como en geometria.SIMBOLOS.
+_A_TEXTO = b'0123456789ABCDEFGHIJKLMNOP' + bytes(230)
+
+# Tabla inversa, traduce '0'-'9' a 0-9, 'A'-'P' a 10-25 y '.' a 0.
+_DE_TEXTO = bytearray(256)
+_DE_TEXTO[48:58] = range(10)
+_DE_TEXTO[65:81] = range(10, 26)
+
+
+class Tablero:
+
+    '''
+    Clase que guarda los numeros de las 81 casillas, cuales son pistas y
+    la solucion del sudoku.
+    '''
+
+    __slots__ = ('celdas', 'pistas', 'solucion')
+
+    def __init__(self, celdas=None, pistas=0, solucion=None):
+
+        '''
+        Constructor de la clase.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param bytes celdas: Los 81 numeros por filas, 0 para las casillas
+                             vacias. None para un tablero vacio.
+        :param int pistas: Mapa de bits, el bit k encendido indica que la
+                           casilla k es una pista y no se puede cambiar.
+        :param bytes solucion: Los 81 numeros de la solucion, None si no
+                               se conoce.
+        '''
+
+        self.celdas = bytearray(81) if celdas is None else bytearray(celdas)
+        self.pistas = pistas
+        self.solucion = None if solucion is None else bytes(solucion)
+
+    @classmethod
+    def de_listas(cls, sudoku, solucion=None):
+
+        '''
+        Crea un tablero a partir de una lista de 9 listas. Las casillas que
+        tienen numero se toman como pistas.
+
+        :param list sudoku: Lista de 9 listas, 0 para las casillas vacias.
+        :param solucion: Solucion como lista de 9 listas o como 81 bytes,
+                         None si no se conoce.
+
+        return Tablero: El tablero.
+        '''
+
+        celdas = bytearray(numero for fila in sudoku for numero in fila)
+        if solucion is not None and not isinstance(solucion,
+                                                   (bytes, bytearray)):
+            solucion = bytes(numero for fila in solucion for numero in fila)
+        return cls(celdas, _mapa_pistas(celdas), solucion)
+
+    @classmethod
+    def de_celdas(cls, celdas, solucion=None):
+
+        '''
+        Crea un tablero a partir de los numeros de las casillas por filas,
+        de cualquier tamano. Las casillas con numero se toman como pistas.
+
+        :param bytes celdas: Los numeros, 0 para las casillas vacias.
+        :param bytes solucion: Los numeros de la solucion, None si no se
+                               conoce.
+
+        return Tablero: El tablero.
+        '''
+
+        return cls(celdas, _mapa_pistas(celdas), solucion)
+
+    @classmethod
+    def de_texto(cls, texto, solucion=None):
+
+        '''
+        Crea un tablero a partir de una cadena de 81 caracteres, '0' o '.'
+        para las casillas vacias. Las casillas con numero son pistas.
+
+        :param str texto: Cadena de 81 caracteres.
+        :param str solucion: Cadena de 81 digitos, None si no se conoce.
+
+        return Tablero: El tablero.
+        '''
+
+        celdas = bytearray(texto.strip().encode()).translate(_DE_TEXTO)
+        if solucion is not None:
+            solucion = solucion.strip().encode().translate(_DE_TEXTO)
+        return cls(celdas, _mapa_pistas(celdas), solucion)
+
+    def a_listas(self):
+
+        '''
+        Devuelve los numeros del tablero como una lista de listas, una por
+        fila (9 en el sudoku de 9x9).
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return list: Lista de filas, 0 para las casillas vacias.
+        '''
+
+        celdas = self.celdas
+        lado = math.isqrt(len(celdas))
+        return [list(celdas[k:k + lado]) for k in range(0, len(celdas), lado)]
+
+    def a_texto(self):
+
+        '''
+        Devuelve los numeros del tablero como 81 digitos.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return str: Cadena de 81 digitos, 0 para las casillas vacias.
+        '''
+
+        return a_texto(self.celdas)
+
+    def copiar(self):
+
+        '''
+        Devuelve una copia independiente del tablero.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return Tablero: La copia.
+        '''
+
+        # La solucion es inmutable, se puede compartir.
+        copia = Tablero.__new__(Tablero)
+        copia.celdas = self.celdas[:]
+        copia.pistas = self.pistas
+        copia.solucion = self.solucion
+        return copia
+
+    def es_pista(self, k):
+
+        '''
+        Indica si la casilla k es una pista del sudoku.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+        :param int k: Casilla, fila * 9 + columna.
+
+        return bool: True si la casilla es una pista.
+        '''
+
+        return self.pistas >> k & 1 == 1
+
+    def completo(self):
+
+        '''
+        Indica si ya no quedan casillas vacias.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return bool: True si todas las casillas tienen numero.
+        '''
+
+        return 0 not in self.celdas
+
+    def resuelto(self):
+
+        '''
+        Indica si el tablero es igual a la solucion.
+
+        :param self: Referencia al propio objeto dentro de la clase.
+
+        return bool: True si el tablero esta resuelto.
+        '''
+
+        return self.celdas == self.solucion
+
+    def __getitem__(self, k):
+        return self.celdas[k]
+
+    def __setitem__(self, k, numero):
+        self.celdas[k] = numero
+
+    def __eq__(self, otro):
+        if not isinstance(otro, Tablero):
+            return NotImplemented
+        return self.celdas == otro.celdas and self.pistas == otro.pistas
+
+    def __hash__(self):
+        # El hash depende de los numeros actuales; un tablero no se debe
+        # modificar mientras se use como llave de un diccionario.
+        return hash((bytes(self.celdas), self.pistas))
+
+    def __repr__(self):
+        return f'Tablero({self.a_texto()!r})'
+
+
+def a_texto(numeros):
+
+    '''
+    Convierte 81 numeros (las celdas o la solucion de un tablero) en una
+    cadena de 81 digitos.
+
+    param bytes numeros: Los 81 numeros, 0 para las casillas vacias.
+
+    return str: Cadena de 81 digitos.
+    '''
+
+    return bytes(numeros).translate(_A_TEXTO).decode()
+
+
+def _mapa_pistas(celdas):
+
+    '''
+    Calcula el mapa de bits de las casillas que tienen numero.
+
+    param bytearray celdas: Los 81 numeros del tablero.
+
+    return int: Mapa de 81 bits.
+    '''
+
+    pistas = 0
+    for k, numero in enumerate(celdas):
+        if numero:
+            pistas |= 1 << k
+    return pistas
@@ -0,0 +1,222 @@
+'''
+Tallado de sudokus con solucion unica.
+
+A partir de una plantilla completa se van borrando casillas en orden
+aleatorio. Cada vez que se borra una casilla se cuenta (con limite 2)
+cuantas soluciones tiene el sudoku resultante; si deja de ser unica, la
+casilla se devuelve. Asi el jugador siempre puede llegar a la misma
+solucion que se usa para revisar el sudoku.
+'''
+
+import random
+import time
+
+from generador import generar
+from geometria import geometria
+from perfilador import perfil
+from restricciones import (Restricciones, contar_soluciones,
+                           contar_soluciones_celdas)
+from tablero import Tablero
+
+# Cantidad de casillas que se intentan borrar en cada nivel,
+# 1 para principiante, 2 para intermedio y 3 para avanzado.
+VACIAS_NIVEL = {1: 38, 2: 48, 3: 64}
+
+# Tiempo maximo, en segundos, que se le dedica a tallar un sudoku de 9x9.
+# Los tableros mas grandes tienen un presupuesto proporcional a su cantidad
+# de casillas.
+PRESUPUESTO = 0.04
+
+
+def vacias_nivel(nivel, caja=3):
+
+    '''
+    Cantidad de casillas que se intentan borrar en un nivel, en la misma
+    proporcion que en el sudoku de 9x9.
+
+    param int nivel: 1 para principiante, 2 para intermedio y 3 para
+                     avanzado.
+    param int caja: Casillas por lado de cada cuadrante.
+
+    return int: Casillas a borrar.
+    '''
+
+    return round(VACIAS_NIVEL[nivel] * caja ** 4 / 81)
+
+
+def tallar_sudoku(solucion, vacias, presupuesto=PRESUPUESTO, aleatorio=random):
+
+    '''
+    Borra casillas de una plantilla completa sin perder la unicidad de la
+    solucion. Se detiene al llegar a la cantidad pedida, cuando ya no
+    quedan casillas que se puedan borrar o cuando se agota el presupuesto
+    de tiempo. En los niveles altos no siempre se puede llegar a la
+    cantidad pedida (un sudoku con 64 casillas vacias y solucion unica es
+    rarisimo), en ese caso se devuelve el mas dificil que se consiguio.
+
+    param list solucion: Lista de 9 listas con la plantilla completa.
+                         No se modifica.
+    param int vacias: Cantidad de casillas que se quieren borrar.
+    param float presupuesto: Segundos disponibles para tallar, None para
+                             no tener limite.
+    param random.Random aleatorio: Generador de numeros aleatorios.
+
+    return list sudoku: Lista de 9 listas con 0 en las casillas borradas.
+    '''
+
+    sudoku = [fila[:] for fila in solucion]
+    limite = None if presupuesto is None else time.perf_counter() + presupuesto
+
+    # Casillas en el orden en que se intentaran borrar.
+    indices = [(i, j) for i in range(9) for j in range(9)]
+    aleatorio.shuffle(indices)
+
+    borradas = 0
+    for i, j in indices:
+        if borradas == vacias:
+            break
+        if limite is not None and time.perf_counter() > limite:
+            break
+
+        if _se_puede_borrar(sudoku, i, j, limite):
+            sudoku[i][j] = 0
+            borradas += 1
+
+    return sudoku
+
+
+def tallar_celdas(solucion, caja, vacias, presupuesto=PRESUPUESTO,
+                  aleatorio=random):
+
+    '''
+    Version de tallar_sudoku() para cualquier tamano, con las casillas en
+    una sola secuencia por filas. Para borrar una casilla se buscan
+    soluciones con cada uno de los otros numeros que caben en ella; si
+    una de esas busquedas se pasa del presupuesto, la casilla se deja.
+
+    param bytes solucion: Los numeros de la plantilla completa por filas.
+    param int caja: Casillas por lado de cada cuadrante.
+    param int vacias: Cantidad de casillas que se quieren borrar.
+    param float presupuesto: Segundos disponibles para tallar, None para
+                             no tener limite.
+    param random.Random aleatorio: Generador de numeros aleatorios.
+
+    return bytearray: Los numeros del sudoku, 0 en las casillas borradas.
+    '''
+
+    tablas = geometria(caja)
+    sudoku = bytearray(solucion)
+    limite = None if presupuesto is None else time.perf_counter() + presupuesto
+
+    # Numeros de cada fila, columna y cuadrante que siguen en el sudoku.
+    filas = [tablas.todos] * tablas.lado
+    columnas = [tablas.todos] * tablas.lado
+    cajas = [tablas.todos] * tablas.lado
+
+    indices = list(range(tablas.celdas))
+    aleatorio.shuffle(indices)
+
+    borradas = 0
+    for k in indices:
+        if borradas == vacias:
+            break
+        if limite is not None and time.perf_counter() > limite:
+            break
+
+        numero = sudoku[k]
+        f, c, b = tablas.fila[k], tablas.columna[k], tablas.cuadrante[k]
+        bit = 1 << numero
+
+        # Numeros que cabrian en la casilla si se borra.
+        libres = tablas.todos & ~(filas[f] | columnas[c] | cajas[b]) | bit
+
+        se_puede = True
+        otros = libres & ~bit
+        while otros and se_puede:
+            otro = otros & -otros
+            otros ^= otro
+            sudoku[k] = otro.bit_length() - 1
+            if contar_soluciones_celdas(sudoku, tablas, 1, limite) != 0:
+                se_puede = False
+        sudoku[k] = numero
+
+        if se_puede:
+            sudoku[k] = 0
+            filas[f] &= ~bit
+            columnas[c] &= ~bit
+            cajas[b] &= ~bit
+            borradas += 1
+
+    return sudoku
+
+
+def nuevo_sudoku(nivel, semilla=None, presupuesto=PRESUPUESTO, caja=3):
+
+    '''
+    Genera una plantilla y la talla segun el nivel.
+
+    param int nivel: 1 para principiante, 2 para intermedio y 3 para
+                     avanzado.
+    param int semilla: Semilla del generador y del tallado, None para
+                       un sudoku al azar.
+    param float presupuesto: Segundos maximos de tallado de un sudoku de
+                             9x9, None para no tener limite.
+    param int caja: Casillas por lado de cada cuadrante: 3 para 9x9, 4 para
+                    16x16 y 5 para 25x25.
+
+    return Tablero: Tablero con las casillas que quedaron como pistas y
+                    la solucion.
+    '''
+
+    with perfil.fase('generar'):
+        plantilla = generar(semilla, caja)
+
+    if caja != 3:
+        if presupuesto is not None:
+            presupuesto *= caja ** 4 / 81
+        with perfil.fase('tallar'):
+            sudoku = tallar_celdas(plantilla.celdas, caja,
+                                   vacias_nivel(nivel, caja), presupuesto,
+                                   random.Random(semilla))
+        return Tablero.de_celdas(sudoku, plantilla.solucion)
+
+    with perfil.fase('tallar'):
+        sudoku = tallar_sudoku(plantilla.a_listas(), VACIAS_NIVEL[nivel],
+                               presupuesto, random.Random(semilla))
+    return Tablero.de_listas(sudoku, plantilla.solucion)
+
+
+def _se_puede_borrar(sudoku, i, j, limite=None):
+
+    '''
+    Revisa si al borrar la casilla (i, j) el sudoku sigue teniendo solucion
+    unica. Como el sudoku ya tiene una unica solucion, cualquier otra
+    solucion tendria que llevar un numero distinto en esa casilla; basta
+    entonces con buscar una sola solucion para cada uno de los otros
+    candidatos, lo que es mucho mas barato que contar hasta 2.
+
+    param list sudoku: Lista de 9 listas con solucion unica.
+    param int i: Fila de la casilla.
+    param int j: Columna de la casilla.
+    param float limite: Momento, de time.perf_counter(), en que se acaba
+                        el presupuesto, None para no tener limite.
+
+    return bool True: Si la casilla se puede borrar.
+    return bool False: Si al borrarla aparece otra solucion, o si la
+                       busqueda se paso del presupuesto (la casilla se
+                       deja, para no arriesgar la solucion unica).
+    '''
+
+    numero = sudoku[i][j]
+    sudoku[i][j] = 0
+    candidatos = Restricciones(sudoku).candidatos(i, j)
+
+    for otro in candidatos:
+        if otro != numero:
+            sudoku[i][j] = otro
+            if contar_soluciones(sudoku, 1, limite) != 0:
+                sudoku[i][j] = numero
+                return False
+
+    sudoku[i][j] = numero
+    return True
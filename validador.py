@@ -0,0 +1,262 @@
+#!/usr/bin/python3
+
+'''
+Revision por lotes de sudokus completos.
+
+Para revisar muchos tableros (por ejemplo la salida de lote.py o un
+archivo con partidas guardadas) no conviene revisarlos uno por uno con
+verificar(): validar_lote() recibe un arreglo de N tableros de 81 casillas
+y revisa todas las filas, columnas y cuadrantes de todos a la vez con
+operaciones de NumPy.
+
+Cada numero n se convierte en la mascara 1 << n y se hace el O de las
+mascaras de cada unidad; una unidad esta bien si tiene todos los bits del
+1 al 9, y como tiene 9 casillas eso solo pasa si no le falta ni se le
+repite ningun numero. Un tablero esta bien si el Y de las 27 mascaras
+tiene todos los bits, asi que en el caso normal (tableros validos) no hay
+que mirar cada unidad por separado; solo para los tableros con errores se
+busca la primera unidad que falla. Los tableros se procesan por bloques
+y con las casillas como primera dimension, para que cada operacion
+recorra memoria contigua y el bloque quepa en la cache.
+
+Si NumPy no esta instalado se usa una version en Python puro, mucho mas
+lenta pero con el mismo resultado. Sirve para cualquier tamano de sudoku
+(16x16, 25x25), que se calcula con la cantidad de casillas.
+
+Uso: python validador.py [--python] archivo [archivo ...]
+'''
+
+import argparse
+import math
+import sys
+import time
+from operator import itemgetter
+
+from geometria import geometria
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Tableros que se revisan de una vez. Con 4096 tableros de 9x9 cada bloque
+# ocupa unos 650 KB en mascaras de 16 bits; bloques mas grandes se salen
+# de la cache y son mas lentos.
+BLOQUE = 4096
+
+# Errores que muestra la linea de comandos como maximo.
+ERRORES_MOSTRADOS = 10
+
+
+def validar_lote(tableros, bloque=BLOQUE):
+
+    '''
+    Revisa que cada tablero este completo y sin numeros repetidos en
+    ninguna fila, columna o cuadrante.
+
+    param tableros: Arreglo de NumPy (N, 81) de uint8 con los numeros por
+                    filas, o cualquier cosa que numpy.asarray() convierta
+                    en uno (por ejemplo una lista de bytes de 81 numeros).
+    param int bloque: Tableros que se revisan de una vez.
+
+    return tuple: (validos, primera). validos es un arreglo de N bool y
+                  primera uno de N enteros con la primera unidad que
+                  falla en cada tablero, en el orden de
+                  Geometria.unidades (filas, columnas y cuadrantes), o -1
+                  si el tablero esta bien. Sin NumPy son listas.
+    '''
+
+    if numpy is None:
+        return validar_lote_python(tableros)
+
+    tableros = numpy.asarray(tableros, dtype=numpy.uint8)
+    cantidad, celdas = tableros.shape
+    lado = math.isqrt(celdas)
+    caja = math.isqrt(lado)
+    todos = geometria(caja).todos
+
+    # Los bits llegan hasta el lado: 16 bits alcanzan hasta el 9x9, los de
+    # 16x16 y 25x25 necesitan 32.
+    tipo = numpy.uint16 if lado < 16 else numpy.uint32
+    uno = tipo(1)
+
+    validos = numpy.empty(cantidad, dtype=bool)
+    primera = numpy.full(cantidad, -1, dtype=numpy.int16)
+
+    for inicio in range(0, cantidad, bloque):
+        fin = min(inicio + bloque, cantidad)
+        numeros = tableros[inicio:fin]
+
+        # Un numero mayor que 31 podria desplazar el bit fuera del tipo;
+        # se cambia por uno que tampoco es valido pero cabe.
+        if numeros.max(initial=0) > lado:
+            numeros = numpy.minimum(numeros, lado + 1)
+
+        # Mascara de cada casilla, con las casillas como primera dimension:
+        # m[f, c, t] es la casilla (f, c) del tablero t del bloque.
+        m = numpy.left_shift(uno, numeros, dtype=tipo)
+        m = numpy.ascontiguousarray(m.T).reshape(lado, lado, -1)
+
+        filas, columnas, cajas = _unidades(m, caja)
+        y = numpy.bitwise_and.reduce(filas, axis=0)
+        y &= numpy.bitwise_and.reduce(columnas, axis=0)
+        y &= numpy.bitwise_and.reduce(cajas, axis=0)
+        numpy.equal(y & todos, todos, out=validos[inicio:fin])
+
+        # Solo en los tableros con errores se busca la unidad que falla.
+        malos = numpy.flatnonzero(~validos[inicio:fin])
+        if len(malos):
+            bien = numpy.concatenate(
+                [filas[:, malos], columnas[:, malos], cajas[:, malos]])
+            bien = bien & todos == todos
+            primera[inicio + malos] = bien.argmin(axis=0)
+
+    return validos, primera
+
+
+def _unidades(m, caja):
+
+    '''
+    Calcula el O de las mascaras de cada fila, columna y cuadrante.
+
+    param numpy.ndarray m: Mascaras (lado, lado, tableros).
+    param int caja: Casillas por lado de cada cuadrante.
+
+    return tuple: (filas, columnas, cajas), cada uno (lado, tableros).
+    '''
+
+    lado = caja * caja
+    filas = numpy.bitwise_or.reduce(m, axis=1)
+    columnas = numpy.bitwise_or.reduce(m, axis=0)
+
+    # Las casillas de la fila f = fb * caja + fi y la columna
+    # c = cb * caja + ci estan en el cuadrante fb * caja + cb.
+    cuadrantes = m.reshape(caja, caja, caja, caja, -1)
+    cajas = numpy.bitwise_or.reduce(cuadrantes, axis=3)
+    cajas = numpy.bitwise_or.reduce(cajas, axis=1).reshape(lado, -1)
+    return filas, columnas, cajas
+
+
+def validar_lote_python(tableros):
+
+    '''
+    Version de validar_lote() en Python puro, para cuando NumPy no esta
+    instalado.
+
+    param iterable tableros: Tableros de la misma cantidad de casillas,
+                             cada uno como bytes o lista de numeros.
+
+    return tuple: (validos, primera), listas con el mismo significado que
+                  en validar_lote().
+    '''
+
+    validos = []
+    primera = []
+    tomar = None
+    for tablero in tableros:
+        if tomar is None:
+            # Las casillas de cada unidad se sacan de una vez con
+            # itemgetter, que es mas rapido que recorrerlas.
+            lado = math.isqrt(len(tablero))
+            tomar = [itemgetter(*unidad)
+                     for unidad in geometria(math.isqrt(lado)).unidades]
+            completo = set(range(1, lado + 1))
+
+        falla = -1
+        for u, casillas in enumerate(tomar):
+            if set(casillas(tablero)) != completo:
+                falla = u
+                break
+        validos.append(falla == -1)
+        primera.append(falla)
+    return validos, primera
+
+
+def describir(unidad, caja=3):
+
+    '''
+    Describe una unidad de las que devuelve validar_lote().
+
+    param int unidad: Posicion de la unidad en Geometria.unidades.
+    param int caja: Casillas por lado de cada cuadrante.
+
+    return str: Por ejemplo 'fila 3', contando desde 1.
+    '''
+
+    tipo, numero = divmod(unidad, caja * caja)
+    return f'{("fila", "columna", "cuadrante")[tipo]} {numero + 1}'
+
+
+def leer_tableros(rutas):
+
+    '''
+    Lee los tableros de uno o varios archivos, uno por linea. Se toma la
+    ultima palabra de cada linea, asi sirven tanto los archivos de lote.py
+    (donde la ultima palabra es la solucion) como los que solo tienen un
+    tablero por linea. Los numeros del 10 en adelante van con letras, como
+    en Tablero.a_texto().
+
+    param list rutas: Archivos a leer.
+
+    return list: Los tableros como bytes.
+    '''
+
+    # '0'-'9' a 0-9 y 'A'-'P' a 10-25.
+    traduccion = bytearray(256)
+    traduccion[48:58] = range(10)
+    traduccion[65:81] = range(10, 26)
+
+    tableros = []
+    for ruta in rutas:
+        with open(ruta, 'rb') as archivo:
+            for linea in archivo:
+                palabras = linea.split()
+                if palabras:
+                    tableros.append(palabras[-1].translate(traduccion))
+    return tableros
+
+
+def main(argv=None):
+
+    '''
+    Punto de entrada de la linea de comandos.
+
+    param list argv: Argumentos, None para usar sys.argv.
+
+    return int: 0 si todos los tableros estan bien, 1 si alguno no.
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Revisa tableros completos de sudoku por lotes.')
+    parser.add_argument('archivos', nargs='+',
+                        help='archivos con un tablero por linea')
+    parser.add_argument('--python', action='store_true',
+                        help='usa la version en Python puro aunque este '
+                        'NumPy')
+    args = parser.parse_args(argv)
+
+    tableros = leer_tableros(args.archivos)
+    if not tableros:
+        print('no hay tableros')
+        return 0
+
+    inicio = time.perf_counter()
+    if args.python or numpy is None:
+        validos, primera = validar_lote_python(tableros)
+    else:
+        validos, primera = validar_lote(
+            numpy.frombuffer(b''.join(tableros), dtype=numpy.uint8)
+            .reshape(len(tableros), -1))
+    tiempo = time.perf_counter() - inicio
+
+    caja = math.isqrt(math.isqrt(len(tableros[0])))
+    malos = [k for k, valido in enumerate(validos) if not valido]
+    for k in malos[:ERRORES_MOSTRADOS]:
+        print(f'tablero {k + 1}: {describir(int(primera[k]), caja)}')
+    print(f'{len(tableros)} tableros, {len(malos)} con errores, '
+          f'{len(tableros) / tiempo:,.0f} tableros/s')
+    return 1 if malos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())